@@ -0,0 +1,128 @@
+"""
+===============================================================================
+This file runs many words on one Turing Machine at once, advancing all of
+them a step at a time with NumPy
+===============================================================================
+"""
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+class BatchMachine():
+    """
+    The tables of a CompiledMachine as NumPy arrays indexed by
+    [state id, symbol id]. The last symbol id stands for every symbol that
+    is not in the machine's alphabet, and has no transitions. The last state
+    id is an extra parked state that never changes anything.
+    run() loads the words into the rows of a 2-D tape array and moves every
+    word that is still running on by one step per iteration. Rows that
+    accept, reject or run out of loops are parked, and parked rows are only
+    removed once they make up half the array, as that means copying it.
+    """
+    compiled = None
+    next_state = None
+    output = None
+    move = None
+    #False where a state has no transition for a symbol
+    defined = None
+    unknown = 0
+    parked = 0
+
+    def __init__(self, compiled):
+        if numpy == None:
+            raise ImportError("BatchMachine needs NumPy, see requirements.txt")
+        self.compiled = compiled
+        shape = (len(compiled.states) + 1, compiled.width + 1)
+        self.unknown = compiled.width
+        self.parked = len(compiled.states)
+        self.next_state = numpy.zeros(shape, numpy.int32)
+        self.output = numpy.zeros(shape, numpy.int32)
+        self.move = numpy.zeros(shape, numpy.int32)
+        self.defined = numpy.zeros(shape, bool)
+        for s, row in enumerate(compiled.table):
+            #Rows of the accept and reject states are None
+            for c, entry in enumerate(row or ()):
+                if entry != None:
+                    self.next_state[s, c], self.output[s, c], self.move[s, c] = entry
+                    self.defined[s, c] = True
+        self.next_state[self.parked] = self.parked
+        self.output[self.parked] = numpy.arange(shape[1])
+        self.defined[self.parked] = True
+
+    def _encode(self, words):
+        """ Internal method for loading the words into a 2-D tape array """
+        ids = self.compiled.alphabet.symbol_ids
+        width = self.compiled.width
+        dtype = numpy.uint8 if width < 0xff else numpy.int32
+        #Room for the longest word, the blank after it and one more
+        tape = numpy.zeros((len(words), max(map(len, words), default=0) + 2), dtype)
+        for i, word in enumerate(words):
+            cells = [ids.get(c, self.unknown) for c in word]
+            tape[i, :len(cells)] = [c if c < width else self.unknown for c in cells]
+        return tape
+
+    def run(self, words, max_loops=100000, bidirectional=False):
+        """
+        Returns the result of each word in words, the same as running them one
+        after another with new_tape() and begin() on a TM with these options.
+        Raises KeyError, like begin(), if a word reads a symbol its state has
+        no transition for (reporting the first such word).
+        """
+        compiled = self.compiled
+        results = [False] * len(words)
+        if compiled.start == compiled.accept or compiled.start == compiled.reject:
+            return [compiled.start == compiled.accept] * len(words)
+        tape = self._encode(words)
+        #Which word each row holds, and the configuration of each row
+        index = numpy.arange(len(words))
+        state = numpy.full(len(words), compiled.start, numpy.int32)
+        head = numpy.zeros(len(words), numpy.int64)
+        #Where the first cell of every word is, moved by growing left
+        first = 0
+        errors = []
+        steps = 0
+        running = len(words)
+        while running > 0 and steps <= max_loops:
+            rows = numpy.arange(len(index))
+            c = tape[rows, head]
+            missing = ~self.defined[state, c]
+            if missing.any():
+                for row in numpy.nonzero(missing)[0]:
+                    if c[row] == self.unknown:
+                        symbol = words[index[row]][head[row] - first]
+                    else:
+                        symbol = compiled.alphabet.symbols[c[row]]
+                    errors.append((index[row], symbol))
+            s = state
+            state = self.next_state[s, c]
+            tape[rows, head] = self.output[s, c]
+            head = head + self.move[s, c]
+            steps = steps + 1
+            if bidirectional:
+                if head.min() < 0:
+                    grow = tape.shape[1]
+                    tape = numpy.concatenate((numpy.zeros_like(tape), tape), 1)
+                    head = head + grow
+                    first = first + grow
+            else:
+                numpy.maximum(head, 0, out=head)
+            if head.max() >= tape.shape[1] - 1:
+                tape = numpy.concatenate((tape, numpy.zeros_like(tape)), 1)
+            accepted = (state == compiled.accept) & ~missing
+            done = accepted | (state == compiled.reject) | missing
+            if done.any():
+                for i in index[accepted]:
+                    results[i] = True
+                state[done] = self.parked
+                running = running - int(done.sum())
+                if running * 2 < len(index):
+                    keep = state != self.parked
+                    index = index[keep]
+                    state = state[keep]
+                    head = head[keep]
+                    tape = tape[keep]
+        if errors:
+            raise KeyError(min(errors)[1])
+        return results
@@ -0,0 +1,187 @@
+"""
+Note:
+    Benchmarks the bundled example machines on generated words of growing
+    length, reporting parse time, words/sec, steps/sec and peak memory.
+    Results can be saved as JSON and compared against a saved baseline, in
+    which case the exit status is 1 if anything got slower than allowed.
+"""
+
+import argparse
+import json
+import random
+import sys
+import time
+import tracemalloc
+import runtm
+from turingmachine import TuringMachine
+
+def _bits(rng, n):
+    return "".join(rng.choice('01') for i in range(n))
+
+def palin_words(rng, n):
+    """ Palindromes of length n, the machine crosses the word n times """
+    half = "".join(rng.choice('abc') for i in range(n // 2))
+    middle = rng.choice(['', 'a', 'b', 'c']) if n % 2 else ''
+    return half + middle + half[::-1]
+
+def parity_words(rng, n):
+    return _bits(rng, n)
+
+def bword_words(rng, n):
+    """
+    Accepted x#y#z words: y has a 1 wherever x has a 0 and a 0 wherever x
+    has a 1, apart from the last bit where they may both be 0, and z is x|y.
+    The machine cross checks every bit, so steps grow with the square of n
+    """
+    size = max(n // 3, 1)
+    x = _bits(rng, size)
+    y = "".join('1' if a == '0' else '0' for a in x[:-1])
+    y = y + (rng.choice('01') if x[-1] == '0' else '0')
+    z = "".join('1' if '1' in (a, b) else '0' for a, b in zip(x, y))
+    return x + "#" + y + "#" + z
+
+def logic_words(rng, n):
+    """ Correct bitwise $x op y=z equations """
+    size = max(n // 4, 1)
+    x, y = _bits(rng, size), _bits(rng, size)
+    op = rng.choice('|&^')
+    ops = {'|': lambda a, b: a | b, '&': lambda a, b: a & b,
+        '^': lambda a, b: a ^ b}
+    z = "".join(str(ops[op](int(a), int(b))) for a, b in zip(x, y))
+    return "$" + x + op + y + "=" + z
+
+def input_words(rng, n):
+    return 'a' * max(n - 1, 0) + 'b'
+
+#Each example machine with a function making a word of about length n
+WORKLOADS = {
+    'palin': ('examples/palin.txt', palin_words),
+    'parity': ('examples/parity.txt', parity_words),
+    'bword': ('examples/bword.txt', bword_words),
+    'logic': ('examples/logic.txt', logic_words),
+    'input': ('examples/input.txt', input_words),
+}
+
+def _run(tm, words):
+    """ Runs every word, returning the total number of steps taken """
+    steps = 0
+    for word in words:
+        tm.new_tape(word)
+        try:
+            tm.begin()
+        except KeyError:
+            pass
+        steps = steps + tm._reset_loops - tm.MAX_LOOPS
+    return steps
+
+def benchmark(file, words, engine="interpreted", max_loops=100000, repeat=3):
+    """
+    Returns the measurements of running words on the machine in file.
+    Times are the best of repeat runs to reduce noise
+    """
+    parse_time = None
+    seconds = None
+    for i in range(repeat):
+        start = time.perf_counter()
+        tm = runtm._read_file(file, engine, max_loops=max_loops)
+        elapsed = time.perf_counter() - start
+        if parse_time == None or elapsed < parse_time:
+            parse_time = elapsed
+        start = time.perf_counter()
+        steps = _run(tm, words)
+        elapsed = time.perf_counter() - start
+        if seconds == None or elapsed < seconds:
+            seconds = elapsed
+    #tracemalloc slows everything down, so memory is measured separately
+    tracemalloc.start()
+    _run(tm, words)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return {
+        "parse_time": parse_time,
+        "words": len(words),
+        "steps": steps,
+        "seconds": seconds,
+        "words_per_sec": len(words) / seconds if seconds else 0,
+        "steps_per_sec": steps / seconds if seconds else 0,
+        "peak_memory": peak,
+    }
+
+def run_all(machines, lengths, count, engine="interpreted", seed=0,
+            max_loops=100000, repeat=3):
+    """
+    Benchmarks every machine on count words of each length. Returns the
+    results keyed by "machine/engine/length"
+    """
+    results = {}
+    for name in machines:
+        file, make_word = WORKLOADS[name]
+        for n in lengths:
+            rng = random.Random(seed)
+            words = [make_word(rng, n) for i in range(count)]
+            key = "{}/{}/{}".format(name, engine, n)
+            results[key] = benchmark(file, words, engine, max_loops, repeat)
+    return results
+
+def compare(results, baseline, tolerance=0.2):
+    """
+    Returns a list of messages, one for every result whose words/sec or
+    steps/sec dropped more than tolerance (a fraction) below the baseline
+    """
+    regressions = []
+    for key in sorted(results):
+        if key not in baseline:
+            continue
+        for measure in ("words_per_sec", "steps_per_sec"):
+            old, new = baseline[key][measure], results[key][measure]
+            if old > 0 and new < old * (1 - tolerance):
+                regressions.append("{} {}: {:.0f} -> {:.0f} ({:+.1f}%)".format(
+                    key, measure, old, new, 100.0 * (new - old) / old))
+    return regressions
+
+def report(results):
+    lines = ["{:<28} {:>9} {:>12} {:>12} {:>11} {:>10}".format("benchmark",
+        "parse ms", "words/sec", "steps/sec", "peak KiB", "steps")]
+    for key in results:
+        r = results[key]
+        lines.append("{:<28} {:>9.2f} {:>12.0f} {:>12.0f} {:>11.1f} {:>10}".format(
+            key, r["parse_time"] * 1000, r["words_per_sec"], r["steps_per_sec"],
+            r["peak_memory"] / 1024, r["steps"]))
+    return "\n".join(lines)
+
+def parse():
+    parser = argparse.ArgumentParser(description="Benchmarks the example \
+    Turing Machines")
+    parser.add_argument("-m", "--machines", type=str, nargs="+",
+    choices=sorted(WORKLOADS), default=sorted(WORKLOADS))
+    parser.add_argument("-e", "--engine", type=str,
+    choices=TuringMachine.ENGINES, default="interpreted")
+    parser.add_argument("-l", "--lengths", type=int, nargs="+", help="The \
+    lengths of the generated words", default=[4, 16, 64, 256])
+    parser.add_argument("-n", "--count", type=int, help="The number of words \
+    of each length", default=20)
+    parser.add_argument("-r", "--repeat", type=int, help="Times are the best \
+    of this many runs", default=3)
+    parser.add_argument("-s", "--save", type=str, help="Save the results to \
+    this JSON file", default=None)
+    parser.add_argument("-b", "--baseline", type=str, help="Compare against \
+    results saved earlier with --save", default=None)
+    parser.add_argument("-t", "--tolerance", type=float, help="The fraction \
+    words/sec or steps/sec may drop below the baseline", default=0.2)
+    args = parser.parse_args()
+    results = run_all(args.machines, args.lengths, args.count, args.engine,
+        repeat=args.repeat)
+    print(report(results))
+    if args.save != None:
+        with open(args.save, 'w') as f:
+            json.dump(results, f, indent=1, sort_keys=True)
+    if args.baseline != None:
+        with open(args.baseline, 'r') as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        for regression in regressions:
+            print("REGRESSION " + regression)
+        if regressions:
+            sys.exit(1)
+
+if __name__ == "__main__":
+    parse()
@@ -0,0 +1,316 @@
+"""
+===============================================================================
+This file runs large families of small Turing Machines, eg the candidates of
+a busy beaver search, given one per line in a compact encoding
+===============================================================================
+Note:
+    A machine is written as its states separated by _, the first being the
+    start state. Each state lists a triple for every symbol, in order, of
+    the symbol to write, the direction to move (R or L) and the next state
+    (A for the first state, B for the next and so on, Z for the accept state
+    and Y for the reject state), or --- for no transition. Symbols are the
+    digits 0 to k - 1 and 0 is the blank, eg the two state busy beaver:
+        1RB1LB_1LA1RZ
+    A line may give the machine's own max loops after the machine.
+    Words are strings of the digits, and _ is also read as the blank.
+    Machines that only differ by the names of their states behave the same,
+    so each is only run once.
+"""
+
+import argparse
+import itertools
+import json
+import multiprocessing
+import os
+import sys
+import time
+from turingmachine import Direction, State, TuringMachine
+
+_ACCEPT = 'Z'
+_REJECT = 'Y'
+_UNDEFINED = '---'
+_MOVES = {'R': 1, 'L': -1}
+_SYMBOLS = bytes.maketrans(b'_0123456789', bytes([0]) + bytes(range(10)))
+
+class InvalidMachine(Exception):
+    pass
+
+def _split(text):
+    """ Internal method for the triples of each state of an encoded machine """
+    groups = text.split('_')
+    k = len(groups[0]) // 3
+    if k == 0 or len(groups) > 24 or any(len(g) != k * 3 for g in groups):
+        raise InvalidMachine("Invalid machine! {}".format(text))
+    return [[g[i:i + 3] for i in range(0, len(g), 3)] for g in groups]
+
+def parse_machine(text):
+    """
+    Returns the table of an encoded machine, in the layout of
+    CompiledMachine: table[state][symbol] is (new state, output, movement)
+    or None, with the accept state numbered n and the reject state n + 1,
+    for n states. Their rows are None
+    """
+    states = _split(text)
+    n = len(states)
+    table = []
+    for triples in states:
+        row = []
+        for triple in triples:
+            if triple == _UNDEFINED:
+                row.append(None)
+                continue
+            output, move, new_state = triple
+            if not output.isdigit() or int(output) >= len(triples) or \
+                    move not in _MOVES:
+                raise InvalidMachine("Invalid transition! {}".format(triple))
+            if new_state == _ACCEPT:
+                new_state = n
+            elif new_state == _REJECT:
+                new_state = n + 1
+            else:
+                new_state = ord(new_state) - ord('A')
+                if not 0 <= new_state < n:
+                    raise InvalidMachine("Invalid state! {}".format(triple))
+            row.append((new_state, int(output), _MOVES[move]))
+        table.append(row)
+    table.extend([None, None])
+    return table
+
+def canonical(text):
+    """
+    The encoding of the machine with its states renamed in the order they
+    are first reached from the start state, taking symbols in order.
+    States that cannot be reached are dropped. Machines with the same
+    canonical encoding are the same up to the names of their states
+    """
+    states = _split(text)
+    names = {'A': 'A', _ACCEPT: _ACCEPT, _REJECT: _REJECT}
+    order = ['A']
+    i = 0
+    while i < len(order):
+        for triple in states[ord(order[i]) - ord('A')]:
+            if triple != _UNDEFINED and triple[2] not in names:
+                names[triple[2]] = chr(ord('A') + len(order))
+                order.append(triple[2])
+        i = i + 1
+    return '_'.join("".join(t if t == _UNDEFINED else t[:2] + names[t[2]]
+        for t in states[ord(state) - ord('A')]) for state in order)
+
+def to_turingmachine(text, **options):
+    """
+    Builds a TuringMachine from an encoded machine, with its symbols as the
+    digits and '0' as the empty symbol. options are passed on to TuringMachine
+    """
+    states = _split(text)
+    names = [chr(ord('A') + i) for i in range(len(states))] + [_ACCEPT, _REJECT]
+    objects = {name: State(name=name) for name in names}
+    directions = {'R': Direction.RIGHT, 'L': Direction.LEFT}
+    for name, triples in zip(names, states):
+        for symbol, triple in enumerate(triples):
+            if triple != _UNDEFINED:
+                objects[name].create_transition(str(symbol), objects[triple[2]],
+                    triple[0], directions[triple[1]])
+    return TuringMachine("", objects[_ACCEPT], objects[_REJECT], objects['A'],
+        '0', **options)
+
+class Stats():
+    """ How the words run on one machine ended """
+    __slots__ = ("accepted", "rejected", "undefined", "unfinished", "steps",
+        "most_steps")
+
+    def __init__(self):
+        self.accepted = 0
+        self.rejected = 0
+        #Stopped on a symbol its state has no transition for
+        self.undefined = 0
+        #Ran out of loops
+        self.unfinished = 0
+        #The steps taken over all words, and by the longest run
+        self.steps = 0
+        self.most_steps = 0
+
+    def as_dict(self):
+        return {name: getattr(self, name) for name in Stats.__slots__}
+
+def _run_word(table, accept, reject, cells, max_loops, bidirectional):
+    """
+    Internal method running one word with the semantics of
+    CompiledMachine.run. Returns the state it stopped in, or None if a
+    transition was missing, and the steps taken
+    """
+    s = 0
+    pos = 0
+    start = 0
+    loops = max_loops
+    missing = False
+    while not missing and s != accept and s != reject and loops >= 0:
+        i = 0
+        try:
+            for i in range(loops + 1):
+                s, cells[pos], move = table[s][cells[pos]]
+                pos = pos + move
+                if pos < start:
+                    if bidirectional:
+                        if start == 0:
+                            #Make room in front of the tape, as Tape does
+                            grow = max(len(cells), 16)
+                            cells[:0] = bytes(grow)
+                            start = grow
+                        start = start - 1
+                    pos = start
+            i = loops + 1
+        except (IndexError, TypeError):
+            if s == accept or s == reject:
+                pass
+            elif pos == len(cells):
+                cells.extend(bytes(len(cells) + 16))
+            else:
+                missing = True
+        loops = loops - i
+    if missing:
+        #Like TuringMachine._read, the step that finds no transition counts
+        loops = loops - 1
+        return None, max_loops - loops
+    return s, max_loops - loops
+
+def run(text, words=("",), max_loops=1000, bidirectional=False):
+    """ Runs every word on an encoded machine and returns the Stats """
+    table = parse_machine(text)
+    accept = len(table) - 2
+    stats = Stats()
+    for word in words:
+        cells = bytearray(word.encode().translate(_SYMBOLS))
+        s, steps = _run_word(table, accept, accept + 1, cells, max_loops,
+            bidirectional)
+        if s == None:
+            stats.undefined = stats.undefined + 1
+        elif s == accept:
+            stats.accepted = stats.accepted + 1
+        elif s == accept + 1:
+            stats.rejected = stats.rejected + 1
+        else:
+            stats.unfinished = stats.unfinished + 1
+        stats.steps = stats.steps + steps
+        stats.most_steps = max(stats.most_steps, steps)
+    return stats
+
+def _parse_line(line):
+    """ Internal method for the machine and max loops (or None) of a line """
+    parts = line.split()
+    if len(parts) > 1:
+        return parts[0], int(parts[1])
+    return parts[0], None
+
+#Each worker process keeps the words and options
+_worker_options = None
+
+def _init_worker(words, max_loops, bidirectional):
+    global _worker_options
+    _worker_options = (words, max_loops, bidirectional)
+
+def _run_machine(job):
+    words, max_loops, bidirectional = _worker_options
+    number, text, own_loops = job
+    if own_loops != None:
+        max_loops = own_loops
+    try:
+        return number, text, run(text, words, max_loops, bidirectional), None
+    except InvalidMachine as e:
+        return number, text, None, str(e)
+
+def search(lines, words=("",), max_loops=1000, bidirectional=False, jobs=1,
+           chunksize=256):
+    """
+    Runs the machine on each line of lines against words (by default just
+    the blank tape), yielding (line number, machine, Stats, error) in order.
+    A machine equal to an earlier one up to the names of its states is not
+    run, its error is instead "duplicate of line <n>". The machines are
+    shared between jobs worker processes, reading a few chunks ahead.
+    """
+    words = list(words)
+    seen = {}
+    def jobs_of(lines):
+        for number, line in enumerate(lines, 1):
+            if not line.strip() or line.startswith('#'):
+                continue
+            text, own_loops = _parse_line(line)
+            try:
+                key = (canonical(text), own_loops)
+            except (InvalidMachine, IndexError):
+                key = None
+            if key in seen:
+                yield number, text, None, "duplicate of line {}".format(seen[key])
+                continue
+            if key != None:
+                seen[key] = number
+            yield number, text, own_loops
+    if jobs == 1:
+        _init_worker(words, max_loops, bidirectional)
+        for job in jobs_of(lines):
+            yield job if len(job) == 4 else _run_machine(job)
+        return
+    with multiprocessing.Pool(jobs, _init_worker,
+            (words, max_loops, bidirectional)) as pool:
+        pending = jobs_of(lines)
+        while True:
+            block = list(itertools.islice(pending, jobs * chunksize * 4))
+            if not block:
+                return
+            #Duplicates are answered here, the rest by the workers in order
+            results = iter(pool.imap(_run_machine,
+                [job for job in block if len(job) == 3], chunksize))
+            for job in block:
+                yield job if len(job) == 4 else next(results)
+
+def _format_text(number, text, stats, error):
+    if stats == None:
+        return "{} {} {}\n".format(number, text, error)
+    return "{} {} {} {} {} {} {} {}\n".format(number, text, stats.accepted,
+        stats.rejected, stats.undefined, stats.unfinished, stats.steps,
+        stats.most_steps)
+
+def _format_jsonl(number, text, stats, error):
+    result = {"line": number, "machine": text}
+    if stats == None:
+        result["error"] = error
+    else:
+        result.update(stats.as_dict())
+    return json.dumps(result) + "\n"
+
+FORMATS = {"text": _format_text, "jsonl": _format_jsonl}
+
+def parse():
+    parser = argparse.ArgumentParser(description="Runs many small Turing \
+    Machines in the compact encoding described in bulk.py")
+    parser.add_argument("-i", "--input", type=str, help="The file of \
+    machines, one per line", required=True)
+    parser.add_argument("-w", "--words", type=str, help="The file of words \
+    to run on every machine, by default only the blank tape", default=None)
+    parser.add_argument("-l", "--max-loops", type=int, help="The max loops \
+    of machines that do not give their own", default=1000)
+    parser.add_argument("--bidirectional", action="store_true", help="Let \
+    the tape grow to the left")
+    parser.add_argument("-j", "--jobs", type=int, help="The number of worker \
+    processes", default=os.cpu_count() or 1)
+    parser.add_argument("-f", "--format", type=str, help="How the results \
+    are written, text is: line machine accepted rejected undefined \
+    unfinished steps most_steps", choices=sorted(FORMATS), default="text")
+    args = parser.parse_args()
+    words = [""]
+    if args.words != None:
+        with open(args.words) as f:
+            words = [word.replace('\n', "") for word in f]
+    format = FORMATS[args.format]
+    machines = 0
+    began = time.monotonic()
+    with open(args.input) as f:
+        for result in search(f, words, args.max_loops, args.bidirectional,
+                args.jobs):
+            sys.stdout.write(format(*result))
+            machines = machines + 1
+    elapsed = time.monotonic() - began
+    print("{} machines in {:.2f}s ({:.0f} machines/sec)".format(machines,
+        elapsed, machines / max(elapsed, 1e-9)), file=sys.stderr)
+
+if __name__ == "__main__":
+    parse()
@@ -0,0 +1,150 @@
+"""
+===============================================================================
+This file remembers the results of words already run on a Turing Machine,
+in memory and optionally in a SQLite file shared between runs
+===============================================================================
+"""
+
+import hashlib
+import sqlite3
+from collections import OrderedDict
+
+def state_order(tm):
+    """
+    The states reachable from the start state of tm, numbered in the order
+    they are found taking symbols in sorted order, so the numbers do not
+    depend on the names of the states or the order of the file
+    """
+    found = {}
+    order = []
+    def add(state):
+        if state not in found:
+            found[state] = True
+            order.append(state)
+    for state in (tm._start_state, tm.accept_state, tm.reject_state):
+        add(state)
+    i = 0
+    while i < len(order):
+        transitions = order[i].transitions
+        for character in sorted(transitions):
+            add(transitions[character].new_state)
+        i = i + 1
+    return order
+
+def machine_fingerprint(tm):
+    """
+    A stable hash of everything that decides the result of a word: the
+    states reachable from the start state with their transitions, the accept
+    and reject states, the empty symbol and the options of the TM.
+    States are numbered by state_order.
+    """
+    order = state_order(tm)
+    ids = {state: i for i, state in enumerate(order)}
+    lines = []
+    for i, state in enumerate(order):
+        transitions = state.transitions
+        for character in sorted(transitions):
+            t = transitions[character]
+            lines.append("{} {} {} {} {}".format(i, character,
+                ids[t.new_state], t.output_letter, t.movement_direction.value))
+    lines.append("accept {} reject {}".format(ids[tm.accept_state],
+        ids[tm.reject_state]))
+    lines.append("empty {} loops {} bidirectional {} cycles {}".format(
+        tm.EMPTY_SYMBOL, tm._reset_loops, tm.bidirectional, tm.detect_cycles))
+    return hashlib.sha256("\n".join(lines).encode()).hexdigest()
+
+class ResultCache():
+    """
+    Maps words to the result of running them on a TM.
+    The most recently used size results are kept in memory. If a path is
+    given results are also stored in a SQLite file under the machine's
+    fingerprint, so a later run of an unchanged machine can reuse them.
+    cache[word] raises KeyError for words that have not been run; run(word)
+    runs them.
+    """
+    tm = None
+    fingerprint = None
+    size = 0
+    #Results are written to the file in batches of this many
+    COMMIT_EVERY = 1000
+    _results = None
+    _db = None
+    _uncommitted = 0
+
+    def __init__(self, tm, size=4096, path=None):
+        self.tm = tm
+        self.fingerprint = machine_fingerprint(tm)
+        self.size = size
+        self._results = OrderedDict()
+        if path != None:
+            self._db = sqlite3.connect(path)
+            self._db.execute("CREATE TABLE IF NOT EXISTS results (machine TEXT, "
+                "word TEXT, result INTEGER, PRIMARY KEY (machine, word))")
+
+    def __getitem__(self, word):
+        if word in self._results:
+            self._results.move_to_end(word)
+            return self._results[word]
+        if self._db == None:
+            raise KeyError(word)
+        row = self._db.execute("SELECT result FROM results WHERE machine = ? "
+            "AND word = ?", (self.fingerprint, word)).fetchone()
+        if row == None:
+            raise KeyError(word)
+        #Stored as 1, 0 or NULL for True, False or None (loops forever)
+        res = None if row[0] == None else bool(row[0])
+        self._remember(word, res)
+        return res
+
+    def __setitem__(self, word, res):
+        self._remember(word, res)
+        if self._db != None:
+            self._db.execute("INSERT OR REPLACE INTO results VALUES (?, ?, ?)",
+                (self.fingerprint, word, None if res == None else int(res)))
+            self._uncommitted = self._uncommitted + 1
+            if self._uncommitted >= self.COMMIT_EVERY:
+                self.commit()
+
+    def __contains__(self, word):
+        try:
+            self[word]
+        except KeyError:
+            return False
+        return True
+
+    def _remember(self, word, res):
+        """ Internal method for adding to the in memory LRU """
+        if self.size <= 0:
+            return
+        self._results[word] = res
+        self._results.move_to_end(word)
+        if len(self._results) > self.size:
+            self._results.popitem(last=False)
+
+    def run(self, word):
+        """ Returns the result of word, running it on the TM if needed """
+        try:
+            return self[word]
+        except KeyError:
+            self.tm.new_tape(word)
+            res = self.tm.begin()
+            self[word] = res
+            return res
+
+    def commit(self):
+        """ Writes any results not yet saved to the file """
+        if self._db != None:
+            self._db.commit()
+            self._uncommitted = 0
+
+    def close(self):
+        self.commit()
+        if self._db != None:
+            self._db.close()
+            self._db = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
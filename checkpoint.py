@@ -0,0 +1,118 @@
+"""
+===============================================================================
+This file saves the configuration of a running Turing Machine to disk and
+restores it, so long computations can be run in slices and resumed after a
+restart
+===============================================================================
+Note:
+    The file is a header followed by a payload.
+    The header is MAGIC, the format version, the fingerprint of the machine
+    (see cache.machine_fingerprint), the SHA-256 of the word the run started
+    from and the SHA-256 of the payload.
+    The payload is marshalled (state, tape position, loops left, symbols,
+    typecode, cells) where state is numbered by cache.state_order, symbols
+    lists the symbols on the tape and cells is the zlib compressed array of
+    the index into symbols of every cell.
+"""
+
+import hashlib
+import marshal
+import os
+import struct
+import zlib
+from array import array
+from cache import machine_fingerprint, state_order
+from tape import Alphabet
+from turingmachine import Status
+
+MAGIC = b'TMCK'
+VERSION = 1
+_HEADER = struct.Struct('<4sB32s32s32s')
+
+class InvalidCheckpoint(Exception):
+    pass
+
+def _word_digest(word):
+    return hashlib.sha256(word.encode()).digest()
+
+def save(tm, path, word=""):
+    """
+    Saves the configuration of tm to path. word should be the word the run
+    started from, so the checkpoint is not resumed for a different word.
+    """
+    alphabet = Alphabet(tm.EMPTY_SYMBOL)
+    tape = tm.tape if isinstance(tm.tape, list) else tm.tape.tolist()
+    cells = array(alphabet.typecode(), alphabet.encode(tape))
+    state = state_order(tm).index(tm.current_state)
+    payload = marshal.dumps((state, tm.tape_position, tm.MAX_LOOPS,
+        alphabet.symbols, cells.typecode, zlib.compress(cells.tobytes())))
+    header = _HEADER.pack(MAGIC, VERSION,
+        bytes.fromhex(machine_fingerprint(tm)), _word_digest(word),
+        hashlib.sha256(payload).digest())
+    #Write to a temporary file first so a crash never leaves half a file
+    temporary = path + ".tmp{}".format(os.getpid())
+    with open(temporary, 'wb') as f:
+        f.write(header)
+        f.write(payload)
+    os.replace(temporary, path)
+
+def load(tm, path, word=None):
+    """
+    Restores the configuration saved at path into tm, which must be the same
+    machine with the same options. If word is given the checkpoint must have
+    been saved from a run of that word.
+    """
+    with open(path, 'rb') as f:
+        data = f.read()
+    if len(data) < _HEADER.size:
+        raise InvalidCheckpoint("File is too short")
+    magic, version, fingerprint, word_digest, payload_digest = \
+        _HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise InvalidCheckpoint("Not a Turing Machine checkpoint")
+    if version != VERSION:
+        raise InvalidCheckpoint("Saved by a different version")
+    if fingerprint != bytes.fromhex(machine_fingerprint(tm)):
+        raise InvalidCheckpoint("Saved from a different machine")
+    if word != None and word_digest != _word_digest(word):
+        raise InvalidCheckpoint("Saved from a different word")
+    payload = data[_HEADER.size:]
+    if hashlib.sha256(payload).digest() != payload_digest:
+        raise InvalidCheckpoint("File is corrupt")
+    state, position, loops, symbols, typecode, cells = marshal.loads(payload)
+    cells = array(typecode, zlib.decompress(cells))
+    tm._update_tape([symbols[c] for c in cells])
+    #_update_tape adds a blank to the end, which the saved tape already has
+    tm.tape.pop()
+    tm.tape_position = position
+    tm.current_state = state_order(tm)[state]
+    tm.MAX_LOOPS = loops
+
+#What begin() returns for each Status a run can finish in
+_RESULTS = {Status.ACCEPTED: True, Status.REJECTED: False, Status.LOOPING: None}
+
+def run_slice(tm, steps):
+    """
+    Continues the run of tm for at most steps steps, see TuringMachine.run.
+    Returns a pair of whether the run has finished and, if so, what begin()
+    would have returned.
+    """
+    assert steps >= 1
+    status = tm.run(steps)
+    if status == Status.RUNNING:
+        return False, None
+    return True, _RESULTS[status]
+
+def run(tm, path, every=1000000, word=""):
+    """
+    Runs tm to the end like begin(), saving a checkpoint to path after every
+    slice of every steps. The checkpoint is removed once the run finishes.
+    """
+    while True:
+        finished, res = run_slice(tm, every)
+        if finished:
+            break
+        save(tm, path, word)
+    if os.path.exists(path):
+        os.remove(path)
+    return res
@@ -0,0 +1,454 @@
+"""
+===============================================================================
+This file compiles the States and Transitions of a Turing Machine into dense
+integer indexed tables and runs them in a tight loop
+===============================================================================
+"""
+
+from tape import Alphabet, Tape, RunLengthTape
+
+class CompiledMachine():
+    """
+    The State/Transition graph of a Turing Machine flattened into tables.
+    Every reachable state is given an integer id (the start state is 0) and
+    every symbol is given an integer id (the empty symbol is 0).
+    table[state id][symbol id] is then a 3-tuple of:
+    the new state id, the output symbol id and the movement (-1 or +1),
+    or None when the state has no transition for that symbol.
+    The accept and reject states have no row at all.
+    """
+    #The State objects indexed by their id
+    states = None
+    state_ids = None
+    #The symbols and their ids
+    alphabet = None
+    #Number of symbols known at compile time, ie the width of each row
+    width = 0
+    table = None
+    start = 0
+    accept = None
+    reject = None
+    blank = 0
+    #The id of padding cells, blanks beyond the end of the tape that run()
+    #adds in chunks, and table with a column for them that acts as blank
+    pad = None
+    padded_table = None
+    #Macro steps found by run_macro, see there
+    macros = None
+    #The most macro steps remembered for each state
+    MACRO_CACHE_SIZE = 4096
+
+    def __init__(self, start_state, accept_state, reject_state, empty_symbol):
+        """ Compiles every State reachable from start_state """
+        self.states = []
+        self.state_ids = {}
+        self.alphabet = Alphabet(empty_symbol)
+        symbol_id = self.alphabet.symbol_id
+        #Walk the graph so only reachable states are compiled
+        for state in (start_state, accept_state, reject_state):
+            self._add_state(state)
+        i = 0
+        while i < len(self.states):
+            for character, t in self.states[i].transitions.items():
+                symbol_id(character)
+                symbol_id(t.output_letter)
+                self._add_state(t.new_state)
+            i = i + 1
+        self.width = len(self.alphabet)
+        self.accept = self.state_ids[accept_state]
+        self.reject = self.state_ids[reject_state]
+        self.table = [self._compile_row(state) for state in self.states]
+        #Halting states are never left, so they have no row
+        self.table[self.accept] = None
+        self.table[self.reject] = None
+        #None is never a symbol of a word, so the padding id is never read
+        #from one
+        self.pad = symbol_id(None)
+        self.padded_table = [row if row == None else row + [row[self.blank]]
+            for row in self.table]
+        self.macros = {}
+
+    def _add_state(self, state):
+        """ Internal method for giving a State an id """
+        if state not in self.state_ids:
+            self.state_ids[state] = len(self.states)
+            self.states.append(state)
+
+    def _compile_row(self, state):
+        """ Internal method for turning a State into a row of the table """
+        row = [None] * self.width
+        for character, t in state.transitions.items():
+            symbol_ids = self.alphabet.symbol_ids
+            row[symbol_ids[character]] = (self.state_ids[t.new_state],
+                symbol_ids[t.output_letter], t.movement_direction.value)
+        return row
+
+    def new_tape(self, tape, bidirectional=False):
+        """
+        Returns a compact Tape of the symbols in tape.
+        Symbols first seen after compilation have no row entries so reading
+        them fails in the same way as a missing transition does.
+        """
+        return Tape(self.alphabet, tape, bidirectional)
+
+    def _tape(self, tm):
+        """
+        Internal method for making sure tm's tape is a Tape of this machine.
+        Returns the tape with its head moved to tm's tape position.
+        """
+        tape = tm.tape
+        if not isinstance(tape, Tape) or tape.alphabet is not self.alphabet:
+            tape = self.new_tape(tape, tm.bidirectional)
+        tm.tape = tape
+        tape.position = tm.tape_position
+        return tape
+
+    def run(self, tm):
+        """
+        Runs the TuringMachine tm from its current configuration until it
+        accepts or rejects, with exactly the same semantics as the
+        interpreted engine. The configuration is written back to tm, whose
+        tape is left as a compact Tape.
+        """
+        tape = self._tape(tm)
+        cells = tape.cells
+        start = tape.start
+        bidirectional = tape.bidirectional
+        pos = tape.head
+        s = self.state_ids[tm.current_state]
+        loops = tm.MAX_LOOPS
+        table = self.padded_table
+        pad = self.pad
+        missing = False
+        #Ids of the states that run right forever once past the end of the
+        #tape, see doom.Doom. They are checked whenever the tape grows, so
+        #then it grows one cell at a time
+        runaway = ()
+        if tm.doomed != None:
+            runaway = {self.state_ids[state] for state in tm.doomed.runaway
+                if state in self.state_ids}
+        #The last cell of a tape is always a blank that has never been
+        #written. The tape grows by chunks of padding, which reads as a
+        #blank, so the hot loop only finds the end of the tape by IndexError
+        #now and then rather than testing the position on every step. Cells
+        #the machine writes are never padding, so the tape is cut back to
+        #the interpreter's length afterwards. With runaway states the last
+        #blank is dropped instead, so stepping onto it is a growth too
+        padded = len(cells) > start and cells[-1] == self.blank
+        if padded and runaway:
+            cells.pop()
+        elif padded:
+            cells[-1] = pad
+        #Where the padding may begin, from the first cell of the tape
+        end = len(cells) - start - (padded and not runaway)
+        grown = False
+        doomed = False
+        try:
+            #Each pass runs until the tape grows, the machine halts (the rows
+            #of the accept and reject states are None) or the loops run out
+            while not missing and not doomed and s != self.accept \
+                    and s != self.reject and loops >= 0:
+                i = 0
+                try:
+                    for i in range(loops + 1):
+                        s, cells[pos], move = table[s][cells[pos]]
+                        pos = pos + move
+                        if pos < start:
+                            if bidirectional:
+                                tape.start = start
+                                tape.extend_left()
+                                start = tape.start
+                                pos = start
+                            else:
+                                pos = start
+                    i = loops + 1
+                except (IndexError, TypeError):
+                    if s == self.accept or s == self.reject:
+                        pass
+                    elif pos == len(cells):
+                        doomed = s in runaway
+                        self._pad(cells, 1 if runaway else
+                            max(len(cells) - start, 16))
+                        grown = True
+                    else:
+                        missing = True
+                loops = loops - i
+            if missing:
+                #No transition for this symbol. Like _read, the loop counter
+                #is decremented before State.calc raises the KeyError
+                loops = loops - 1
+                c = cells[pos]
+                raise KeyError(tape.symbol(self.blank if c == pad else c))
+        finally:
+            self._unpad(cells, start + end, padded or grown)
+            tape.start = start
+            tape.head = pos
+            tm.tape_position = pos - start
+            tm.current_state = self.states[s]
+            tm.MAX_LOOPS = loops
+        return s == self.accept
+
+    def _pad(self, cells, n):
+        """ Internal method for adding n padding cells to the end of cells """
+        cells.extend(bytes([self.pad]) * n if isinstance(cells, bytearray)
+            else [self.pad] * n)
+
+    def _unpad(self, cells, low, blank):
+        """
+        Internal method for cutting cells back after the last cell written,
+        which is followed by one blank as in the interpreter. Cells written
+        are never padding and the head only meets padding by moving right,
+        so the written cells are all before the first padding cell, which is
+        found from low on. If there is none, a blank is added if blank is
+        true, because the last cell was written.
+        """
+        high = len(cells)
+        while low < high:
+            middle = (low + high) // 2
+            if cells[middle] == self.pad:
+                high = middle
+            else:
+                low = middle + 1
+        if low == len(cells):
+            if blank:
+                cells.append(self.blank)
+        else:
+            cells[low] = self.blank
+            del cells[low + 1:]
+
+    def run_cycles(self, tm):
+        """
+        Runs the TuringMachine tm like run() but returns None as soon as it
+        finds the machine has repeated a configuration (state, head position
+        and tape, ignoring blanks at the end), which for a deterministic
+        machine means it will never halt.
+        This is Brent's cycle finding: the configuration is compared with one
+        saved at the last power of two number of steps, so memory stays
+        constant and a cycle is found within twice the steps it takes to
+        enter and go round it once.
+        """
+        tape = self._tape(tm)
+        s = self.state_ids[tm.current_state]
+        loops = tm.MAX_LOOPS
+        table = self.table
+        cells = tape.cells
+        saved = None
+        try:
+            while s != self.accept and s != self.reject and loops >= 0:
+                if saved == None:
+                    #Snapshots are reset when growing left moves the cells
+                    saved = (s, tape.head, tape.start, _snapshot(cells),
+                        _window(cells, tape.head))
+                    power = 1
+                    steps = 0
+                row = table[s]
+                c = cells[tape.head]
+                if c >= len(row) or row[c] == None:
+                    #No transition for this symbol, see run()
+                    loops = loops - 1
+                    raise KeyError(tape.symbol(c))
+                s, cells[tape.head], move = row[c]
+                tape.move(move)
+                loops = loops - 1
+                if tape.start > saved[2]:
+                    saved = None
+                    continue
+                steps = steps + 1
+                #Cheap tests first, the window around the head catches most
+                #differences before the whole tape is compared
+                head = tape.head
+                if s == saved[0] and head == saved[1] \
+                        and _window(cells, head) == saved[4] \
+                        and _snapshot(cells) == saved[3]:
+                    return None
+                if steps == power:
+                    saved = (s, head, tape.start, _snapshot(cells),
+                        _window(cells, head))
+                    power = power * 2
+                    steps = 0
+        finally:
+            tm.tape_position = tape.position
+            tm.current_state = self.states[s]
+            tm.MAX_LOOPS = loops
+        return s == self.accept
+
+    def run_profiled(self, tm, profile):
+        """
+        Runs the TuringMachine tm like run() while counting every step into
+        profile, a Profile of this machine. This is a separate loop so that
+        run() pays nothing for profiling.
+        """
+        assert profile.compiled is self
+        tape = self._tape(tm)
+        s = self.state_ids[tm.current_state]
+        loops = tm.MAX_LOOPS
+        table = self.table
+        cells = tape.cells
+        state_hits = profile.state_hits
+        transition_hits = profile.transition_hits
+        steps = 0
+        reversals = 0
+        last_move = 0
+        #The tape extent is sampled at 1, 2, 4, 8... steps
+        extent = []
+        sample = 1
+        try:
+            while s != self.accept and s != self.reject and loops >= 0:
+                row = table[s]
+                c = cells[tape.head]
+                if c >= len(row) or row[c] == None:
+                    #No transition for this symbol, see run()
+                    loops = loops - 1
+                    raise KeyError(tape.symbol(c))
+                state_hits[s] = state_hits[s] + 1
+                transition_hits[s][c] = transition_hits[s][c] + 1
+                s, cells[tape.head], move = row[c]
+                if move != last_move and last_move != 0:
+                    reversals = reversals + 1
+                last_move = move
+                tape.move(move)
+                loops = loops - 1
+                steps = steps + 1
+                if steps == sample:
+                    extent.append((steps, len(tape)))
+                    sample = sample * 2
+        finally:
+            tm.tape_position = tape.position
+            tm.current_state = self.states[s]
+            tm.MAX_LOOPS = loops
+            profile.add_run(steps, reversals, extent, len(tape))
+        return s == self.accept
+
+    def run_runs(self, tm):
+        """
+        Runs the TuringMachine tm like run() but on a RunLengthTape.
+        Whenever the current state reads a symbol, stays in the same state
+        and moves, it keeps doing so for the rest of that run of symbols, so
+        the whole run is crossed in one macro step.
+        """
+        tape = tm.tape
+        if not isinstance(tape, RunLengthTape) or tape.alphabet is not self.alphabet:
+            tape = RunLengthTape(self.alphabet, tape, tm.bidirectional)
+        tm.tape = tape
+        tape.head = tm.tape_position
+        s = self.state_ids[tm.current_state]
+        loops = tm.MAX_LOOPS
+        table = self.table
+        try:
+            while s != self.accept and s != self.reject and loops >= 0:
+                c = tape.read_id()
+                row = table[s]
+                if c >= len(row) or row[c] == None:
+                    #No transition for this symbol, see run()
+                    loops = loops - 1
+                    raise KeyError(tape.symbol(c))
+                new_state, output, move = row[c]
+                n = 1
+                if new_state == s:
+                    n = tape.run_length(move, output)
+                    if n == None or n > loops + 1:
+                        n = loops + 1
+                tape.fill(output, n, move)
+                loops = loops - n
+                s = new_state
+        finally:
+            tm.tape_position = tape.head
+            tm.current_state = self.states[s]
+            tm.MAX_LOOPS = loops
+        return s == self.accept
+
+    def _macro(self, s, window, k):
+        """
+        Internal method for finding the macro step of state s on window, the
+        2k-1 cells centred on the head. Runs up to k steps, stopping early if
+        the machine halts or has no transition. Returns (new state, window
+        after the steps, head movement, number of steps)
+        """
+        head = k - 1
+        table = self.padded_table
+        n = 0
+        while n < k:
+            row = table[s]
+            if row == None:
+                break
+            c = window[head]
+            if c >= len(row) or row[c] == None:
+                break
+            s, window[head], move = row[c]
+            head = head + move
+            n = n + 1
+        return s, window, head - (k - 1), n
+
+    def run_macro(self, tm, k=8):
+        """
+        Runs the TuringMachine tm like run() but k steps at a time where it
+        can. A macro step is the effect of up to k steps from a state on the
+        2k-1 cells around the head, which are all those steps can read. They
+        are worked out the first time a state meets a window and looked up
+        after that. The right end of the tape is padded as in run(), so
+        there is always a window there. Near the left end, or with fewer than
+        k loops left, the machine takes single steps.
+        """
+        tape = self._tape(tm)
+        s = self.state_ids[tm.current_state]
+        loops = tm.MAX_LOOPS
+        table = self.padded_table
+        cells = tape.cells
+        r = k - 1
+        if k not in self.macros:
+            self.macros[k] = [{} for state in self.states]
+        macros = self.macros[k]
+        #See run()
+        padded = len(cells) > tape.start and cells[-1] == self.blank
+        if padded:
+            cells[-1] = self.pad
+        end = len(cells) - tape.start - padded
+        grown = False
+        try:
+            while s != self.accept and s != self.reject and loops >= 0:
+                head = tape.head
+                if head + k >= len(cells) - 1:
+                    self._pad(cells, max(len(cells) - tape.start, 16 + k))
+                    grown = True
+                #The last step may move the head to k cells from where it
+                #started, which must not be off the left end of the tape
+                if loops >= r and head - k >= tape.start:
+                    window = cells[head - r:head + k]
+                    key = bytes(window)
+                    cache = macros[s]
+                    macro = cache.get(key)
+                    if macro == None:
+                        macro = self._macro(s, window, k)
+                        if len(cache) < self.MACRO_CACHE_SIZE:
+                            cache[key] = macro
+                    new_state, window, move, n = macro
+                    if n > 0:
+                        cells[head - r:head + k] = window
+                        tape.head = head + move
+                        s = new_state
+                        loops = loops - n
+                        continue
+                row = table[s]
+                c = cells[tape.head]
+                if c >= len(row) or row[c] == None:
+                    #No transition for this symbol, see run()
+                    loops = loops - 1
+                    raise KeyError(tape.symbol(self.blank if c == self.pad
+                        else c))
+                s, cells[tape.head], move = row[c]
+                tape.move(move)
+                loops = loops - 1
+        finally:
+            self._unpad(cells, tape.start + end, padded or grown)
+            tm.tape_position = tape.position
+            tm.current_state = self.states[s]
+            tm.MAX_LOOPS = loops
+        return s == self.accept
+
+def _snapshot(cells):
+    """ The cells as bytes without the blanks (id 0) at the end """
+    return bytes(cells).rstrip(b'\x00')
+
+def _window(cells, head, size=8):
+    """ The cells within size of the head without blanks at the end """
+    return _snapshot(cells[max(head - size, 0):head + size])
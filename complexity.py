@@ -0,0 +1,220 @@
+"""
+Note:
+    Measures how the steps and tape a machine uses grow with the length of
+    its input. Words of each length are enumerated, or sampled once there
+    are too many, over the alphabet of the machine's file. The worst case
+    of each length is then fitted to the usual growth curves, so max loops
+    can be set from the longest words expected rather than guessed.
+"""
+
+import argparse
+import itertools
+import json
+import math
+import random
+import runtm
+import multitape
+import nondeterministic
+
+#The growth curves tried by fit(), simplest first. Logarithms are of n + 1
+#so every curve is positive from n = 1
+MODELS = [
+    ("1", lambda n: 1.0),
+    ("log n", lambda n: math.log2(n + 1)),
+    ("n", lambda n: float(n)),
+    ("n log n", lambda n: n * math.log2(n + 1)),
+    ("n^2", lambda n: float(n * n)),
+    ("n^2 log n", lambda n: n * n * math.log2(n + 1)),
+    ("n^3", lambda n: float(n ** 3)),
+    ("2^n", lambda n: 2.0 ** n),
+]
+
+def input_alphabet(file):
+    """ The symbols of the alphabet line of the machine in file """
+    with open(file, 'r') as f:
+        line = f.readline()
+        if multitape.tapes(line) != None or \
+                nondeterministic.is_nondeterministic(line):
+            line = f.readline()
+        for i in range(runtm._parse_state_number(line)):
+            f.readline()
+        symbols = runtm._parse_alphabet(f.readline())
+    return [symbol for symbol in symbols if symbol != runtm.EMPTY_SYMBOL]
+
+def words_of_length(alphabet, n, samples, rng):
+    """
+    Every word of length n over alphabet if there are at most samples of
+    them, otherwise samples random words and the words repeating one symbol,
+    which are often the worst case
+    """
+    if len(alphabet) ** n <= samples:
+        return ["".join(w) for w in itertools.product(alphabet, repeat=n)]
+    words = [symbol * n for symbol in alphabet]
+    while len(words) < samples:
+        words.append("".join(rng.choice(alphabet) for i in range(n)))
+    return words
+
+def measure(tm, word):
+    """
+    Runs word on tm and returns (steps, cells, finished) where cells is the
+    length of the tape at the end, which only ever grows, summed over every
+    tape of a MultiTapeMachine, and finished is False if the run was out of
+    loops
+    """
+    tm.new_tape(word)
+    try:
+        tm.begin()
+    except KeyError:
+        pass
+    steps = tm._reset_loops - tm.MAX_LOOPS
+    #tm.tape is only the first of several tapes
+    tapes = getattr(tm, "tapes", None) or [tm.tape]
+    return steps, sum(len(tape) for tape in tapes), tm.MAX_LOOPS >= 0
+
+def profile(file, lengths, samples=200, max_loops=100000, engine="compiled",
+            seed=0):
+    """
+    Measures the words of each length in lengths on the machine in file.
+    Returns one dictionary per length with the worst steps and tape cells
+    used and a word that needed them
+    """
+    tm = runtm._read_file(file, engine, max_loops=max_loops)
+    if isinstance(tm, nondeterministic.NondeterministicMachine):
+        raise ValueError("Only deterministic machines can be profiled")
+    alphabet = input_alphabet(file)
+    rng = random.Random(seed)
+    results = []
+    for n in lengths:
+        words = words_of_length(alphabet, n, samples, rng)
+        worst_steps = worst_cells = -1
+        total = 0
+        unfinished = 0
+        for word in words:
+            steps, cells, finished = measure(tm, word)
+            total = total + steps
+            if not finished:
+                unfinished = unfinished + 1
+            if steps > worst_steps:
+                worst_steps, steps_witness = steps, word
+            if cells > worst_cells:
+                worst_cells, cells_witness = cells, word
+        results.append({
+            "length": n,
+            "words": len(words),
+            "exhaustive": len(alphabet) ** n <= samples,
+            "unfinished": unfinished,
+            "mean_steps": total / len(words),
+            "worst_steps": worst_steps,
+            "steps_witness": steps_witness,
+            "worst_cells": worst_cells,
+            "cells_witness": cells_witness,
+        })
+    return results
+
+def fit(points):
+    """
+    Fits points, (n, value) pairs, to each of MODELS as value = a + c * f(n)
+    by least squares on the relative error, so the constant steps taken on
+    every word do not hide the growth. Returns (model name, a, c, error) for
+    the model with the least error, the root mean square relative error.
+    A simpler model is kept unless a more complex one is clearly better
+    """
+    points = [(n, value) for n, value in points if n >= 1 and value > 0]
+    if len(points) < 2:
+        return None
+    best = None
+    for name, f in MODELS:
+        #Weighted least squares of value on f(n), weighted by 1 / value^2
+        weights = [1.0 / (value * value) for n, value in points]
+        xs = [f(n) for n, value in points]
+        sw = sum(weights)
+        sx = sum(w * x for w, x in zip(weights, xs))
+        sy = sum(w * value for w, (n, value) in zip(weights, points))
+        sxx = sum(w * x * x for w, x in zip(weights, xs))
+        sxy = sum(w * x * value for w, x, (n, value) in zip(weights, xs, points))
+        determinant = sw * sxx - sx * sx
+        if determinant <= 1e-12 * sw * sxx:
+            #f is constant here, so it is only an intercept
+            a, c = sy / sw, 0.0
+        else:
+            c = (sw * sxy - sx * sy) / determinant
+            a = (sy - c * sx) / sw
+        if c < 0:
+            continue
+        error = math.sqrt(sum(((value - a - c * x) / value) ** 2
+            for x, (n, value) in zip(xs, points)) / len(points))
+        if best == None or error < best[3] * 0.5 and error < best[3] - 0.01:
+            best = (name, a, c, error)
+    return best
+
+def predict(model, a, c, n):
+    """ The value of a fit from fit() at length n """
+    return a + c * dict(MODELS)[model](n)
+
+def _fits(results):
+    """ Internal method fitting the worst steps and cells of finished lengths """
+    finished = [r for r in results if r["unfinished"] == 0]
+    return (fit([(r["length"], r["worst_steps"]) for r in finished]),
+        fit([(r["length"], r["worst_cells"]) for r in finished]))
+
+def _shorten(word, size=24):
+    return word if len(word) <= size else word[:size - 3] + "..."
+
+def report(results, predict_length=None):
+    lines = ["{:>7} {:>7} {:>12} {:>12} {:>9}  {}".format("length", "words",
+        "mean steps", "worst steps", "cells", "worst word")]
+    for r in results:
+        lines.append("{:>7} {:>7} {:>12.1f} {:>12} {:>9}  {}".format(r["length"],
+            str(r["words"]) + ("" if r["exhaustive"] else "*"), r["mean_steps"],
+            r["worst_steps"], r["worst_cells"], _shorten(r["steps_witness"])))
+        if r["unfinished"]:
+            lines.append("        {} words ran out of loops, so this length is "
+                "not fitted".format(r["unfinished"]))
+    steps, cells = _fits(results)
+    for measure, found in (("steps", steps), ("tape cells", cells)):
+        if found == None:
+            lines.append("Too few finished lengths to fit {}".format(measure))
+            continue
+        name, a, c, error = found
+        if name == "1":
+            curve = "{:.3g}".format(a + c)
+        else:
+            curve = "{:.3g} + {:.3g} * {}".format(a, c, name)
+        lines.append("Worst case {} grow like {} (about {}, error {:.1%})"
+            .format(measure, name, curve, error))
+        if predict_length != None:
+            lines.append("    expect about {:.0f} at length {}".format(
+                predict(name, a, c, predict_length), predict_length))
+    return "\n".join(lines)
+
+def parse():
+    parser = argparse.ArgumentParser(description="Measures how the steps \
+    and tape a Turing Machine uses grow with the length of its input")
+    parser.add_argument("-i", "--input", type=str, help="The file \
+    containing the Turing Machine", required=True)
+    parser.add_argument("-l", "--lengths", type=int, nargs="+", help="The \
+    lengths of the words", default=[1, 2, 4, 8, 16, 32, 64])
+    parser.add_argument("-n", "--samples", type=int, help="The most words \
+    of each length, words are sampled once there are more", default=200)
+    parser.add_argument("--max-loops", type=int, help="The max loops of each \
+    word", default=100000)
+    parser.add_argument("-e", "--engine", type=str, choices=runtm.TuringMachine.ENGINES,
+    default="compiled")
+    parser.add_argument("-p", "--predict", type=int, help="Also estimate the \
+    worst steps and tape cells at this length", default=None)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("-s", "--save", type=str, help="Save the measurements \
+    to this JSON file", default=None)
+    args = parser.parse_args()
+    try:
+        results = profile(args.input, args.lengths, args.samples,
+            args.max_loops, args.engine, args.seed)
+    except ValueError as e:
+        parser.error(str(e))
+    print(report(results, args.predict))
+    if args.save != None:
+        with open(args.save, 'w') as f:
+            json.dump(results, f, indent=1)
+
+if __name__ == "__main__":
+    parse()
@@ -0,0 +1,129 @@
+"""
+===============================================================================
+This file finds where a Turing Machine is doomed never to accept, so runs
+can be rejected as soon as they get there instead of running until they are
+out of loops
+===============================================================================
+"""
+
+from minimise import _halting, _reachable
+
+class Doom():
+    """
+    What doom() found. hopeless holds the states that can never reach the
+    accept state, runaway the states that move right through blanks forever
+    """
+    hopeless = None
+    runaway = None
+    #The number of transitions pointed straight at the reject state
+    redirected = 0
+
+    def __init__(self):
+        self.hopeless = set()
+        self.runaway = set()
+
+    def dooms(self, tm):
+        """
+        Returns if tm can no longer accept: it is in a hopeless state, or in
+        a runaway state with only blanks under and right of its head
+        """
+        state = tm.current_state
+        if state in self.hopeless:
+            return True
+        return state in self.runaway and tm.tape_position >= len(tm.tape) - 1
+
+    def __str__(self):
+        return ("Found {} hopeless states, redirecting {} transitions to the "
+            "reject state, and {} states that run right forever on blanks"
+            ).format(len(self.hopeless), self.redirected, len(self.runaway))
+
+def _hopeless(tm, order):
+    """
+    Internal method for the states of order from which no path of
+    transitions reaches the accept state. States that can reach one missing
+    a transition for a symbol of the machine are left out, as a run could
+    raise KeyError there
+    """
+    symbols = {tm.EMPTY_SYMBOL}
+    for state in order:
+        for character, t in state.transitions.items():
+            symbols.add(character)
+            symbols.add(t.output_letter)
+    #Walk the transitions backwards from the accept state and from the
+    #states that can raise KeyError
+    before = {state: [] for state in order}
+    for state in order:
+        if not _halting(tm, state):
+            for t in state.transitions.values():
+                before[t.new_state].append(state)
+    def leading_to(states):
+        found = set(states)
+        queue = list(states)
+        while queue:
+            for state in before.get(queue.pop(), ()):
+                if state not in found:
+                    found.add(state)
+                    queue.append(state)
+        return found
+    can_accept = leading_to([tm.accept_state])
+    can_raise = leading_to([state for state in order if not _halting(tm, state)
+        and not symbols.issubset(state.transitions)])
+    return {state for state in order if not _halting(tm, state)
+        and state not in can_accept and state not in can_raise}
+
+def _runaway(tm, order):
+    """
+    Internal method for the states of order that, reading a blank, move
+    right into a state that does the same, and so on without halting. With
+    nothing but blanks to their right they never stop
+    """
+    runaway = set()
+    #States known to halt or stop moving right on a blank
+    stops = set()
+    for state in order:
+        path = []
+        on_path = set()
+        while state not in runaway and state not in stops:
+            t = state.transitions.get(tm.EMPTY_SYMBOL)
+            if state in on_path:
+                #Back round a cycle, every state on the path runs away
+                break
+            if _halting(tm, state) or t == None or \
+                    t.movement_direction.value != 1:
+                stops.add(state)
+                break
+            path.append(state)
+            on_path.add(state)
+            state = t.new_state
+        if state in runaway or state in on_path:
+            runaway.update(path)
+        else:
+            stops.update(path)
+    return runaway
+
+def doom(tm):
+    """
+    Finds the hopeless and runaway states of tm and returns a Doom. Every
+    transition into a hopeless state is pointed straight at the reject
+    state, and TuringMachine.reject() reports any run in a configuration
+    the Doom dooms.
+    Results only change for words that put a symbol the machine never
+    mentions under a hopeless state (which would have raised KeyError):
+    they are rejected instead. Runs stop with fewer loops used.
+    """
+    report = Doom()
+    order = _reachable(tm)
+    report.hopeless = _hopeless(tm, order)
+    for state in order:
+        if _halting(tm, state) or state in report.hopeless:
+            continue
+        for character, t in state.transitions.items():
+            if t.new_state in report.hopeless:
+                state.create_transition(character, tm.reject_state,
+                    t.output_letter, t.movement_direction)
+                report.redirected = report.redirected + 1
+    report.runaway = _runaway(tm, _reachable(tm))
+    #Any compiled tables describe the old graph
+    if tm._compiled != None:
+        tm.compile()
+    return report
@@ -0,0 +1,197 @@
+"""
+===============================================================================
+This file loads a Turing Machine without parsing its transitions up front.
+The file is memory mapped and indexed in one pass, and the transitions of a
+state are only parsed the first time the machine needs them
+===============================================================================
+"""
+
+import marshal
+import mmap
+import os
+from turingmachine import State, TuringMachine
+import runtm
+
+class LazyState(State):
+    """
+    A State whose transitions are parsed from the file the first time they
+    are used. Until then the transitions slot is unset, so reading it falls
+    through to __getattr__; after that it is an ordinary State.
+    """
+    __slots__ = ("_loader",)
+
+    def __init__(self, loader, name):
+        self._loader = loader
+        self.name = name
+
+    def __getattr__(self, attribute):
+        if attribute != "transitions":
+            raise AttributeError(attribute)
+        self.transitions = {}
+        self._loader.load(self)
+        return self.transitions
+
+    def loaded(self):
+        """ Returns if the transitions have been parsed yet """
+        try:
+            object.__getattribute__(self, "transitions")
+        except AttributeError:
+            return False
+        return True
+
+class _States(dict):
+    """ The states made so far by name, making the others on first use """
+    loader = None
+
+    def __missing__(self, name):
+        if name not in self.loader.names:
+            raise KeyError(name)
+        state = LazyState(self.loader, name)
+        self[name] = state
+        return state
+
+class Loader():
+    """
+    The memory mapped file of a TM and an index of where the transition
+    lines of each state are. Each run of lines in a row for one state is a
+    byte range packed into one int (start << 32 | length), and a state maps
+    to that int or, if its lines are not all together, a list of them.
+    """
+    names = None
+    alphabet = None
+    index = None
+    states = None
+    start = None
+    accept = None
+    reject = None
+    _file = None
+    _map = None
+
+    def __init__(self, path, index_file=None):
+        self._file = open(path, 'rb')
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._read_header()
+        self.index = self._load_index(path, index_file)
+        self.states = _States()
+        self.states.loader = self
+
+    def _read_header(self):
+        """ Internal method for reading the states and alphabet lines """
+        readline = lambda: self._map.readline().decode()
+        number_states = runtm._parse_state_number(readline())
+        #Maps each name to itself so the index can share the same strings
+        self.names = {}
+        for i in range(number_states):
+            res = runtm._STATE_REGEX.match(readline())
+            name, symbol = res.group(1), res.group(2)
+            if name in self.names:
+                raise runtm.InvalidInputFormat("Two or more states cannot have the same name")
+            self.names[name] = name
+            if self.start == None:
+                self.start = name
+            if symbol == runtm.ACCEPT_SYMBOL:
+                if self.accept != None:
+                    raise runtm.InvalidInputFormat("There can only be one accept state!")
+                self.accept = name
+            if symbol == runtm.REJECT_SYMBOL:
+                if self.reject != None:
+                    raise runtm.InvalidInputFormat("There can only be one reject state!")
+                self.reject = name
+        self.alphabet = runtm._parse_alphabet(readline())
+
+    def _load_index(self, path, index_file):
+        """
+        Internal method for reading the index from index_file if it was made
+        from the current file (same size and modification time), otherwise
+        building it and saving it there
+        """
+        stat = os.stat(path)
+        stamp = (stat.st_size, stat.st_mtime_ns)
+        if index_file != None:
+            try:
+                with open(index_file, 'rb') as f:
+                    saved_stamp, index = marshal.load(f)
+                if saved_stamp == stamp:
+                    return index
+            except (OSError, EOFError, ValueError, TypeError):
+                pass
+        index = self._build_index()
+        if index_file != None:
+            temporary = index_file + ".tmp{}".format(os.getpid())
+            with open(temporary, 'wb') as f:
+                marshal.dump((stamp, index), f)
+            os.replace(temporary, index_file)
+        return index
+
+    def _build_index(self):
+        """ Internal method for indexing the transition lines in one pass """
+        index = {}
+        m = self._map
+        readline = m.readline
+        names = self.names
+        last = None
+        start = end = m.tell()
+        while True:
+            line = readline()
+            name = line.split(b' ', 1)[0]
+            if name != last:
+                if last != None:
+                    _add_range(index, names[last.decode()], start, end)
+                if not line:
+                    break
+                if name.decode() not in names:
+                    raise runtm.InvalidInputFormat("Invalid State! {}".format(
+                        line.decode()))
+                start = end
+                last = name
+            end = end + len(line)
+        return index
+
+    def load(self, state):
+        """ Parses the transitions of state from the file """
+        m = self._map
+        ranges = self.index.get(state.name)
+        if ranges == None:
+            #No lines, eg the accept and reject states
+            return
+        if not isinstance(ranges, list):
+            ranges = [ranges]
+        for packed in ranges:
+            start = packed >> 32
+            lines = m[start:start + (packed & 0xffffffff)].decode()
+            runtm._parse_transitions(lines.splitlines(True), self.alphabet,
+                self.states)
+
+    def loaded(self):
+        """ The number of states whose transitions have been parsed """
+        return sum(1 for state in self.states.values() if state.loaded())
+
+    def close(self):
+        self._map.close()
+        self._file.close()
+
+def _add_range(index, name, start, end):
+    """ Internal method for adding a range of lines to the index """
+    packed = start << 32 | (end - start)
+    ranges = index.get(name)
+    if ranges == None:
+        index[name] = packed
+    elif isinstance(ranges, list):
+        ranges.append(packed)
+    else:
+        index[name] = [ranges, packed]
+
+def load(path, index_file=None, **options):
+    """
+    Returns a TuringMachine for the TM in path whose states are only parsed
+    when first needed, and the Loader doing it. options are passed on to
+    TuringMachine. If index_file is given the index of the file is kept
+    there between runs.
+    Only the interpreted engine stays lazy: the others compile every state
+    reachable from the start state before the first word.
+    """
+    loader = Loader(path, index_file)
+    states = loader.states
+    tm = TuringMachine("", states[loader.accept], states[loader.reject],
+        states[loader.start], runtm.EMPTY_SYMBOL, **options)
+    return tm, loader
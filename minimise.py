@@ -0,0 +1,152 @@
+"""
+===============================================================================
+This file shrinks the State graph of a Turing Machine before it is run:
+dropping unreachable states, skipping states that always halt and merging
+states that behave the same
+===============================================================================
+"""
+
+class Minimisation():
+    """ What minimise() removed, printed as a one line summary """
+    unreachable = 0
+    short_circuited = 0
+    merged = 0
+    #Counts of the states reachable from the start state and their
+    #transitions, before and after
+    states_before = 0
+    states_after = 0
+    transitions_before = 0
+    transitions_after = 0
+
+    def __str__(self):
+        return ("Removed {} unreachable states, short-circuited {} transitions "
+            "and merged {} equivalent states: {} states and {} transitions "
+            "down to {} states and {} transitions").format(self.unreachable,
+            self.short_circuited, self.merged, self.states_before,
+            self.transitions_before, self.states_after, self.transitions_after)
+
+def _halting(tm, state):
+    return state == tm.accept_state or state == tm.reject_state
+
+def _reachable(tm):
+    """
+    The states reachable from the start state, in the order found. The
+    transitions of the accept and reject states are never taken
+    """
+    order = [tm._start_state]
+    found = {tm._start_state}
+    i = 0
+    while i < len(order):
+        if _halting(tm, order[i]):
+            i = i + 1
+            continue
+        for t in order[i].transitions.values():
+            if t.new_state not in found:
+                found.add(t.new_state)
+                order.append(t.new_state)
+        i = i + 1
+    return order
+
+def _short_circuit(tm, order):
+    """
+    Internal method pointing transitions that enter a state which halts
+    whatever it reads straight at the accept or reject state it halts in.
+    Returns the number of transitions changed
+    """
+    symbols = {tm.EMPTY_SYMBOL}
+    for state in order:
+        for character, t in state.transitions.items():
+            symbols.add(character)
+            symbols.add(t.output_letter)
+    #The halting state each always halting state ends up in
+    direct = {}
+    for state in order:
+        targets = {t.new_state for t in state.transitions.values()}
+        if not _halting(tm, state) and len(targets) == 1 and \
+                _halting(tm, next(iter(targets))) and \
+                symbols.issubset(state.transitions):
+            direct[state] = next(iter(targets))
+    changed = 0
+    for state in order:
+        for character, t in state.transitions.items():
+            if t.new_state in direct:
+                state.create_transition(character, direct[t.new_state],
+                    t.output_letter, t.movement_direction)
+                changed = changed + 1
+    return changed
+
+def _merge(tm, order):
+    """
+    Internal method merging equivalent states by partition refinement:
+    states start in one block per set of (read, write, move) triples and
+    blocks are split until every state in a block goes to the same blocks.
+    Returns the number of states merged away
+    """
+    def signature(state):
+        if _halting(tm, state):
+            return state
+        return tuple(sorted((character, t.output_letter, t.movement_direction.value)
+            for character, t in state.transitions.items()))
+    block = {}
+    keys = {}
+    for state in order:
+        block[state] = keys.setdefault(signature(state), len(keys))
+    blocks = len(keys)
+    while True:
+        keys = {}
+        refined = {}
+        for state in order:
+            key = (block[state],) + tuple(sorted((character, block[t.new_state])
+                for character, t in state.transitions.items()))
+            refined[state] = keys.setdefault(key, len(keys))
+        block = refined
+        if len(keys) == blocks:
+            break
+        blocks = len(keys)
+    #The first state found in each block stands for the whole block
+    representative = {}
+    for state in order:
+        representative.setdefault(block[state], state)
+    for state in order:
+        for character, t in state.transitions.items():
+            new_state = representative[block[t.new_state]]
+            if new_state != t.new_state:
+                state.create_transition(character, new_state,
+                    t.output_letter, t.movement_direction)
+    return len(order) - len(representative)
+
+def minimise(tm, states=()):
+    """
+    Shrinks the State graph of tm in place and returns a Minimisation.
+    states are all the states parsed, those unreachable from the start state
+    have their transitions dropped.
+    Results only change for words that would have run out of loops on a
+    skipped step or that put a symbol the machine never mentions under a
+    state that was skipped (which would have raised KeyError).
+    """
+    report = Minimisation()
+    order = _reachable(tm)
+    reachable = set(order)
+    for state in states:
+        if state not in reachable and not _halting(tm, state):
+            state.transitions = {}
+            report.unreachable = report.unreachable + 1
+    report.states_before = len(order)
+    report.transitions_before = sum(len(state.transitions) for state in order)
+    for state in (tm.accept_state, tm.reject_state):
+        state.transitions = {}
+    #Skipping one state can leave the states before it always halting too
+    while True:
+        changed = _short_circuit(tm, order)
+        if changed == 0:
+            break
+        report.short_circuited = report.short_circuited + changed
+        order = _reachable(tm)
+    report.merged = _merge(tm, order)
+    order = _reachable(tm)
+    report.states_after = len(order)
+    report.transitions_after = sum(len(state.transitions) for state in order)
+    #Any compiled tables describe the old graph
+    if tm._compiled != None:
+        tm.compile()
+    return report
@@ -0,0 +1,209 @@
+"""
+Note:
+    Turing Machines with k tapes, read from the usual input format with a
+    first line of:
+    tapes k
+    Every transition then reads and writes a comma separated symbol for each
+    tape and moves each head R, L or S (stay), eg for k = 2:
+        q0 a,_ q0 a,a R,R
+    The word is written on the first tape and the others start blank.
+"""
+
+import re
+from tape import Alphabet, Tape
+from turingmachine import State
+import runtm
+
+_TAPES_REGEX = re.compile(r'tapes (\d+)', re.IGNORECASE)
+_TRANSITION_REGEX = re.compile(r'(\w*) ([^ \n]*) (\w*) ([^ \n]*) ([RLS](,[RLS])*)')
+_MOVES = {'R': 1, 'L': -1, 'S': 0}
+
+class MultiTransition():
+    """ A transition writing output_letters and moving by movements, per tape """
+    __slots__ = ("new_state", "output_letters", "movements")
+
+    def __init__(self, new_state, output_letters, movements):
+        if not isinstance(new_state, State):
+            raise ValueError("New state must be a State!")
+        if len(output_letters) != len(movements):
+            raise ValueError("Every tape needs an output letter and a movement")
+        self.new_state = new_state
+        self.output_letters = tuple(output_letters)
+        self.movements = tuple(movements)
+
+class MultiTapeMachine():
+    """
+    A Turing Machine with k tapes. States hold MultiTransitions keyed by the
+    tuple of symbols under the heads. These are compiled, like
+    CompiledMachine, into one row per state keyed by the symbol ids under
+    the heads combined into a single number, so each step is one lookup
+    whatever k is. Rows are dictionaries as width ** k entries per state
+    would mostly be empty.
+    Each tape behaves like the tape of a one tape TuringMachine: it ends in
+    a blank, and moving left off the first cell stays put unless
+    bidirectional is set.
+    """
+    k = 0
+    tapes = None
+    accept_state = None
+    reject_state = None
+    current_state = None
+    EMPTY_SYMBOL = None
+    MAX_LOOPS = None
+    bidirectional = False
+    #The compiled machine, built by compile()
+    states = None
+    state_ids = None
+    alphabet = None
+    width = 0
+    table = None
+    _start_state = None
+    _reset_loops = None
+
+    def __init__(self, k, tape, accept, reject, current_state, empty_symbol="_",
+                 max_loops=100000, bidirectional=False):
+        assert k >= 1
+        assert max_loops >= 0
+        self.k = k
+        self.accept_state = accept
+        self.reject_state = reject
+        self._start_state = current_state
+        self.EMPTY_SYMBOL = empty_symbol
+        self._reset_loops = max_loops
+        self.bidirectional = bidirectional
+        self.compile()
+        self.new_tape(tape)
+
+    def compile(self):
+        """
+        Builds the table used by begin(). Must be called again if states or
+        transitions are changed after the machine was created
+        """
+        self.states = []
+        self.state_ids = {}
+        self.alphabet = Alphabet(self.EMPTY_SYMBOL)
+        for state in (self._start_state, self.accept_state, self.reject_state):
+            self._add_state(state)
+        i = 0
+        while i < len(self.states):
+            for symbols, t in self.states[i].transitions.items():
+                if len(symbols) != self.k or len(t.movements) != self.k:
+                    raise ValueError("Transitions must be for {} tapes".format(self.k))
+                for symbol in symbols + t.output_letters:
+                    self.alphabet.symbol_id(symbol)
+                self._add_state(t.new_state)
+            i = i + 1
+        self.width = len(self.alphabet)
+        self.table = [self._compile_row(state) for state in self.states]
+        self.table[self.state_ids[self.accept_state]] = None
+        self.table[self.state_ids[self.reject_state]] = None
+
+    def _add_state(self, state):
+        if state not in self.state_ids:
+            self.state_ids[state] = len(self.states)
+            self.states.append(state)
+
+    def _index(self, ids):
+        """ Internal method combining the symbol ids under the heads """
+        index = 0
+        for c in ids:
+            index = index * self.width + c
+        return index
+
+    def _compile_row(self, state):
+        row = {}
+        symbol_ids = self.alphabet.symbol_ids
+        for symbols, t in state.transitions.items():
+            row[self._index(symbol_ids[c] for c in symbols)] = (
+                self.state_ids[t.new_state],
+                tuple(symbol_ids[c] for c in t.output_letters), t.movements)
+        return row
+
+    def new_tape(self, tape):
+        """ Writes tape on the first tape, blanks the others and resets """
+        self.tapes = [Tape(self.alphabet, tape, self.bidirectional)]
+        for i in range(self.k - 1):
+            self.tapes.append(Tape(self.alphabet, "", self.bidirectional))
+        for t in self.tapes:
+            t.append(self.EMPTY_SYMBOL)
+        self.current_state = self._start_state
+        self.MAX_LOOPS = self._reset_loops
+
+    @property
+    def tape(self):
+        """ The first tape, which holds the word """
+        return self.tapes[0]
+
+    def tape_positions(self):
+        return [t.position for t in self.tapes]
+
+    def accept(self):
+        return self.accept_state == self.current_state
+
+    def reject(self):
+        return self.reject_state == self.current_state or self.MAX_LOOPS < 0
+
+    def begin(self):
+        """ Begins computation. Returns if the TM accepts """
+        s = self.state_ids[self.current_state]
+        accept = self.state_ids[self.accept_state]
+        reject = self.state_ids[self.reject_state]
+        loops = self.MAX_LOOPS
+        table = self.table
+        width = self.width
+        tapes = self.tapes
+        heads = list(zip(range(self.k), tapes))
+        try:
+            while s != accept and s != reject and loops >= 0:
+                index = 0
+                for i, t in heads:
+                    c = t.cells[t.head]
+                    if c >= width:
+                        index = None
+                        break
+                    index = index * width + c
+                entry = None if index == None else table[s].get(index)
+                if entry == None:
+                    #No transition for these symbols, like TuringMachine._read
+                    #the loop counter is decremented first
+                    loops = loops - 1
+                    raise KeyError(tuple(t.read() for t in tapes))
+                s, output, moves = entry
+                for i, t in heads:
+                    t.cells[t.head] = output[i]
+                    t.move(moves[i])
+                loops = loops - 1
+        finally:
+            self.current_state = self.states[s]
+            self.MAX_LOOPS = loops
+        return s == accept
+
+def read(f, k, **options):
+    """
+    Reads a k tape TM from f, the lines of the input after the tapes line.
+    options are passed on to MultiTapeMachine
+    """
+    number_states = runtm._parse_state_number(f.readline())
+    states, inital_state, accept_state, reject_state = \
+        runtm._parse_states(number_states, f)
+    runtm._parse_alphabet(f.readline())
+    for line in f:
+        res = _TRANSITION_REGEX.match(line)
+        if res == None:
+            raise runtm.InvalidInputFormat("Invalid State! {}".format(line))
+        state, inputs, new_state, outputs, moves = res.groups()[:5]
+        inputs, outputs, moves = inputs.split(','), outputs.split(','), moves.split(',')
+        if not len(inputs) == len(outputs) == len(moves) == k:
+            raise runtm.InvalidInputFormat("Transition is not for {} tapes! {}"
+                .format(k, line))
+        states[state].add_transition(tuple(inputs), MultiTransition(
+            states[new_state], outputs, [_MOVES[m] for m in moves]))
+    return MultiTapeMachine(k, "", accept_state, reject_state, inital_state,
+        runtm.EMPTY_SYMBOL, **options)
+
+def tapes(line):
+    """ The number of tapes declared by the first line of an input, or None """
+    res = _TAPES_REGEX.match(line)
+    if res == None:
+        return None
+    return int(res.group(1))
@@ -0,0 +1,221 @@
+"""
+Note:
+    Nondeterministic Turing Machines, read from the usual input format with a
+    first line of:
+    nondeterministic
+    A state may then have several transitions for the same symbol. A word is
+    accepted if any sequence of choices reaches the accept state within max
+    loops steps. A branch with no transition for a symbol simply dies rather
+    than raising KeyError. A search that gives up because it has more than
+    max_configurations at once returns None, reported like Loops, so it is
+    not taken as a rejection.
+"""
+
+import re
+from tape import Alphabet
+from turingmachine import Transition
+import runtm
+
+_NONDETERMINISTIC_REGEX = re.compile(r'nondeterministic\s*$', re.IGNORECASE)
+
+class NondeterministicMachine():
+    """
+    Runs a breadth-first search over the configurations of the machine, one
+    step of every branch at a time, skipping configurations already seen.
+    States hold a list of Transitions for each symbol.
+    A configuration is (state id, left, right) where left holds the cells
+    left of the head, nearest first, and right holds the cell under the head
+    and those after it. Both are stacks built from shared cells: a cell is
+    an int id for a (symbol id, rest of the stack id) pair and the same pair
+    always gets the same id. So branches share every common part of their
+    tapes, a step only makes O(1) new cells, and equal tapes have equal ids,
+    which makes configurations three ints that are cheap to hash and compare.
+    Stack 0 is empty, and an empty right stack stands for blanks forever.
+    """
+    accept_state = None
+    reject_state = None
+    EMPTY_SYMBOL = None
+    MAX_LOOPS = None
+    bidirectional = False
+    #The most configurations kept in one breadth-first layer, None for no limit
+    max_configurations = None
+    #The compiled machine, see compile()
+    states = None
+    state_ids = None
+    alphabet = None
+    table = None
+    #Statistics of the last search
+    configurations = 0
+    steps = 0
+    _start_state = None
+    _reset_loops = None
+    _word = None
+    #The shared cells of the last search
+    _cells = None
+    _cell_ids = None
+
+    def __init__(self, tape, accept, reject, current_state, empty_symbol="_",
+                 max_loops=100000, bidirectional=False, max_configurations=None):
+        assert max_loops >= 0
+        self.accept_state = accept
+        self.reject_state = reject
+        self._start_state = current_state
+        self.EMPTY_SYMBOL = empty_symbol
+        self._reset_loops = max_loops
+        self.bidirectional = bidirectional
+        self.max_configurations = max_configurations
+        self.compile()
+        self.new_tape(tape)
+
+    def compile(self):
+        """
+        Builds table[state id][symbol id], a tuple of (new state id, output
+        symbol id, movement) choices, or None for halting states
+        """
+        self.states = []
+        self.state_ids = {}
+        self.alphabet = Alphabet(self.EMPTY_SYMBOL)
+        for state in (self._start_state, self.accept_state, self.reject_state):
+            self._add_state(state)
+        i = 0
+        while i < len(self.states):
+            for character, choices in self.states[i].transitions.items():
+                self.alphabet.symbol_id(character)
+                for t in choices:
+                    self.alphabet.symbol_id(t.output_letter)
+                    self._add_state(t.new_state)
+            i = i + 1
+        symbol_ids = self.alphabet.symbol_ids
+        self.table = []
+        for state in self.states:
+            row = [()] * len(self.alphabet)
+            for character, choices in state.transitions.items():
+                row[symbol_ids[character]] = tuple((self.state_ids[t.new_state],
+                    symbol_ids[t.output_letter], t.movement_direction.value)
+                    for t in choices)
+            self.table.append(row)
+        self.table[self.state_ids[self.accept_state]] = None
+        self.table[self.state_ids[self.reject_state]] = None
+
+    def _add_state(self, state):
+        if state not in self.state_ids:
+            self.state_ids[state] = len(self.states)
+            self.states.append(state)
+
+    def new_tape(self, tape):
+        """ Sets the word the next begin() searches from """
+        self._word = [str(c) for c in tape]
+        self.MAX_LOOPS = self._reset_loops
+
+    def _push(self, c, rest):
+        """ Internal method for the id of the stack of c on top of rest """
+        key = (c, rest)
+        cell = self._cell_ids.get(key)
+        if cell == None:
+            cell = len(self._cells)
+            self._cells.append(key)
+            self._cell_ids[key] = cell
+        return cell
+
+    def _push_blanks(self, c, rest):
+        """
+        Internal method like _push but leaving a stack of only blanks empty,
+        for stacks that go on into blanks forever
+        """
+        if c == 0 and rest == 0:
+            return 0
+        return self._push(c, rest)
+
+    def begin(self):
+        """
+        Searches for an accepting computation. Returns True if one is found,
+        False if every branch halts without accepting or the search runs out
+        of loops, and None if it gave up with more than max_configurations in
+        one layer
+        """
+        #Cell 0 is the empty stack and is never popped
+        self._cells = [None]
+        self._cell_ids = {}
+        push = self._push
+        push_blanks = self._push_blanks
+        #The left stack only goes on into blanks if the tape can grow left
+        push_left = push_blanks if self.bidirectional else push
+        right = 0
+        #Unknown symbols get ids past the end of every row, so branches
+        #reading them die
+        for c in reversed(self.alphabet.encode_word(self._word, [])):
+            right = push_blanks(c, right)
+        accept = self.state_ids[self.accept_state]
+        start = self.state_ids[self._start_state]
+        table = self.table
+        cells = self._cells
+        bidirectional = self.bidirectional
+        layer = [(start, 0, right)]
+        seen = set(layer)
+        self.steps = 0
+        try:
+            if start == accept:
+                return True
+            while layer and self.MAX_LOOPS >= 0:
+                if self.max_configurations != None and \
+                        len(layer) > self.max_configurations:
+                    return None
+                self.MAX_LOOPS = self.MAX_LOOPS - 1
+                self.steps = self.steps + 1
+                following = []
+                for s, left, right in layer:
+                    row = table[s]
+                    if row == None:
+                        continue
+                    if right == 0:
+                        c, rest = 0, 0
+                    else:
+                        c, rest = cells[right]
+                    if c >= len(row):
+                        continue
+                    for new_state, output, move in row[c]:
+                        if new_state == accept:
+                            return True
+                        if move > 0:
+                            configuration = (new_state, push_left(output, left), rest)
+                        elif left == 0:
+                            #Off the first cell: stay there, or add a blank
+                            #in front of it
+                            under = push_blanks(output, rest)
+                            if bidirectional:
+                                under = push_blanks(0, under)
+                            configuration = (new_state, 0, under)
+                        else:
+                            d, left_rest = cells[left]
+                            configuration = (new_state, left_rest,
+                                push_blanks(d, push_blanks(output, rest)))
+                        if configuration not in seen:
+                            seen.add(configuration)
+                            following.append(configuration)
+                layer = following
+            return False
+        finally:
+            self.configurations = len(seen)
+
+def read(f, **options):
+    """
+    Reads a nondeterministic TM from f, the lines of the input after the
+    nondeterministic line. options are passed on to NondeterministicMachine
+    """
+    number_states = runtm._parse_state_number(f.readline())
+    states, inital_state, accept_state, reject_state = \
+        runtm._parse_states(number_states, f)
+    runtm._parse_alphabet(f.readline())
+    for line in f:
+        res = runtm._TRANSITION_REGEX.match(line)
+        if res == None:
+            raise runtm.InvalidInputFormat("Invalid State! {}".format(line))
+        state, input_symbol, new_state, output_symbol, direction = res.groups()
+        states[state].transitions.setdefault(input_symbol, []).append(
+            Transition(states[new_state], output_symbol, runtm._DIRECTIONS[direction]))
+    return NondeterministicMachine("", accept_state, reject_state, inital_state,
+        runtm.EMPTY_SYMBOL, **options)
+
+def is_nondeterministic(line):
+    """ Returns if the first line of an input declares a nondeterministic TM """
+    return _NONDETERMINISTIC_REGEX.match(line) != None
@@ -0,0 +1,96 @@
+"""
+===============================================================================
+This file saves a parsed Turing Machine to a compact binary file and loads it
+back without parsing the text format again
+===============================================================================
+Note:
+    The file is a header followed by a payload.
+    The header is MAGIC, the format version, the marshal version, the SHA-256
+    of the text file the machine was parsed from and the SHA-256 of the
+    payload.
+    The payload is marshalled (empty symbol, start, accept, reject, names,
+    rows) where states are numbered from 0, names[i] is the name of state i
+    and rows[i] lists the transitions of state i as (input symbol, new
+    state, output symbol, movement) tuples.
+"""
+
+import hashlib
+import marshal
+import os
+import struct
+from turingmachine import State, Transition, TuringMachine, Direction
+
+MAGIC = b'TMPC'
+VERSION = 2
+_HEADER = struct.Struct('<4sBB32s32s')
+
+class InvalidPrecompiledFile(Exception):
+    pass
+
+def digest(path):
+    """ The SHA-256 of the file at path, used to tell if a source changed """
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read()).digest()
+
+def save(tm, path, source_digest=bytes(32)):
+    """
+    Saves the states reachable from the start state of tm to path.
+    source_digest should be the digest() of the text file tm was read from.
+    """
+    ids = {}
+    order = []
+    def number(state):
+        if state not in ids:
+            ids[state] = len(order)
+            order.append(state)
+        return ids[state]
+    for state in (tm._start_state, tm.accept_state, tm.reject_state):
+        number(state)
+    rows = []
+    i = 0
+    while i < len(order):
+        rows.append([(character, number(t.new_state), t.output_letter,
+            t.movement_direction.value)
+            for character, t in order[i].transitions.items()])
+        i = i + 1
+    names = [state.name for state in order]
+    payload = marshal.dumps((tm.EMPTY_SYMBOL, 0, ids[tm.accept_state],
+        ids[tm.reject_state], names, rows))
+    header = _HEADER.pack(MAGIC, VERSION, marshal.version, source_digest,
+        hashlib.sha256(payload).digest())
+    #Write to a temporary file first so readers never see half a file
+    temporary = path + ".tmp{}".format(os.getpid())
+    with open(temporary, 'wb') as f:
+        f.write(header)
+        f.write(payload)
+    os.replace(temporary, path)
+
+def load(path, source_digest=None, **options):
+    """
+    Loads the TuringMachine saved at path. options are passed on to
+    TuringMachine. If source_digest is given the file must have been saved
+    from a source with that digest, otherwise it is out of date.
+    """
+    with open(path, 'rb') as f:
+        data = f.read()
+    if len(data) < _HEADER.size:
+        raise InvalidPrecompiledFile("File is too short")
+    magic, version, marshal_version, source, payload_digest = \
+        _HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise InvalidPrecompiledFile("Not a precompiled Turing Machine")
+    if version != VERSION or marshal_version != marshal.version:
+        raise InvalidPrecompiledFile("Saved by a different version")
+    if source_digest != None and source != source_digest:
+        raise InvalidPrecompiledFile("Source file has changed")
+    payload = data[_HEADER.size:]
+    if hashlib.sha256(payload).digest() != payload_digest:
+        raise InvalidPrecompiledFile("File is corrupt")
+    empty_symbol, start, accept, reject, names, rows = marshal.loads(payload)
+    states = [State(name=name) for name in names]
+    directions = {d.value: d for d in Direction}
+    for state, row in zip(states, rows):
+        state.transitions = {character: Transition(states[new_state], output,
+            directions[movement]) for character, new_state, output, movement in row}
+    return TuringMachine("", states[accept], states[reject], states[start],
+        empty_symbol, **options)
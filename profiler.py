@@ -0,0 +1,133 @@
+"""
+===============================================================================
+This file collects and reports step level statistics about the runs of a
+Turing Machine
+===============================================================================
+"""
+
+import json
+
+class Profile():
+    """
+    Counts collected by CompiledMachine.run_profiled over any number of runs:
+    how often each state and each transition was taken, how often the head
+    changed direction and how the tape grew. Runs are only counted, apart
+    from the keep longest, so any number of runs take the same memory.
+    """
+    compiled = None
+    #Indexed by state id, and then by symbol id for transitions
+    state_hits = None
+    transition_hits = None
+    steps = 0
+    reversals = 0
+    #The number of runs and the longest tape at the end of one
+    runs = 0
+    longest_tape = 0
+    #One dictionary for each of the keep runs with the most steps, most
+    #steps first, see add_run
+    longest_runs = None
+    keep = 10
+
+    def __init__(self, compiled, keep=10):
+        self.compiled = compiled
+        n = len(compiled.states)
+        self.state_hits = [0] * n
+        self.transition_hits = [[0] * compiled.width for i in range(n)]
+        self.longest_runs = []
+        self.keep = keep
+
+    def add_run(self, steps, reversals, extent, length):
+        """
+        Records a finished run. extent is a list of (step, tape length) pairs
+        sampled during the run and length is the final tape length
+        """
+        if not extent or extent[-1][0] != steps:
+            extent.append((steps, length))
+        self.steps = self.steps + steps
+        self.reversals = self.reversals + reversals
+        self.runs = self.runs + 1
+        self.longest_tape = max(self.longest_tape, length)
+        longest = self.longest_runs
+        if len(longest) < self.keep or steps > longest[-1]["steps"]:
+            longest.append({"steps": steps, "reversals": reversals,
+                "extent": extent, "length": length})
+            #Stable, so of runs with the same steps the first is kept
+            longest.sort(key=lambda run: -run["steps"])
+            del longest[self.keep:]
+
+    def max_length(self):
+        """ The longest tape at the end of any run """
+        return self.longest_tape
+
+    def _state_name(self, i):
+        """ Internal method for naming a state in reports """
+        name = self.compiled.states[i].name
+        if name == None:
+            return "s{}".format(i)
+        return name
+
+    def states(self):
+        """ Returns (state name, hits) pairs, most hit first """
+        hits = [(self._state_name(i), n) for i, n in enumerate(self.state_hits)
+            if n > 0]
+        return sorted(hits, key=lambda hit: -hit[1])
+
+    def transitions(self):
+        """
+        Returns (state, read, new state, write, movement, hits) tuples for
+        every transition taken, most hit first
+        """
+        symbols = self.compiled.alphabet.symbols
+        hits = []
+        for i, row in enumerate(self.transition_hits):
+            for c, n in enumerate(row):
+                if n > 0:
+                    new_state, output, move = self.compiled.table[i][c]
+                    hits.append((self._state_name(i), symbols[c],
+                        self._state_name(new_state), symbols[output],
+                        "R" if move > 0 else "L", n))
+        return sorted(hits, key=lambda hit: -hit[-1])
+
+    def as_dict(self):
+        """ The whole profile as a dictionary that can be saved as JSON """
+        return {
+            "steps": self.steps,
+            "reversals": self.reversals,
+            "max_length": self.max_length(),
+            "states": [{"state": name, "hits": n} for name, n in self.states()],
+            "transitions": [{"state": state, "read": read, "new_state": new_state,
+                "write": write, "move": move, "hits": n}
+                for state, read, new_state, write, move, n in self.transitions()],
+            "runs": self.runs,
+            "longest_runs": self.longest_runs,
+        }
+
+    def report(self, top=10):
+        """ A plain text summary listing the top most hit states and transitions """
+        runs = self.runs
+        lines = ["Steps: {} over {} runs ({:.1f} per run)".format(self.steps,
+            runs, self.steps / runs if runs else 0),
+            "Head reversals: {}".format(self.reversals),
+            "Longest tape: {} cells".format(self.max_length()),
+            "States by steps:"]
+        for name, n in self.states()[:top]:
+            lines.append("  {:<12} {:>10} {:6.1f}%".format(name, n,
+                100.0 * n / self.steps))
+        lines.append("Transitions by steps:")
+        for state, read, new_state, write, move, n in self.transitions()[:top]:
+            lines.append("  {:<24} {:>10} {:6.1f}%".format(" ".join((state,
+                read, new_state, write, move)), n, 100.0 * n / self.steps))
+        if self.longest_runs:
+            longest = self.longest_runs[0]
+            lines.append("Tape extent of the longest run (step: cells):")
+            lines.append("  " + " ".join("{}: {}".format(step, length)
+                for step, length in longest["extent"]))
+        return "\n".join(lines) + "\n"
+
+    def save(self, path, format="text"):
+        """ Writes the report to path as text or json """
+        with open(path, 'w') as f:
+            if format == "json":
+                json.dump(self.as_dict(), f, indent=1)
+            else:
+                f.write(self.report())
@@ -0,0 +1,6 @@
+source env/bin/activate
+python3 benchmark.py -e interpreted
+python3 benchmark.py -e compiled
+python3 benchmark.py -e runlength
+python3 benchmark.py -e macro
+deactivate
@@ -6,4 +6,27 @@ pytest -v tests/p4_tests.py
 pytest -v tests/state_tests.py
 pytest -v tests/tm_tests.py
 pytest -v tests/transition_tests.py
+pytest -v tests/compiled_tests.py
+pytest -v tests/runtm_tests.py
+pytest -v tests/tape_tests.py
+pytest -v tests/runlength_tests.py
+pytest -v tests/cycles_tests.py
+pytest -v tests/cache_tests.py
+pytest -v tests/precompiled_tests.py
+pytest -v tests/profiler_tests.py
+pytest -v tests/benchmark_tests.py
+pytest -v tests/batch_tests.py
+pytest -v tests/minimise_tests.py
+pytest -v tests/macro_tests.py
+pytest -v tests/checkpoint_tests.py
+pytest -v tests/stepping_tests.py
+pytest -v tests/service_tests.py
+pytest -v tests/lazyload_tests.py
+pytest -v tests/multitape_tests.py
+pytest -v tests/nondeterministic_tests.py
+pytest -v tests/wordtrie_tests.py
+pytest -v tests/steptrace_tests.py
+pytest -v tests/doom_tests.py
+pytest -v tests/bulk_tests.py
+pytest -v tests/complexity_tests.py
 deactivate
@@ -12,12 +12,32 @@ An example input is given in the project specification.
 """
 
 import argparse
+import itertools
+import json
+import multiprocessing
+import queue
 import re
 import sys
+import threading
+import time
 from turingmachine import State, Transition, TuringMachine, Direction
+from cache import ResultCache
+from batch import BatchMachine
+from wordtrie import TrieMachine
+import precompiled
+import checkpoint
+import lazyload
+import multitape
+import nondeterministic
 ACCEPT_SYMBOL = "+"
 REJECT_SYMBOL = "-"
 EMPTY_SYMBOL = '_'
+#The regular expressions for each kind of line, compiled once
+_STATE_NUMBER_REGEX = re.compile(r'states (\d*)', re.IGNORECASE)
+_STATE_REGEX = re.compile(r'(\w*) ?([+-]?)')
+_ALPHABET_REGEX = re.compile(r'(alphabet) (\d*) (([^ \n]* ?)*)')
+_TRANSITION_REGEX = re.compile(r'(\w*) ([^ \n]*) (\w*) ([^ \n]*) ([RL])')
+_DIRECTIONS = {'R': Direction.RIGHT, 'L': Direction.LEFT}
 
 def parse():
     """ Parses the input, eg reads in the file's location and opens it """
@@ -29,32 +49,411 @@ def parse():
      output should be printed to", default=None) #Default is stdout
     input_location_group = parser.add_mutually_exclusive_group()
     input_location_group.add_argument("-w", "--words", type=str, help="The \
-    file containing the words to best tested with this TM.", default=None)
+    file containing the words to best tested with this TM, or - to read them \
+    from stdin as they arrive.", default=None)
     input_location_group.add_argument("-c", "--console", type=str,
     help="Enable console input", default=None)
+    parser.add_argument("-e", "--engine", type=str, help="The engine used to \
+    run the TM", choices=TuringMachine.ENGINES, default="interpreted")
+    parser.add_argument("--macro-steps", type=int, help="The most steps the \
+    macro engine takes per lookup", default=32)
+    parser.add_argument("-j", "--jobs", type=int, help="The number of worker \
+    processes used to test the words", default=1)
+    parser.add_argument("--detect-cycles", action="store_true", help="Report \
+    words whose computation repeats a configuration as Loops instead of \
+    running them until max loops")
+    parser.add_argument("--cache", type=str, nargs="?", const=":memory:",
+    help="Reuse the results of repeated words. If a file is given results \
+    are also kept there for later runs of the same TM", default=None)
+    parser.add_argument("--cache-size", type=int, help="The number of \
+    results the cache keeps in memory", default=4096)
+    parser.add_argument("-p", "--precompiled", type=str, help="A binary copy \
+    of the TM. It is loaded instead of parsing the input when it is up to \
+    date and (re)written from the input otherwise", default=None)
+    parser.add_argument("--profile", type=str, help="Count the steps of \
+    every state and transition and write a report to this file", default=None)
+    parser.add_argument("--profile-format", type=str, help="The format of \
+    the profile report", choices=("text", "json"), default="text")
+    parser.add_argument("-m", "--minimise", action="store_true", help="Drop \
+    unreachable states, skip states that always halt and merge equivalent \
+    states before running, printing what was removed to stderr")
+    parser.add_argument("--doom", action="store_true", help="Reject words as \
+    soon as they can no longer be accepted instead of when they run out of \
+    loops, printing what was found to stderr")
+    parser.add_argument("--lazy", action="store_true", help="Index the input \
+    and only parse the transitions of a state when it is first entered. Only \
+    the interpreted engine stays lazy")
+    parser.add_argument("--lazy-index", type=str, help="Keep the index made \
+    by --lazy in this file for later runs", default=None)
+    parser.add_argument("-b", "--batch", type=int, help="Run the words in \
+    blocks of this size at once with NumPy", default=None)
+    parser.add_argument("-t", "--trie", type=int, help="Run the words in \
+    blocks of this size, sharing the steps taken on common prefixes", default=None)
+    parser.add_argument("--checkpoint", type=str, help="Save the progress of \
+    the console word to this file every --checkpoint-every steps, resuming \
+    from it if it is there", default=None)
+    parser.add_argument("--checkpoint-every", type=int, help="The number of \
+    steps between checkpoints", default=1000000)
+    parser.add_argument("--trace", type=str, help="Record every step of the \
+    console word to this file, see steptrace.Trace", default=None)
+    parser.add_argument("--trace-every", type=int, help="The number of steps \
+    between full copies of the tape in the trace", default=65536)
+    parser.add_argument("-f", "--format", type=str, help="How the results of \
+    words are written", choices=sorted(FORMATS), default="text")
     #Parse TM
     args = parser.parse_args()
-    tm = _read_file(args.input)
+    with open(args.input, 'r') as f:
+        line = f.readline()
+    if multitape.tapes(line) != None:
+        _check_one_tape_options(parser, args, "machines with several tapes")
+    elif nondeterministic.is_nondeterministic(line):
+        _check_one_tape_options(parser, args, "nondeterministic machines")
+    options = {"engine": args.engine, "detect_cycles": args.detect_cycles,
+        "macro_steps": args.macro_steps,
+        "minimise": args.minimise, "doom": args.doom}
+    if args.lazy:
+        if args.precompiled != None:
+            parser.error("--lazy cannot be used with --precompiled")
+        options["lazy"] = True
+        options["lazy_index"] = args.lazy_index
+    tm = _load_machine(args.input, args.precompiled, **options)
+    if args.minimise:
+        print(tm.minimisation, file=sys.stderr)
+    if args.doom:
+        print(tm.doomed, file=sys.stderr)
+    if args.profile != None:
+        if args.jobs > 1:
+            parser.error("--profile can only be used with one job")
+        #Profiled runs do not look for cycles, so would answer differently
+        if args.detect_cycles:
+            parser.error("--profile cannot be used with --detect-cycles")
+        tm.enable_profiling()
+    if args.batch != None and (args.jobs > 1 or args.detect_cycles or
+            args.profile != None):
+        parser.error("--batch cannot be used with --jobs, --detect-cycles or \
+--profile")
+    if args.trie != None and (args.jobs > 1 or args.detect_cycles or
+            args.profile != None or args.batch != None):
+        parser.error("--trie cannot be used with --jobs, --detect-cycles, \
+--profile or --batch")
+    if args.trace != None and args.checkpoint != None:
+        parser.error("--trace cannot be used with --checkpoint")
     #Cannot have both a location of the words and console input.
     if args.output != None:
         sys.stdout = open(args.output, 'w')
     if args.words != None:
-        with open(args.words, 'r') as f:
-            for word in f:
-                word = word.replace('\n', "") #Remove trailing new line
-                tm.new_tape(word)
-                print(word + ", " + str(tm.begin()))
+        with _open_words(args.words) as f:
+            waiting = None
+            if args.words == "-":
+                words = _WordStream(f)
+                waiting = words.waiting
+            else:
+                words = (word.replace('\n', "") for word in f) #Remove new lines
+            pool = None
+            if args.jobs > 1:
+                #One pool for the whole stream, even when the cache hands
+                #over the words a block at a time
+                pool = multiprocessing.Pool(args.jobs, _init_worker,
+                    (args.input, dict(options, precompiled_file=args.precompiled)))
+                run_words = lambda words: _run_words_pool(pool, words,
+                    args.jobs)
+            elif args.batch != None:
+                run_words = lambda words: _run_words_batched(tm, words,
+                    args.batch)
+            elif args.trie != None:
+                run_words = lambda words: _run_words_trie(tm, words, args.trie)
+            else:
+                run_words = lambda words: _run_words(tm, words)
+            if args.cache != None:
+                cache = ResultCache(tm, args.cache_size, args.cache)
+                results = _run_words_cached(cache, words, run_words)
+            else:
+                results = run_words(words)
+            _write_results(results, sys.stdout, FORMATS[args.format],
+                waiting=waiting)
+            if args.cache != None:
+                cache.close()
+            if pool != None:
+                pool.terminate()
     elif args.console != None:
         tm.new_tape(args.console)
-        res = tm.begin()
-        print(res)
+        if args.checkpoint != None:
+            res = _run_checkpointed(tm, args.console, args.checkpoint,
+                args.checkpoint_every)
+        elif args.trace != None:
+            res = tm.record_trace(args.trace, args.trace_every)
+        else:
+            res = tm.begin()
+        print(_format_result(res))
+    if args.profile != None:
+        tm.profile.save(args.profile, args.profile_format)
+    if args.console != None:
         return res
 
+def _check_one_tape_options(parser, args, kind):
+    """
+    Exits with an error if args use options that only apply to one tape
+    deterministic machines, naming the kind of machine in the message
+    """
+    used = [option for option, given in (
+        ("--engine", args.engine != "interpreted"),
+        ("--detect-cycles", args.detect_cycles),
+        ("--minimise", args.minimise),
+        ("--doom", args.doom),
+        ("--lazy", args.lazy),
+        ("--cache", args.cache != None),
+        ("--precompiled", args.precompiled != None),
+        ("--profile", args.profile != None),
+        ("--batch", args.batch != None),
+        ("--trie", args.trie != None),
+        ("--checkpoint", args.checkpoint != None),
+        ("--trace", args.trace != None)) if given]
+    if used:
+        parser.error("{} cannot be used with {}".format(", ".join(used), kind))
+
+def _format_result(res):
+    """
+    begin() returns None for machines found to loop forever, and for
+    nondeterministic searches that gave up
+    """
+    if res is None:
+        return "Loops"
+    return str(res)
+
+def _format_text(word, res):
+    return word + ", " + _format_result(res) + "\n"
+
+def _format_jsonl(word, res):
+    return json.dumps({"word": word, "result": res}) + "\n"
+
+#The formats words and their results can be written in
+FORMATS = {"text": _format_text, "jsonl": _format_jsonl}
+
+def _open_words(location):
+    """ Opens the file of words, - is stdin """
+    if location == "-":
+        #Do not close stdin when done
+        return open(sys.stdin.fileno(), 'r', closefd=False)
+    return open(location, 'r')
+
+class _WordStream():
+    """
+    The words of f, one per line, read on a thread as they arrive so that
+    waiting() can tell if more words can be had without blocking
+    """
+
+    def __init__(self, f):
+        self._queue = queue.Queue()
+        threading.Thread(target=self._read, args=(f,), daemon=True).start()
+
+    def _read(self, f):
+        try:
+            for line in f:
+                self._queue.put(line.replace('\n', ""))
+        finally:
+            #None marks the end of the words
+            self._queue.put(None)
+
+    def __iter__(self):
+        while True:
+            word = self._queue.get()
+            if word == None:
+                return
+            yield word
+
+    def waiting(self):
+        """ Returns if a word (or the end of the words) has already been read """
+        return not self._queue.empty()
+
+def _blocks(words, size):
+    """
+    Yields lists of up to size words from words. For a _WordStream a block
+    only holds the words already read, so the results of those words are
+    never held back waiting for more to arrive
+    """
+    stream = words if isinstance(words, _WordStream) else None
+    words = iter(words)
+    while True:
+        if stream == None:
+            block = list(itertools.islice(words, size))
+        else:
+            block = list(itertools.islice(words, 1))
+            while block and len(block) < size and stream.waiting():
+                block.extend(itertools.islice(words, 1))
+        if not block:
+            return
+        yield block
+
+def _write_results(results, out, format=_format_text, batch_size=1024,
+                   interval=0.5, waiting=None):
+    """
+    Writes each (word, result) pair from results to out using format.
+    Lines are written and flushed together once batch_size are waiting or
+    interval seconds have passed since the last write, so a stream of words
+    gets its results back promptly without a write per word. If waiting is
+    given, eg _WordStream.waiting, lines are also flushed whenever it returns
+    False, so a producer waiting for an answer before sending the next word
+    always gets it.
+    """
+    batch = []
+    last = time.monotonic()
+    for word, res in results:
+        batch.append(format(word, res))
+        if len(batch) >= batch_size or time.monotonic() - last >= interval \
+                or (waiting != None and not waiting()):
+            out.write("".join(batch))
+            out.flush()
+            batch = []
+            last = time.monotonic()
+    out.write("".join(batch))
+    out.flush()
 
-def _read_file(file):
+def _run_words(tm, words):
+    """ Yields each word with the result of running it on tm """
+    for word in words:
+        tm.new_tape(word)
+        yield word, tm.begin()
+
+def _run_words_cached(cache, words, run_words, block_size=65536):
+    """
+    Yields each word with its result like run_words (eg _run_words) but
+    only words missing from the ResultCache cache are passed to run_words,
+    a block of words at a time (see _blocks)
+    """
+    for block in _blocks(words, block_size):
+        results = {}
+        for word in block:
+            if word not in results:
+                try:
+                    results[word] = cache[word]
+                except KeyError:
+                    pass
+        #dict.fromkeys drops repeated words but keeps their order
+        missing = [word for word in dict.fromkeys(block) if word not in results]
+        for word, res in run_words(missing):
+            results[word] = res
+            cache[word] = res
+        for word in block:
+            yield word, results[word]
+
+def _run_words_batched(tm, words, block_size=4096):
+    """
+    Yields each word with its result like _run_words, but runs a block of
+    words at a time together on a BatchMachine
+    """
+    batch = BatchMachine(tm.compile())
+    for block in _blocks(words, block_size):
+        for result in zip(block, batch.run(block, tm._reset_loops,
+                tm.bidirectional)):
+            yield result
+
+def _run_words_trie(tm, words, block_size=65536):
+    """
+    Yields each word with its result like _run_words, but runs a block of
+    words at a time on a TrieMachine so common prefixes are only run once
+    """
+    trie = TrieMachine(tm.compile())
+    for block in _blocks(words, block_size):
+        for result in zip(block, trie.run(block, tm._reset_loops,
+                tm.bidirectional)):
+            yield result
+
+def _run_checkpointed(tm, word, path, every):
+    """
+    Runs word, which must be on the tape of tm, like begin() but saving a
+    checkpoint to path every so many steps. A checkpoint left at path by an
+    earlier run of the same word is resumed.
+    """
+    try:
+        checkpoint.load(tm, path, word)
+    except (OSError, checkpoint.InvalidCheckpoint):
+        pass
+    return checkpoint.run(tm, path, every, word)
+
+#Each worker process parses its own copy of the TM once
+_worker_tm = None
+
+def _init_worker(file, options):
+    global _worker_tm
+    _worker_tm = _load_machine(file, **options)
+
+def _run_word(word):
+    _worker_tm.new_tape(word)
+    return word, _worker_tm.begin()
+
+def _run_words_parallel(file, words, jobs, chunksize=256, **options):
+    """
+    Yields each word with its result like _run_words, in the same order as
+    the words, but shares the words between jobs worker processes.
+    options are passed on to _load_machine.
+    Only a few chunks per worker are read ahead at once, so an endless
+    stream of words is handled in constant memory.
+    """
+    with multiprocessing.Pool(jobs, _init_worker, (file, options)) as pool:
+        for result in _run_words_pool(pool, words, jobs, chunksize):
+            yield result
+
+def _run_words_pool(pool, words, jobs, chunksize=256):
+    """
+    Yields each word with its result like _run_words_parallel, on pool, a
+    multiprocessing.Pool of jobs workers started with _init_worker
+    """
+    for block in _blocks(words, jobs * chunksize * 4):
+        for result in pool.imap(_run_word, block, chunksize):
+            yield result
+
+def _load_machine(file, precompiled_file=None, minimise=False, doom=False,
+                  **options):
+    """
+    Reads the TM in file like _read_file. If precompiled_file is given and
+    was saved from the current file it is loaded instead, otherwise it is
+    saved from the file for next time. The saved copy is never minimised
+    or doomed.
+    """
+    if precompiled_file == None:
+        return _read_file(file, minimise=minimise, doom=doom, **options)
+    source = precompiled.digest(file)
+    try:
+        tm = precompiled.load(precompiled_file, source, **options)
+    except (OSError, precompiled.InvalidPrecompiledFile):
+        tm = _read_file(file, **options)
+        precompiled.save(tm, precompiled_file, source)
+    if minimise:
+        tm.minimise()
+    if doom:
+        tm.doom()
+    return tm
+
+def _read_file(file, engine="interpreted", minimise=False, doom=False,
+               lazy=False, lazy_index=None, **options):
+    """
+    Reads the TM in file. Any options are passed on to TuringMachine, eg
+    max_loops or detect_cycles. If minimise is set the TM is minimised
+    before it is returned, see TuringMachine.minimise, and if doom is set
+    where it is doomed is found, see TuringMachine.doom. If lazy is set the
+    transitions are only parsed when needed, see lazyload.load.
+    Files starting with a tapes line are read as a MultiTapeMachine, and
+    those starting with a nondeterministic line as a NondeterministicMachine.
+    These only take the max_loops and bidirectional options.
+    """
+    if lazy:
+        tm = lazyload.load(file, lazy_index, engine=engine, **options)[0]
+        if minimise:
+            tm.minimise()
+        if doom:
+            tm.doom()
+        return tm
     with open(file, 'r') as f:
+        line = f.readline()
+        basic = {key: options[key] for key in ("max_loops", "bidirectional")
+            if key in options}
+        k = multitape.tapes(line)
+        if k != None:
+            return multitape.read(f, k, **basic)
+        if nondeterministic.is_nondeterministic(line):
+            return nondeterministic.read(f, **basic)
         #The first line should consist of the word 'state' and  then an integer
-        number_states = _parse_state_number(f.readline())
+        number_states = _parse_state_number(line)
         #The next number_states lines are states
         states, inital_state, accept_state, reject_state = _parse_states(number_states, f)
         #That is then followed by the input alphabet
@@ -62,31 +461,38 @@ def _read_file(file):
         #Add the transitions to the states
         _parse_transitions(f, alphabet, states)
         #Add these states to the TM
-        return TuringMachine("", accept_state, reject_state, inital_state, EMPTY_SYMBOL)
+        tm = TuringMachine("", accept_state, reject_state, inital_state,
+            EMPTY_SYMBOL, engine=engine, **options)
+    if minimise:
+        tm.minimise(states.values())
+    if doom:
+        tm.doom()
+    return tm
 
 def _parse_transitions(f, alphabet, states):
+    #Every transition shares the symbol objects of the alphabet rather than
+    #holding its own copy of each symbol read from the file
+    symbols = {symbol: symbol for symbol in alphabet}
+    intern = lambda symbol: symbols.setdefault(symbol, symbol)
     #This should loop for the rest of the lines in the file
-    regex = re.compile('(\w*) ([^ \n]*) (\w*) ([^ \n]*) ([RL])')
+    match = _TRANSITION_REGEX.match
     for line in f:
-        res = regex.match(line)
+        res = match(line)
         #If we get None then we have an invalid line
         if res == None:
             raise InvalidInputFormat("Invalid State! {}".format(line))
         #Otherwise it is of the correct format
         state, input_symbol, new_state, output_symbol, direction = res.groups()
-        state = states[state] #Change state to a TM state
-        direction = Direction.convert(direction) #Convert to enumeration
-        new_state = states[new_state]
-        #Ensure input_symbol is in alphabet
-        state.create_transition(input_symbol, new_state, output_symbol, direction)
+        #Change the states to TM states and the direction to an enumeration
+        states[state].create_transition(intern(input_symbol), states[new_state],
+            intern(output_symbol), _DIRECTIONS[direction])
 
 def _parse_alphabet(line):
     #alphabet followed by an integer, followed by a space and then
     #a series of word characters (excl. space) followed by an optional space
     #an arbitary amount of times.
     #This allows us to have more complex alphabets eg ab, cd and not a, b, c, d
-    regex = re.compile('(alphabet) (\d*) (([^ \n]* ?)*)')
-    res = regex.match(line)
+    res = _ALPHABET_REGEX.match(line)
     #Res should contain an res.group(2) worth of words
     words, size = res.group(3).split(" "), int(res.group(2))
     if len(words) != size:
@@ -122,22 +528,20 @@ def _parse_state(dict, line):
     #This accepts 'q0 ' but not 'qa+'
     #These are then split into two groups. The name part and the optional
     #additional information
-    regex = re.compile('(\w*) ?([+-]?)')
-    res = regex.match(line)
+    res = _STATE_REGEX.match(line)
     #Add all states to the dictionary of states
     #Do a small check
     name = res.group(1)
     assert dict != None
     if name in dict:
         raise InvalidInputFormat("Two or more states cannot have the same name")
-    dict[name] = State()
+    dict[name] = State(name=name)
     #Special test for reject state and accept state
     #Additional characters will be reject by the regex so not need to test
     return dict[name], res.group(2)
 
 def _parse_state_number(line):
-    regex = re.compile('states (\d*)', re.IGNORECASE)
-    res = regex.match(line)
+    res = _STATE_NUMBER_REGEX.match(line)
     if not res:
         raise InvalidInputFormat("First line is not <states> <integer>")
     return int(res.group(1)) #NOTE: Regex counts from 1.
@@ -0,0 +1,226 @@
+"""
+Note:
+    A long running service that keeps parsed Turing Machines in memory and
+    runs words on them for clients over a Unix socket or localhost TCP.
+    Every request and response is one line of JSON. A request is
+    {"id": <anything>, "machine": <path of a TM file>, "words": [...]}
+    and is answered by one line per word, in order, of
+    {"id": ..., "word": ..., "result": true, false or null (loops)}
+    or {"id": ..., "word": ..., "error": ...} if the word could not be run,
+    followed by {"id": ..., "done": true}. A request that cannot be run at
+    all is answered by {"id": ..., "error": ...}.
+    Words are run in batches on a pool of worker processes. Only so many
+    batches are in flight at once across all clients; a client whose
+    request is waiting for room is not read from, and results are only
+    sent as fast as the client reads them.
+"""
+
+import argparse
+import asyncio
+import concurrent.futures
+import json
+import os
+from collections import OrderedDict
+import runtm
+
+#Each worker process keeps the machines it has parsed, keyed by
+#(path, modification time, options) so a changed file is parsed again.
+#Only the most recently used are kept
+_worker_machines = OrderedDict()
+MAX_MACHINES = 32
+
+def _worker_machine(key):
+    if key in _worker_machines:
+        _worker_machines.move_to_end(key)
+        return _worker_machines[key]
+    path, mtime, options = key
+    tm = runtm._load_machine(path, **dict(options))
+    #Older versions of the file are never asked for again
+    for old in [old for old in _worker_machines
+            if old[0] == path and old[2] == options]:
+        del _worker_machines[old]
+    _worker_machines[key] = tm
+    while len(_worker_machines) > MAX_MACHINES:
+        _worker_machines.popitem(last=False)
+    return tm
+
+def _machine_key(path, options):
+    """
+    Returns the worker cache key of the machine at path. Run in a worker, it
+    parses the machine too so a bad file is reported before any words are run
+    """
+    key = (path, os.stat(path).st_mtime_ns, options)
+    _worker_machine(key)
+    return key
+
+def _run_batch(key, words):
+    """ Returns a (result, error) pair for every word, run in a worker """
+    tm = _worker_machine(key)
+    results = []
+    for word in words:
+        tm.new_tape(word)
+        try:
+            results.append((tm.begin(), None))
+        except KeyError as e:
+            results.append((None, "No transition for {!r}".format(e.args[0])))
+    return results
+
+class Service():
+    """
+    Answers requests from clients, see the note at the top of this file.
+    options are passed on to runtm._load_machine for every machine.
+    """
+    jobs = 1
+    batch_size = 256
+    #The most batches waiting for or running on the workers at once
+    max_pending = 0
+    options = None
+    _pool = None
+    _slots = None
+
+    def __init__(self, jobs=1, batch_size=256, max_pending=None, **options):
+        self.jobs = jobs
+        self.batch_size = batch_size
+        if max_pending == None:
+            max_pending = jobs * 4
+        self.max_pending = max_pending
+        self.options = tuple(sorted(options.items()))
+
+    async def _run_request(self, request, writer):
+        """ Internal method for streaming the results of one request """
+        loop = asyncio.get_running_loop()
+        request_id = request.get("id")
+        try:
+            path = request["machine"]
+            #Anything else, such as a number, would be taken as a file
+            #descriptor by os.stat and open
+            if not isinstance(path, str):
+                raise TypeError("The machine must be the path of a file")
+            words = [str(word) for word in request["words"]]
+            #Parsing a large machine would hold up every other client
+            key = await loop.run_in_executor(self._pool, _machine_key, path,
+                self.options)
+        except Exception as e:
+            #A file that is not a TM can fail in many ways while parsing
+            await _send(writer, {"id": request_id, "error": repr(e)})
+            return
+        batches = asyncio.Queue()
+        async def submit():
+            for i in range(0, len(words), self.batch_size):
+                block = words[i:i + self.batch_size]
+                await self._slots.acquire()
+                future = loop.run_in_executor(self._pool, _run_batch, key, block)
+                await batches.put((block, future))
+            await batches.put(None)
+        submitter = asyncio.ensure_future(submit())
+        try:
+            while True:
+                item = await batches.get()
+                if item == None:
+                    break
+                block, future = item
+                try:
+                    results = await future
+                except Exception as e:
+                    #The rest of the request is abandoned, but the client
+                    #is still answered and can send more requests
+                    await _send(writer, {"id": request_id, "error": repr(e)})
+                    return
+                finally:
+                    self._slots.release()
+                lines = []
+                for word, (res, error) in zip(block, results):
+                    if error == None:
+                        response = {"id": request_id, "word": word, "result": res}
+                    else:
+                        response = {"id": request_id, "word": word, "error": error}
+                    lines.append(json.dumps(response) + "\n")
+                writer.write("".join(lines).encode())
+                await writer.drain()
+            await _send(writer, {"id": request_id, "done": True})
+        finally:
+            if not submitter.done():
+                submitter.cancel()
+            #Give back the slots of batches that will never be collected
+            while not batches.empty():
+                item = batches.get_nowait()
+                if item != None:
+                    self._slots.release()
+
+    async def _handle(self, reader, writer):
+        """ Internal method serving one client until it disconnects """
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    request = json.loads(line)
+                    if not isinstance(request, dict):
+                        raise ValueError("A request must be an object")
+                except ValueError as e:
+                    await _send(writer, {"id": None, "error": repr(e)})
+                    continue
+                await self._run_request(request, writer)
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def start(self, path=None, host="127.0.0.1", port=0):
+        """
+        Starts the worker pool and listens on the Unix socket path or, if
+        that is None, on host and port. Returns the asyncio server
+        """
+        self._pool = concurrent.futures.ProcessPoolExecutor(self.jobs)
+        self._slots = asyncio.Semaphore(self.max_pending)
+        if path != None:
+            return await asyncio.start_unix_server(self._handle, path)
+        return await asyncio.start_server(self._handle, host, port)
+
+    def close(self):
+        if self._pool != None:
+            self._pool.shutdown()
+            self._pool = None
+
+async def _send(writer, response):
+    writer.write((json.dumps(response) + "\n").encode())
+    await writer.drain()
+
+async def _serve(service, args):
+    server = await service.start(args.socket, args.host, args.port)
+    try:
+        async with server:
+            for sock in server.sockets:
+                print("Listening on {}".format(sock.getsockname()), flush=True)
+            await server.serve_forever()
+    finally:
+        service.close()
+
+def parse():
+    parser = argparse.ArgumentParser(description="Runs words on Turing \
+    Machines kept in memory for clients")
+    parser.add_argument("-s", "--socket", type=str, help="Listen on this Unix \
+    socket instead of TCP", default=None)
+    parser.add_argument("--host", type=str, default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=7878)
+    parser.add_argument("-j", "--jobs", type=int, help="The number of worker \
+    processes", default=os.cpu_count() or 1)
+    parser.add_argument("--batch-size", type=int, help="The number of words \
+    given to a worker at once", default=256)
+    parser.add_argument("--max-pending", type=int, help="The most batches in \
+    flight at once, by default four per worker", default=None)
+    parser.add_argument("-e", "--engine", type=str, help="The engine used to \
+    run the TMs", choices=runtm.TuringMachine.ENGINES, default="interpreted")
+    parser.add_argument("--detect-cycles", action="store_true", help="Report \
+    words that repeat a configuration as null (loops)")
+    args = parser.parse_args()
+    service = Service(args.jobs, args.batch_size, args.max_pending,
+        engine=args.engine, detect_cycles=args.detect_cycles)
+    try:
+        asyncio.run(_serve(service, args))
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    parse()
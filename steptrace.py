@@ -0,0 +1,245 @@
+"""
+===============================================================================
+This file records every step of a run of a Turing Machine to a compact
+binary trace and replays it, seeking straight to any step
+===============================================================================
+Note:
+    The file is a header, a table of transitions and then blocks.
+    The header is MAGIC, the format version, the fingerprint of the machine
+    (see cache.machine_fingerprint) and the length of the table.
+    The table is marshalled (every, typecode, bidirectional, transitions)
+    where transitions lists (state, input symbol, new state, output symbol,
+    movement) for every transition of the machine, states numbered by
+    cache.state_order. A step is recorded as the index into transitions of
+    the transition it took, typecode is the array typecode of those indices.
+    Each block starts with a keyframe: the step it was taken after and the
+    length of its payload, then the payload, marshalled (state, tape
+    position, symbols, typecode, cells) as in a checkpoint. The keyframe is
+    followed by the next every steps, fewer in the last block.
+    Blocks are only ever appended, so the file can be read while it is
+    written and a trace cut short by a crash still replays up to the last
+    whole step.
+"""
+
+import marshal
+import struct
+import zlib
+from array import array
+from cache import machine_fingerprint, state_order
+from tape import Alphabet, Tape
+
+MAGIC = b'TMTR'
+VERSION = 1
+_HEADER = struct.Struct('<4sB32sI')
+_KEYFRAME = struct.Struct('<QI')
+#Steps are written out at least this often, so readers can follow a run
+_FLUSH_STEPS = 4096
+
+class InvalidTrace(Exception):
+    pass
+
+def _keyframe(step, state, tape):
+    """ Internal method for the bytes of a keyframe of tape """
+    cells = tape.cells[tape.start:]
+    if isinstance(cells, bytearray):
+        cells = array('B', cells)
+    symbols = tape.alphabet.symbols + tape.unknown
+    payload = marshal.dumps((state, tape.position, symbols, cells.typecode,
+        zlib.compress(cells.tobytes())))
+    return _KEYFRAME.pack(step, len(payload)) + payload
+
+def record(tm, path, every=65536):
+    """
+    Runs tm from its current configuration like begin() (without detect
+    cycles or profiling), writing every step to a trace at path with a
+    keyframe of the whole tape every every steps. Returns if tm accepts
+    and raises KeyError in the same way as begin().
+    """
+    assert every >= 1
+    if tm._compiled == None:
+        tm.compile()
+    compiled = tm._compiled
+    tape = compiled._tape(tm)
+    order = state_order(tm)
+    numbers = {state: i for i, state in enumerate(order)}
+    #ids[state id][symbol id] is the index of the transition in the table
+    transitions = []
+    ids = []
+    for s, row in enumerate(compiled.table):
+        ids.append([None] * compiled.width)
+        for c, entry in enumerate(row or ()):
+            if entry != None:
+                ids[s][c] = len(transitions)
+                new_state, output, move = entry
+                transitions.append((numbers[compiled.states[s]],
+                    compiled.alphabet.symbols[c], numbers[compiled.states[new_state]],
+                    compiled.alphabet.symbols[output], move))
+    typecode = 'H' if len(transitions) <= 0x10000 else 'L'
+    table = marshal.dumps((every, typecode, tm.bidirectional, transitions))
+    s = compiled.state_ids[tm.current_state]
+    loops = tm.MAX_LOOPS
+    steps = 0
+    pending = array(typecode)
+    with open(path, 'wb') as f:
+        f.write(_HEADER.pack(MAGIC, VERSION, bytes.fromhex(machine_fingerprint(tm)),
+            len(table)))
+        f.write(table)
+        try:
+            while s != compiled.accept and s != compiled.reject and loops >= 0:
+                if steps % every == 0:
+                    f.write(pending.tobytes())
+                    del pending[:]
+                    f.write(_keyframe(steps, numbers[compiled.states[s]], tape))
+                c = tape.cells[tape.head]
+                row = compiled.table[s]
+                if c >= len(row) or row[c] == None:
+                    #No transition for this symbol, see CompiledMachine.run
+                    loops = loops - 1
+                    raise KeyError(tape.symbol(c))
+                pending.append(ids[s][c])
+                s, tape.cells[tape.head], move = row[c]
+                tape.move(move)
+                loops = loops - 1
+                steps = steps + 1
+                if len(pending) >= _FLUSH_STEPS:
+                    f.write(pending.tobytes())
+                    f.flush()
+                    del pending[:]
+        finally:
+            f.write(pending.tobytes())
+            tm.tape_position = tape.position
+            tm.current_state = compiled.states[s]
+            tm.MAX_LOOPS = loops
+    return s == compiled.accept
+
+class Trace():
+    """
+    A recorded trace of tm, which must be the same machine with the same
+    options, opened for replay. len() is the number of steps recorded and
+    configuration(n) is the configuration after n steps, found from the
+    last keyframe before it so it takes at most every steps to rebuild.
+    """
+    every = 0
+    bidirectional = False
+    #(state, input symbol, new state, output symbol, movement) per id
+    transitions = None
+    _states = None
+    _typecode = None
+    _data = None
+    #Offset into the file of each keyframe and of the steps after it
+    _keyframes = None
+    _steps = None
+    _length = 0
+    #The configuration last replayed, carried on from if possible
+    _step = None
+    _state = None
+    _tape = None
+    _outputs = None
+
+    def __init__(self, tm, path):
+        with open(path, 'rb') as f:
+            self._data = f.read()
+        data = self._data
+        if len(data) < _HEADER.size:
+            raise InvalidTrace("File is too short")
+        magic, version, fingerprint, size = _HEADER.unpack_from(data)
+        if magic != MAGIC:
+            raise InvalidTrace("Not a Turing Machine trace")
+        if version != VERSION:
+            raise InvalidTrace("Saved by a different version")
+        if fingerprint != bytes.fromhex(machine_fingerprint(tm)):
+            raise InvalidTrace("Recorded from a different machine")
+        self.every, self._typecode, self.bidirectional, self.transitions = \
+            marshal.loads(data[_HEADER.size:_HEADER.size + size])
+        self._states = state_order(tm)
+        self._index(_HEADER.size + size)
+
+    def _index(self, offset):
+        """
+        Internal method for finding the blocks, skipping over their steps.
+        A block cut short ends the trace
+        """
+        data = self._data
+        itemsize = array(self._typecode).itemsize
+        self._keyframes = []
+        self._steps = []
+        self._length = 0
+        while offset + _KEYFRAME.size <= len(data):
+            step, size = _KEYFRAME.unpack_from(data, offset)
+            start = offset + _KEYFRAME.size + size
+            if start > len(data):
+                break
+            self._keyframes.append(offset)
+            self._steps.append(start)
+            count = min(self.every, (len(data) - start) // itemsize)
+            self._length = step + count
+            if count < self.every:
+                break
+            offset = start + count * itemsize
+
+    def __len__(self):
+        return self._length
+
+    def _block_steps(self, block):
+        """ Internal method for the transition ids recorded in a block """
+        count = min(self.every, self._length - block * self.every)
+        ids = array(self._typecode)
+        start = self._steps[block]
+        ids.frombytes(self._data[start:start + count * ids.itemsize])
+        return ids
+
+    def transition(self, n):
+        """
+        The transition taken by step n (counting from 0) as (state, input
+        symbol, new state, output symbol, movement)
+        """
+        if not 0 <= n < self._length:
+            raise IndexError("Step {} is not in the trace".format(n))
+        block = n // self.every
+        ids = self._block_steps(block)
+        state, symbol, new_state, output, move = self.transitions[ids[n - block * self.every]]
+        return self._states[state], symbol, self._states[new_state], output, move
+
+    def _load_keyframe(self, block):
+        """ Internal method for going to the configuration of a keyframe """
+        offset = self._keyframes[block]
+        step, size = _KEYFRAME.unpack_from(self._data, offset)
+        start = offset + _KEYFRAME.size
+        state, position, symbols, typecode, cells = \
+            marshal.loads(self._data[start:start + size])
+        alphabet = Alphabet(symbols[0])
+        alphabet.encode(symbols)
+        #The outputs of every transition as symbol ids of this alphabet
+        self._outputs = [alphabet.symbol_id(t[3]) for t in self.transitions]
+        self._tape = Tape(alphabet, (), self.bidirectional)
+        cells = array(typecode, zlib.decompress(cells))
+        if isinstance(self._tape.cells, bytearray):
+            cells = bytearray(cells.tobytes())
+        self._tape.cells = cells
+        self._tape.position = position
+        self._state = state
+        self._step = step
+
+    def configuration(self, n):
+        """
+        The configuration after n steps as (state, tape position, list of
+        tape symbols), like TuringMachine.iterate with configurations set
+        """
+        if not 0 <= n <= self._length:
+            raise IndexError("Step {} is not in the trace".format(n))
+        block = min(n // self.every, len(self._keyframes) - 1)
+        if self._step == None or not block * self.every <= self._step <= n:
+            self._load_keyframe(block)
+        ids = self._block_steps(block)
+        tape = self._tape
+        transitions = self.transitions
+        outputs = self._outputs
+        first = block * self.every
+        for i in range(self._step - first, n - first):
+            t = ids[i]
+            tape.cells[tape.head] = outputs[t]
+            tape.move(transitions[t][4])
+        if n > first:
+            self._state = transitions[ids[n - first - 1]][2]
+        self._step = n
+        return self._states[self._state], tape.position, tape.tolist()
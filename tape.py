@@ -0,0 +1,464 @@
+"""
+===============================================================================
+This file manages the alphabet of symbols and the compact tape used by the
+compiled engine
+===============================================================================
+"""
+
+from array import array
+
+class Alphabet():
+    """
+    Gives every symbol a small integer id, in the order they are first seen.
+    The empty symbol is always id 0 so newly allocated cells are blank.
+    """
+    symbols = None
+    symbol_ids = None
+
+    def __init__(self, empty_symbol):
+        self.symbols = []
+        self.symbol_ids = {}
+        self.symbol_id(empty_symbol)
+
+    def __len__(self):
+        return len(self.symbols)
+
+    def symbol_id(self, symbol):
+        """ Returns the id of a symbol, giving it a new id if it is unknown """
+        i = self.symbol_ids.get(symbol)
+        if i is None:
+            i = len(self.symbols)
+            self.symbol_ids[symbol] = i
+            self.symbols.append(symbol)
+        return i
+
+    def encode(self, tape):
+        """ Converts a list of symbols into a list of symbol ids """
+        return [self.symbol_id(c) for c in tape]
+
+    def encode_word(self, tape, unknown):
+        """
+        Converts a list of symbols into a list of symbol ids like encode but
+        without adding to the alphabet. Symbols it does not know are added
+        to the list unknown instead, and given the ids after the alphabet's
+        own, so the alphabet of a machine does not grow with its input
+        """
+        ids = self.symbol_ids
+        result = []
+        for c in tape:
+            i = ids.get(c)
+            if i is None:
+                if c not in unknown:
+                    unknown.append(c)
+                i = len(self.symbols) + unknown.index(c)
+            result.append(i)
+        return result
+
+    def symbol(self, i, unknown=()):
+        """ The symbol with id i, where ids after the alphabet's are unknown's """
+        if i < len(self.symbols):
+            return self.symbols[i]
+        return unknown[i - len(self.symbols)]
+
+    def decode(self, tape, unknown=()):
+        """ Converts a list of symbol ids back into a list of symbols """
+        symbols = self.symbols
+        if unknown:
+            symbols = symbols + unknown
+        return [symbols[c] for c in tape]
+
+    def typecode(self):
+        """ The smallest array typecode that can hold every symbol id """
+        return _typecode(len(self.symbols))
+
+def _typecode(n):
+    """ The smallest array typecode that can hold ids up to n - 1 """
+    if n <= 0x100:
+        return 'B'
+    if n <= 0x10000:
+        return 'H'
+    return 'L'
+
+class Tape():
+    """
+    A tape holding one symbol id per cell in a bytearray (or an array for
+    alphabets of more than 256 symbols) rather than one str object per cell.
+    It behaves like the list of symbols used by the interpreted engine, so
+    tape[i] is the symbol in the i-th cell from the left.
+    The tape grows to the right by appending and, if bidirectional, to the
+    left into spare blank cells kept in front of the first cell. That spare
+    space is doubled whenever it runs out so both directions are amortised
+    O(1).
+    """
+    alphabet = None
+    #The array of symbol ids, the first cell of the tape is cells[start]
+    cells = None
+    start = 0
+    #Index into cells of the tape head
+    head = 0
+    #If False the head stays on the first cell when moving left off it
+    bidirectional = False
+    #Symbols of this tape missing from the alphabet, see Alphabet.encode_word
+    unknown = None
+
+    def __init__(self, alphabet, tape=(), bidirectional=False):
+        self.alphabet = alphabet
+        self.bidirectional = bidirectional
+        self.unknown = []
+        ids = alphabet.encode_word(tape, self.unknown)
+        typecode = _typecode(len(alphabet) + len(self.unknown))
+        if typecode == 'B':
+            #bytearray is quicker to index than array('B')
+            self.cells = bytearray(ids)
+        else:
+            self.cells = array(typecode, ids)
+        self.start = 0
+        self.head = 0
+
+    def symbol(self, c):
+        """ The symbol with id c on this tape """
+        return self.alphabet.symbol(c, self.unknown)
+
+    def _symbol_id(self, symbol):
+        """ Internal method for the id of symbol on this tape """
+        return self.alphabet.encode_word((symbol,), self.unknown)[0]
+
+    @property
+    def position(self):
+        """ The position of the head counted from the first cell """
+        return self.head - self.start
+
+    @position.setter
+    def position(self, position):
+        self.head = self.start + position
+
+    def read(self):
+        """ Returns the symbol under the head """
+        return self.symbol(self.cells[self.head])
+
+    def write(self, symbol):
+        """ Writes symbol under the head """
+        self.cells[self.head] = self._symbol_id(symbol)
+
+    def move(self, direction):
+        """
+        Moves the head one cell (direction is -1 or +1), growing the tape in
+        the same way as TuringMachine._move_tape
+        """
+        #Special case furthest right entry
+        if self.head >= len(self.cells) - 1:
+            self.cells.append(0)
+        self.head = self.head + direction
+        if self.head < self.start:
+            if self.bidirectional:
+                self.extend_left()
+            else:
+                self.head = self.start
+
+    def extend_left(self):
+        """ Adds one blank cell in front of the first cell """
+        if self.start == 0:
+            self._grow_left()
+        self.start = self.start - 1
+
+    def _grow_left(self):
+        """
+        Internal method for doubling the spare space in front of the first
+        cell. Returns how far every index into cells has moved.
+        """
+        n = max(len(self.cells), 16)
+        if isinstance(self.cells, bytearray):
+            self.cells[:0] = bytes(n)
+        else:
+            self.cells[:0] = array(self.cells.typecode, bytes(n * self.cells.itemsize))
+        self.start = self.start + n
+        self.head = self.head + n
+        return n
+
+    def tolist(self):
+        """ Returns the tape as a list of symbols """
+        return self.alphabet.decode(self.cells[self.start:], self.unknown)
+
+    def __len__(self):
+        return len(self.cells) - self.start
+
+    def __iter__(self):
+        return iter(self.tolist())
+
+    def _index(self, i):
+        """ Internal method for converting a list index into cells """
+        if i < 0:
+            i = i + len(self)
+        if i < 0 or i >= len(self):
+            raise IndexError("Tape index out of range")
+        return self.start + i
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return self.tolist()[i]
+        return self.symbol(self.cells[self._index(i)])
+
+    def __setitem__(self, i, symbol):
+        self.cells[self._index(i)] = self._symbol_id(symbol)
+
+    def insert(self, i, symbol):
+        """ Only inserting in front of the first cell is supported """
+        if i != 0:
+            raise IndexError("Tape can only be inserted into at the front")
+        self.extend_left()
+        self.cells[self.start] = self._symbol_id(symbol)
+
+    def append(self, symbol):
+        self.cells.append(self._symbol_id(symbol))
+
+    def clear(self):
+        del self.cells[:]
+        self.start = 0
+        self.head = 0
+
+    def __eq__(self, other):
+        if isinstance(other, Tape):
+            other = other.tolist()
+        return self.tolist() == other
+
+    def __repr__(self):
+        return "Tape({})".format(self.tolist())
+
+class RunLengthTape():
+    """
+    A tape stored as runs of identical symbols, each a [symbol id, length]
+    pair, so a long stretch of one symbol costs the same as a single cell.
+    Like Tape it behaves like the list of symbols used by the interpreted
+    engine. fill() lets an engine make many steps over a run at once.
+    """
+    alphabet = None
+    runs = None
+    length = 0
+    #Position of the head counted from the first cell
+    head = 0
+    #If False the head stays on the first cell when moving left off it
+    bidirectional = False
+    #Symbols of this tape missing from the alphabet, see Alphabet.encode_word
+    unknown = None
+    #The run the head was last seen in and the position that run starts at
+    _run = 0
+    _run_start = 0
+
+    def __init__(self, alphabet, tape=(), bidirectional=False):
+        self.alphabet = alphabet
+        self.bidirectional = bidirectional
+        self.unknown = []
+        self.clear()
+        for c in alphabet.encode_word(tape, self.unknown):
+            self._append_run(c, 1)
+
+    def symbol(self, c):
+        """ The symbol with id c on this tape """
+        return self.alphabet.symbol(c, self.unknown)
+
+    def _symbol_id(self, symbol):
+        """ Internal method for the id of symbol on this tape """
+        return self.alphabet.encode_word((symbol,), self.unknown)[0]
+
+    @property
+    def position(self):
+        """ The position of the head counted from the first cell """
+        return self.head
+
+    @position.setter
+    def position(self, position):
+        self.head = position
+
+    def _seek(self, pos):
+        """
+        Internal method for finding the run holding the cell at pos.
+        Returns the index of the run and the position the run starts at.
+        The search starts from the last run found as the head rarely jumps.
+        """
+        runs = self.runs
+        i, start = self._run, self._run_start
+        while pos < start:
+            i = i - 1
+            start = start - runs[i][1]
+        while pos >= start + runs[i][1]:
+            start = start + runs[i][1]
+            i = i + 1
+        self._run, self._run_start = i, start
+        return i, start
+
+    def _append_run(self, c, n):
+        """ Internal method for adding n cells of c to the right end """
+        if self.runs and self.runs[-1][0] == c:
+            self.runs[-1][1] = self.runs[-1][1] + n
+        else:
+            self.runs.append([c, n])
+        self.length = self.length + n
+
+    def _prepend_run(self, c, n):
+        """ Internal method for adding n cells of c in front of the first cell """
+        if self.runs and self.runs[0][0] == c:
+            self.runs[0][1] = self.runs[0][1] + n
+            if self._run != 0:
+                self._run_start = self._run_start + n
+        else:
+            self.runs.insert(0, [c, n])
+            if len(self.runs) > 1:
+                self._run = self._run + 1
+                self._run_start = self._run_start + n
+        self.length = self.length + n
+        self.head = self.head + n
+
+    def _replace(self, a, n, c):
+        """ Internal method for writing c over the n cells starting at a """
+        runs = self.runs
+        i, start = self._seek(a)
+        if n == 1 and runs[i][0] == c:
+            return
+        #Rebuild the runs overlapping [a, a + n) and their neighbours so
+        #that equal runs next to each other are merged
+        if i > 0:
+            i = i - 1
+            start = start - runs[i][1]
+        j, end = i, start
+        while j < len(runs) and end < a + n:
+            end = end + runs[j][1]
+            j = j + 1
+        if j < len(runs):
+            j = j + 1
+        new = []
+        def add(symbol, length):
+            if new and new[-1][0] == symbol:
+                new[-1][1] = new[-1][1] + length
+            else:
+                new.append([symbol, length])
+        pos = start
+        placed = False
+        for symbol, length in runs[i:j]:
+            if pos < a:
+                add(symbol, min(pos + length, a) - pos)
+            if not placed and pos + length > a:
+                add(c, n)
+                placed = True
+            if pos + length > a + n:
+                add(symbol, pos + length - max(pos, a + n))
+            pos = pos + length
+        runs[i:j] = new
+        self._run, self._run_start = i, start
+
+    def read_id(self):
+        """ Returns the id of the symbol under the head """
+        return self.runs[self._seek(self.head)[0]][0]
+
+    def read(self):
+        """ Returns the symbol under the head """
+        return self.symbol(self.read_id())
+
+    def write(self, symbol):
+        """ Writes symbol under the head """
+        self._replace(self.head, 1, self._symbol_id(symbol))
+
+    def move(self, direction):
+        """
+        Moves the head one cell (direction is -1 or +1), growing the tape in
+        the same way as TuringMachine._move_tape
+        """
+        self.fill(self.read_id(), 1, direction)
+
+    def run_length(self, direction, c):
+        """
+        Returns how many steps a state that reads the symbol under the head,
+        writes c, moves in direction and stays in the same state makes before
+        it reads anything else, or None if it would never stop
+        """
+        i, start = self._seek(self.head)
+        symbol, length = self.runs[i]
+        if direction > 0:
+            if i == len(self.runs) - 1 and symbol == 0:
+                #Blank up to the end of the tape, then blank forever
+                return None
+            return start + length - self.head
+        if i == 0:
+            if self.bidirectional and symbol == 0:
+                return None
+            if not self.bidirectional and symbol == c:
+                #The head stops on the first cell and keeps reading c
+                return None
+        return self.head - start + 1
+
+    def fill(self, c, n, direction):
+        """
+        Has the same effect as n steps that each write c under the head and
+        move the head in direction
+        """
+        h = self.head
+        if direction > 0:
+            #Special case furthest right entry, as in _move_tape
+            if h + n + 1 > self.length:
+                self._append_run(0, h + n + 1 - self.length)
+            self._replace(h, n, c)
+            self.head = h + n
+            return
+        if h + 2 > self.length:
+            self._append_run(0, h + 2 - self.length)
+        if n > h and self.bidirectional:
+            #Every step off the first cell adds a new blank cell
+            self._prepend_run(0, n - h)
+            h = n
+        if n > h:
+            self._replace(0, h + 1, c)
+            self.head = 0
+        else:
+            self._replace(h - n + 1, n, c)
+            self.head = h - n
+
+    def tolist(self):
+        """ Returns the tape as a list of symbols """
+        symbols = self.alphabet.symbols + self.unknown
+        return [symbols[c] for c, length in self.runs for i in range(length)]
+
+    def __len__(self):
+        return self.length
+
+    def __iter__(self):
+        return iter(self.tolist())
+
+    def _index(self, i):
+        """ Internal method for checking a list index """
+        if i < 0:
+            i = i + self.length
+        if i < 0 or i >= self.length:
+            raise IndexError("Tape index out of range")
+        return i
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return self.tolist()[i]
+        run, start = self._seek(self._index(i))
+        return self.symbol(self.runs[run][0])
+
+    def __setitem__(self, i, symbol):
+        self._replace(self._index(i), 1, self._symbol_id(symbol))
+
+    def insert(self, i, symbol):
+        """ Only inserting in front of the first cell is supported """
+        if i != 0:
+            raise IndexError("Tape can only be inserted into at the front")
+        self._prepend_run(self._symbol_id(symbol), 1)
+
+    def append(self, symbol):
+        self._append_run(self._symbol_id(symbol), 1)
+
+    def clear(self):
+        self.runs = []
+        self.length = 0
+        self.head = 0
+        self._run = 0
+        self._run_start = 0
+
+    def __eq__(self, other):
+        if isinstance(other, (Tape, RunLengthTape)):
+            other = other.tolist()
+        return self.tolist() == other
+
+    def __repr__(self):
+        return "RunLengthTape({})".format(self.runs)
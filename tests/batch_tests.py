@@ -0,0 +1,63 @@
+import pytest
+import sys
+import random
+sys.path.append('.')
+
+numpy = pytest.importorskip("numpy")
+from turingmachine import Direction, State, TuringMachine
+from batch import BatchMachine
+import runtm
+from helpers import all_words, random_machine, serial
+
+@pytest.mark.parametrize("file,alphabet,n", [
+    ('examples/palin.txt', 'abc', 5),
+    ('examples/parity.txt', '01', 8),
+    ('examples/bword.txt', '01#', 5),
+])
+def test_examples(file, alphabet, n):
+    tm = runtm._read_file(file, max_loops=1000)
+    words = list(all_words(alphabet, n))
+    assert BatchMachine(tm.compile()).run(words, 1000) == serial(tm, words)
+
+@pytest.mark.parametrize("bidirectional", [False, True])
+def test_random_machines(bidirectional):
+    rng = random.Random(1)
+    words = list(all_words('ab', 4))
+    for i in range(100):
+        q0, qa, qr = random_machine(rng, 4, 'ab_', defined=0.9)
+        tm = TuringMachine("", qa, qr, q0, max_loops=50,
+            bidirectional=bidirectional)
+        try:
+            expected = serial(tm, words)
+        except KeyError as e:
+            with pytest.raises(KeyError) as error:
+                BatchMachine(tm.compile()).run(words, 50, bidirectional)
+            assert error.value.args == e.args
+            continue
+        assert BatchMachine(tm.compile()).run(words, 50, bidirectional) == expected
+
+def test_max_loops():
+    q0, qa, qr = State(name='q0'), State(name='qa'), State(name='qr')
+    q0.create_transition('a', q0, 'a', Direction.RIGHT)
+    q0.create_transition('_', qa, '_', Direction.LEFT)
+    batch = BatchMachine(TuringMachine("", qa, qr, q0).compile())
+    #'aaa' takes 4 steps, which needs max_loops of 3
+    assert batch.run(['aaa', 'aa'], 3) == [True, True]
+    assert batch.run(['aaa', 'aa'], 2) == [False, True]
+
+def test_unknown_symbol():
+    tm = runtm._read_file('examples/parity.txt')
+    with pytest.raises(KeyError) as error:
+        BatchMachine(tm.compile()).run(['01', '0x1', 'y'])
+    assert error.value.args == ('x',)
+
+def test_empty():
+    tm = runtm._read_file('examples/parity.txt')
+    assert BatchMachine(tm.compile()).run([]) == []
+    assert BatchMachine(tm.compile()).run(['']) == serial(tm, [''])
+
+def test_run_words_batched():
+    tm = runtm._read_file('examples/palin.txt')
+    words = list(all_words('abc', 3))
+    assert list(runtm._run_words_batched(tm, words, 7)) == \
+        list(zip(words, serial(tm, words)))
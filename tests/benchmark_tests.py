@@ -0,0 +1,38 @@
+import pytest
+import sys
+import random
+sys.path.append('.')
+
+import benchmark
+import runtm
+
+def test_words_are_accepted():
+    """ The structured workloads give words the machines accept """
+    for name in ('palin', 'bword', 'logic', 'input'):
+        file, make_word = benchmark.WORKLOADS[name]
+        tm = runtm._read_file(file)
+        rng = random.Random(1)
+        for n in (4, 9, 16, 64):
+            tm.new_tape(make_word(rng, n))
+            assert tm.begin()
+
+def test_run_all():
+    results = benchmark.run_all(['palin', 'parity'], [4, 8], 3, repeat=1)
+    assert sorted(results) == ['palin/interpreted/4', 'palin/interpreted/8',
+        'parity/interpreted/4', 'parity/interpreted/8']
+    for r in results.values():
+        assert r["words"] == 3
+        assert r["steps"] > 0
+        assert r["steps_per_sec"] > 0
+        assert r["peak_memory"] > 0
+    assert "palin/interpreted/8" in benchmark.report(results)
+
+def test_compare():
+    baseline = {"a": {"words_per_sec": 100, "steps_per_sec": 1000},
+        "b": {"words_per_sec": 100, "steps_per_sec": 1000}}
+    results = {"a": {"words_per_sec": 90, "steps_per_sec": 900},
+        "b": {"words_per_sec": 50, "steps_per_sec": 1000},
+        "c": {"words_per_sec": 1, "steps_per_sec": 1}}
+    regressions = benchmark.compare(results, baseline, 0.2)
+    assert len(regressions) == 1
+    assert regressions[0].startswith("b words_per_sec")
@@ -0,0 +1,81 @@
+import pytest
+import sys
+import random
+sys.path.append('.')
+
+import bulk
+
+BB2 = '1RB1LB_1LA1RZ'
+
+def test_busy_beaver():
+    stats = bulk.run(BB2, bidirectional=True)
+    assert (stats.accepted, stats.steps) == (1, 6)
+    #Without room on the left it halts sooner
+    assert bulk.run(BB2).steps == 4
+
+def test_parse_machine():
+    assert bulk.parse_machine('1RZ---_0LY0RA') == [
+        [(2, 1, 1), None], [(3, 0, -1), (0, 0, 1)], None, None]
+    for text in ('', '1RZ_0L', '2RZ0RZ', '1XZ1RZ', '1RC1RZ'):
+        with pytest.raises(bulk.InvalidMachine):
+            bulk.parse_machine(text)
+
+def test_canonical():
+    assert bulk.canonical('1RC0LZ_1LA1LA_0RB---') == '1RB0LZ_0RC---_1LA1LA'
+    #The unreachable state B is dropped
+    assert bulk.canonical('1RA0LZ_1LB1LB') == '1RA0LZ'
+
+def _random_machine(rng, n, k):
+    names = [chr(ord('A') + i) for i in range(n)] + ['Z', 'Y']
+    return '_'.join("".join('---' if rng.random() < 0.1 else
+        str(rng.randrange(k)) + rng.choice('RL') + rng.choice(names)
+        for c in range(k)) for state in range(n))
+
+@pytest.mark.parametrize("bidirectional", [False, True])
+def test_matches_turingmachine(bidirectional):
+    rng = random.Random(4)
+    for i in range(300):
+        text = _random_machine(rng, rng.randint(1, 4), 3)
+        words = ["".join(rng.choice('012') for j in range(rng.randint(0, 5)))
+            for w in range(5)]
+        stats = bulk.run(text, words, 40, bidirectional)
+        tm = bulk.to_turingmachine(text, max_loops=40, bidirectional=bidirectional)
+        counts = [0, 0, 0, 0]
+        steps = []
+        for word in words:
+            tm.new_tape(word)
+            try:
+                if tm.begin():
+                    counts[0] = counts[0] + 1
+                elif tm.current_state == tm.reject_state:
+                    counts[1] = counts[1] + 1
+                else:
+                    counts[3] = counts[3] + 1
+            except KeyError:
+                counts[2] = counts[2] + 1
+            steps.append(tm.steps_taken())
+        assert counts == [stats.accepted, stats.rejected, stats.undefined,
+            stats.unfinished]
+        assert [sum(steps), max(steps)] == [stats.steps, stats.most_steps]
+        assert bulk.run(bulk.canonical(text), words, 40, bidirectional).as_dict() \
+            == stats.as_dict()
+
+def test_undefined_steps():
+    #The step that finds no transition is counted, as by TuringMachine
+    stats = bulk.run('1RY0RA---', ['2'])
+    assert stats.undefined == 1
+    assert stats.steps == 1
+
+def test_search():
+    lines = ['# comment\n', BB2 + '\n', '1RA1LA_1LB1RZ\n', '1RB1LB_1LA1RZ 3\n',
+        '1RC1LC_0LB0LB_1LA1RZ\n', '\n', 'nonsense\n']
+    results = list(bulk.search(lines, ['', '1'], 10, True))
+    assert [(number, error) for number, text, stats, error in results] == [
+        (2, None), (3, None), (4, None), (5, "duplicate of line 2"),
+        (7, "Invalid machine! nonsense")]
+    assert results[1][2].unfinished == 2
+    #Its own max loops of 3 stop it before it halts on the blank tape
+    assert results[2][2].unfinished == 1
+    parallel = list(bulk.search(lines, ['', '1'], 10, True, jobs=2, chunksize=1))
+    assert [bulk._format_jsonl(*r) for r in parallel] == \
+        [bulk._format_jsonl(*r) for r in results]
@@ -0,0 +1,55 @@
+import pytest
+import sys
+sys.path.append('.')
+
+from turingmachine import Direction, State, TuringMachine
+from cache import ResultCache, machine_fingerprint
+import runtm
+
+def test_fingerprint_stable():
+    a = runtm._read_file('examples/palin.txt')
+    b = runtm._read_file('examples/palin.txt')
+    assert machine_fingerprint(a) == machine_fingerprint(b)
+
+def test_fingerprint_ignores_names():
+    def machine(names):
+        q0, q1, qa, qr = [State() for name in names]
+        q0.create_transition('a', q1, 'a', Direction.RIGHT)
+        q1.create_transition('_', qa, '_', Direction.LEFT)
+        return TuringMachine('', qa, qr, q0)
+    assert machine_fingerprint(machine('abcd')) == machine_fingerprint(machine('wxyz'))
+
+def test_fingerprint_differs():
+    palin = runtm._read_file('examples/palin.txt')
+    parity = runtm._read_file('examples/parity.txt')
+    short = runtm._read_file('examples/palin.txt', max_loops=10)
+    assert machine_fingerprint(palin) != machine_fingerprint(parity)
+    assert machine_fingerprint(palin) != machine_fingerprint(short)
+
+def test_lru():
+    tm = runtm._read_file('examples/palin.txt')
+    cache = ResultCache(tm, size=2)
+    assert cache.run('aba')
+    assert not cache.run('ab')
+    assert 'aba' in cache
+    cache.run('a')
+    assert 'ab' not in cache
+    with pytest.raises(KeyError):
+        cache['ab']
+
+def test_disk(tmpdir):
+    path = str(tmpdir.join('results.db'))
+    tm = runtm._read_file('examples/palin.txt')
+    with ResultCache(tm, path=path) as cache:
+        cache.run('aba')
+        cache.run('ab')
+        cache['loops'] = None
+    tm = runtm._read_file('examples/palin.txt')
+    with ResultCache(tm, size=0, path=path) as cache:
+        assert cache['aba'] is True
+        assert cache['ab'] is False
+        assert cache['loops'] is None
+    #A different machine does not see these results
+    tm = runtm._read_file('examples/parity.txt')
+    with ResultCache(tm, path=path) as cache:
+        assert 'aba' not in cache
@@ -0,0 +1,73 @@
+import pytest
+import sys
+sys.path.append('.')
+
+import checkpoint
+import runtm
+
+WORD = '01#1#11'
+
+def finish(tm):
+    res = tm.begin()
+    return res, tm.MAX_LOOPS, list(tm.tape), tm.tape_position
+
+@pytest.mark.parametrize("engine", ["interpreted", "compiled", "runlength"])
+def test_slices_match_begin(engine):
+    tm = runtm._read_file('examples/bword.txt', engine)
+    tm.new_tape(WORD)
+    expected = finish(tm)
+    tm.new_tape(WORD)
+    slices = 0
+    finished = False
+    while not finished:
+        finished, res = checkpoint.run_slice(tm, 7)
+        slices = slices + 1
+    assert slices > 1
+    assert (res, tm.MAX_LOOPS, list(tm.tape), tm.tape_position) == expected
+
+def test_out_of_loops():
+    tm = runtm._read_file('examples/parity.txt', max_loops=10)
+    tm.new_tape('0' * 20)
+    assert checkpoint.run_slice(tm, 5) == (False, None)
+    assert checkpoint.run_slice(tm, 5) == (False, None)
+    assert checkpoint.run_slice(tm, 5) == (True, False)
+    assert tm.MAX_LOOPS == -1
+
+def test_resume_in_new_machine(tmpdir):
+    path = str(tmpdir.join('run.tmck'))
+    tm = runtm._read_file('examples/bword.txt', 'compiled')
+    tm.new_tape(WORD)
+    expected = finish(tm)
+    tm.new_tape(WORD)
+    checkpoint.run_slice(tm, 10)
+    checkpoint.save(tm, path, WORD)
+    #As if after a restart
+    resumed = runtm._read_file('examples/bword.txt')
+    checkpoint.load(resumed, path, WORD)
+    assert resumed.MAX_LOOPS == tm.MAX_LOOPS
+    assert finish(resumed) == expected
+
+def test_invalid(tmpdir):
+    path = str(tmpdir.join('run.tmck'))
+    tm = runtm._read_file('examples/bword.txt')
+    tm.new_tape(WORD)
+    checkpoint.run_slice(tm, 10)
+    checkpoint.save(tm, path, WORD)
+    with pytest.raises(checkpoint.InvalidCheckpoint):
+        checkpoint.load(tm, path, '0#0#0')
+    with pytest.raises(checkpoint.InvalidCheckpoint):
+        checkpoint.load(runtm._read_file('examples/palin.txt'), path)
+    with open(path, 'r+b') as f:
+        f.seek(-1, 2)
+        f.write(b'\xff')
+    with pytest.raises(checkpoint.InvalidCheckpoint):
+        checkpoint.load(tm, path)
+
+def test_run_removes_checkpoint(tmpdir):
+    path = str(tmpdir.join('run.tmck'))
+    tm = runtm._read_file('examples/bword.txt')
+    tm.new_tape(WORD)
+    expected = tm.begin()
+    tm.new_tape(WORD)
+    assert checkpoint.run(tm, path, 5, WORD) == expected
+    assert not tmpdir.join('run.tmck').exists()
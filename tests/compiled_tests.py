@@ -0,0 +1,82 @@
+import pytest
+import sys
+sys.path.append('.')
+
+from turingmachine import Transition, Direction, State, TuringMachine
+import runtm
+from helpers import all_words
+
+def check_same_as_interpreted(file, alphabet, max_length):
+    interpreted = runtm._read_file(file)
+    compiled = runtm._read_file(file, "compiled")
+    #Some words never halt so keep the budget small
+    interpreted._update_max_loops(1000)
+    compiled._update_max_loops(1000)
+    for word in all_words(alphabet, max_length):
+        interpreted.new_tape(word)
+        compiled.new_tape(word)
+        assert compiled.begin() == interpreted.begin()
+        assert compiled.tape == interpreted.tape
+        assert compiled.tape_position == interpreted.tape_position
+        assert compiled.reject() == interpreted.reject()
+        assert compiled.MAX_LOOPS == interpreted.MAX_LOOPS
+
+def test_palin_matches_interpreted():
+    check_same_as_interpreted('examples/palin.txt', 'abc', 5)
+
+def test_parity_matches_interpreted():
+    check_same_as_interpreted('examples/parity.txt', '01', 7)
+
+def test_bword_matches_interpreted():
+    check_same_as_interpreted('examples/bword.txt', '01#', 5)
+
+def test_logic_spec():
+    tm = runtm._read_file('examples/logic.txt', "compiled")
+    tm.new_tape('$1|1=1')
+    assert tm.begin()
+    tm.new_tape('$0^1=1')
+    assert tm.begin()
+
+def test_invalid_alphabet():
+    tm = runtm._read_file('examples/palin.txt', "compiled")
+    tm.new_tape('ad')
+    with pytest.raises(KeyError):
+        tm.begin()
+    #The configuration is left exactly where the interpreter would stop
+    interpreted = runtm._read_file('examples/palin.txt')
+    interpreted.new_tape('ad')
+    with pytest.raises(KeyError):
+        interpreted.begin()
+    assert tm.tape == interpreted.tape
+    assert tm.tape_position == interpreted.tape_position
+    assert tm.MAX_LOOPS == interpreted.MAX_LOOPS
+
+@pytest.mark.parametrize("word", ["", "a", "aa"])
+def test_missing_transition_on_last_blank(word):
+    #The tape is not left with a second blank at the end
+    q0 = State()
+    qa = State()
+    qr = State()
+    q0.create_transition('a', q0, 'b', Direction.RIGHT)
+    for engine in ("interpreted", "compiled"):
+        tm = TuringMachine(word, qa, qr, q0, engine=engine)
+        with pytest.raises(KeyError):
+            tm.begin()
+        assert tm.tape == ['b'] * len(word) + ['_']
+        assert tm.tape_position == len(word)
+        assert tm.MAX_LOOPS == tm._reset_loops - len(word) - 1
+
+def test_max_loops():
+    q0 = State()
+    qa = State()
+    qr = State()
+    q0.create_transition('_', q0, '_', Direction.LEFT)
+    tm = TuringMachine('', qa, qr, q0, max_loops=10, engine="compiled")
+    assert tm.begin() is False
+    assert tm.MAX_LOOPS == -1
+
+def test_invalid_engine():
+    s1 = State()
+    s2 = State()
+    with pytest.raises(ValueError):
+        TuringMachine('', s1, s2, s1, engine="fast")
@@ -0,0 +1,69 @@
+import pytest
+import sys
+import random
+sys.path.append('.')
+
+import complexity
+import runtm
+
+def test_input_alphabet():
+    assert complexity.input_alphabet('examples/palin.txt') == ['a', 'b', 'c']
+    assert complexity.input_alphabet('examples/palin2.txt') == ['a', 'b', 'c']
+    assert complexity.input_alphabet('examples/third_last.txt') == ['a', 'b']
+
+def test_words_of_length():
+    rng = random.Random(1)
+    assert complexity.words_of_length(['0', '1'], 2, 10, rng) == \
+        ['00', '01', '10', '11']
+    words = complexity.words_of_length(['0', '1'], 8, 10, rng)
+    assert len(words) == 10
+    assert words[:2] == ['00000000', '11111111']
+    assert all(len(word) == 8 for word in words)
+
+@pytest.mark.parametrize("model,curve", [
+    ("1", lambda n: 7),
+    ("n", lambda n: 5 * n + 1),
+    ("n log n", lambda n: 3 * n * complexity.math.log2(n + 1) + 2),
+    ("n^2", lambda n: 2 * n * n + 3),
+    ("2^n", lambda n: 2 ** n + 10),
+])
+def test_fit(model, curve):
+    lengths = [1, 2, 4, 8, 16, 32]
+    if model == "2^n":
+        lengths = [1, 2, 3, 4, 5, 6, 7, 8]
+    name, a, c, error = complexity.fit([(n, curve(n)) for n in lengths])
+    assert name == model
+    assert error < 0.01
+    assert abs(complexity.predict(name, a, c, 64) - curve(64)) < 0.01 * curve(64)
+
+def test_profile():
+    results = complexity.profile('examples/parity.txt', [1, 4, 16], samples=50)
+    assert [r["worst_steps"] for r in results] == [3, 6, 18]
+    assert [r["exhaustive"] for r in results] == [True, True, False]
+    assert all(len(r["steps_witness"]) == r["length"] for r in results)
+    assert "grow like n (about 2 + 1 * n" in complexity.report(results)
+
+def test_quadratic():
+    results = complexity.profile('examples/palin.txt', [2, 4, 8, 16, 32],
+        samples=50)
+    steps, cells = complexity._fits(results)
+    assert steps[0] == "n^2"
+    assert cells[0] == "n"
+
+def test_out_of_loops():
+    results = complexity.profile('examples/palin.txt', [2, 16], max_loops=50)
+    assert results[0]["unfinished"] == 0
+    assert results[1]["unfinished"] > 0
+    report = complexity.report(results)
+    assert "not fitted" in report
+    assert "Too few finished lengths" in report
+
+def test_several_tapes():
+    tm = runtm._read_file('examples/palin2.txt', "compiled", max_loops=1000)
+    steps, cells, finished = complexity.measure(tm, 'abba')
+    assert finished
+    assert cells == sum(len(tape) for tape in tm.tapes) > len(tm.tape)
+
+def test_nondeterministic():
+    with pytest.raises(ValueError):
+        complexity.profile('examples/third_last.txt', [1, 2])
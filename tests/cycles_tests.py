@@ -0,0 +1,86 @@
+import pytest
+import sys
+import random
+sys.path.append('.')
+
+from turingmachine import Direction, State, TuringMachine
+import runtm
+
+def create_bouncer():
+    """ Moves right and left between two cells forever """
+    q0 = State()
+    q1 = State()
+    qa = State()
+    qr = State()
+    q0.create_transition('a', q1, 'a', Direction.RIGHT)
+    q1.create_transition('a', q0, 'a', Direction.LEFT)
+    q0.create_transition('_', qa, '_', Direction.RIGHT)
+    return q0, qa, qr
+
+def test_detects_loop_early():
+    q0, qa, qr = create_bouncer()
+    tm = TuringMachine('aa', qa, qr, q0, detect_cycles=True)
+    assert tm.begin() is None
+    #Brent's method finds it long before the budget runs out
+    assert tm.MAX_LOOPS > 100000 - 10
+
+def test_halting_unaffected():
+    q0, qa, qr = create_bouncer()
+    tm = TuringMachine('_', qa, qr, q0, detect_cycles=True)
+    assert tm.begin()
+
+def test_left_edge_loop():
+    """ Stuck writing on the first cell while moving left """
+    q0 = State()
+    qa = State()
+    qr = State()
+    q0.create_transition('a', q0, 'a', Direction.LEFT)
+    tm = TuringMachine('aaaa', qa, qr, q0, detect_cycles=True)
+    assert tm.begin() is None
+
+def test_growing_tape_is_not_a_loop():
+    """ Moving right forever never repeats a configuration """
+    q0 = State()
+    qa = State()
+    qr = State()
+    q0.create_transition('_', q0, 'a', Direction.RIGHT)
+    tm = TuringMachine('', qa, qr, q0, max_loops=1000, detect_cycles=True)
+    assert tm.begin() is False
+    assert tm.MAX_LOOPS == -1
+
+def test_examples_agree_with_plain_run():
+    for file, word in [('examples/palin.txt', 'abcba'),
+            ('examples/parity.txt', '10010'), ('examples/bword.txt', '01#1#11'),
+            ('examples/logic.txt', '$1|1=1')]:
+        plain = runtm._read_file(file)
+        detect = runtm._read_file(file, detect_cycles=True)
+        plain.new_tape(word)
+        detect.new_tape(word)
+        assert detect.begin() == plain.begin()
+        assert detect.tape == plain.tape
+        assert detect.MAX_LOOPS == plain.MAX_LOOPS
+
+@pytest.mark.parametrize("bidirectional", [False, True])
+def test_random_machines(bidirectional):
+    """ A found loop must really run out of budget, anything else agrees """
+    rng = random.Random(5)
+    for i in range(300):
+        states = [State() for j in range(3)]
+        qa = State()
+        qr = State()
+        for state in states:
+            for c in '_ab':
+                state.create_transition(c, rng.choice(states + [qa, qr]),
+                    rng.choice('_ab'), rng.choice(list(Direction)))
+        word = "".join(rng.choice('_ab') for j in range(rng.randrange(5)))
+        plain = TuringMachine(word, qa, qr, states[0], max_loops=2000,
+            bidirectional=bidirectional)
+        detect = TuringMachine(word, qa, qr, states[0], max_loops=2000,
+            bidirectional=bidirectional, detect_cycles=True)
+        res = detect.begin()
+        if res is None:
+            assert plain.begin() is False
+            assert plain.MAX_LOOPS == -1
+        else:
+            assert res == plain.begin()
+            assert detect.tape == plain.tape
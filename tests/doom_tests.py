@@ -0,0 +1,100 @@
+import pytest
+import sys
+import itertools
+sys.path.append('.')
+
+from turingmachine import Direction, State, Status, TuringMachine
+import runtm
+
+def _results(tm, words):
+    results = []
+    for word in words:
+        tm.new_tape(word)
+        try:
+            results.append((tm.begin(), tm.steps_taken()))
+        except KeyError:
+            results.append(('KeyError', tm.steps_taken()))
+    return results
+
+def _trap():
+    #On a b, q0 goes to q1 which bounces between two cells forever
+    q0, q1, q2, qa, qr = [State(name=n) for n in ('q0', 'q1', 'q2', 'qa', 'qr')]
+    q0.create_transition('a', q0, 'a', Direction.RIGHT)
+    q0.create_transition('_', qa, '_', Direction.RIGHT)
+    q0.create_transition('b', q1, 'b', Direction.RIGHT)
+    for c in 'ab_':
+        q1.create_transition(c, q2, c, Direction.RIGHT)
+        q2.create_transition(c, q1, c, Direction.LEFT)
+    return q0, q1, q2, qa, qr
+
+@pytest.mark.parametrize("engine", TuringMachine.ENGINES)
+def test_hopeless(engine):
+    q0, q1, q2, qa, qr = _trap()
+    tm = TuringMachine("", qa, qr, q0, max_loops=1000, engine=engine)
+    words = ["".join(w) for k in range(4) for w in itertools.product('ab', repeat=k)]
+    expected = _results(tm, words)
+    report = tm.doom()
+    assert report.hopeless == {q1, q2}
+    assert report.redirected == 1
+    assert q0.transitions['b'].new_state == qr
+    for (res, steps), (doomed, doomed_steps) in zip(expected, _results(tm, words)):
+        assert res == doomed
+        assert doomed_steps <= steps
+    tm.new_tape('ab')
+    assert not tm.begin()
+    assert tm.steps_taken() == 2
+
+def test_missing_transition_is_not_hopeless():
+    q0, q1, q2, qa, qr = _trap()
+    del q2.transitions['b']
+    tm = TuringMachine("", qa, qr, q0)
+    report = tm.doom()
+    assert report.hopeless == set()
+    tm.new_tape('bbb')
+    with pytest.raises(KeyError):
+        tm.begin()
+
+def test_hopeless_start():
+    q0, q1, q2, qa, qr = _trap()
+    tm = TuringMachine("", qa, qr, q1, engine="compiled")
+    tm.doom()
+    tm.new_tape('ab')
+    assert tm.status() == Status.REJECTED
+    assert not tm.begin()
+    assert tm.steps_taken() == 0
+
+@pytest.mark.parametrize("engine", TuringMachine.ENGINES)
+def test_runaway(engine):
+    q0, q1, qa, qr = [State(name=n) for n in ('q0', 'q1', 'qa', 'qr')]
+    #Accepts a word of a's, but goes right forever after a b
+    q0.create_transition('a', q0, 'a', Direction.RIGHT)
+    q0.create_transition('b', q1, 'b', Direction.RIGHT)
+    q0.create_transition('_', qa, '_', Direction.RIGHT)
+    q1.create_transition('a', q1, 'a', Direction.RIGHT)
+    q1.create_transition('b', q0, 'b', Direction.RIGHT)
+    q1.create_transition('_', q1, '_', Direction.RIGHT)
+    tm = TuringMachine("", qa, qr, q0, max_loops=1000, engine=engine)
+    words = ["".join(w) for k in range(5) for w in itertools.product('ab', repeat=k)]
+    expected = _results(tm, words)
+    report = tm.doom()
+    assert report.hopeless == set()
+    assert report.runaway == {q1}
+    for (res, steps), (doomed, doomed_steps) in zip(expected, _results(tm, words)):
+        assert res == doomed
+        assert doomed_steps <= steps
+    if engine in ("interpreted", "compiled"):
+        tm.new_tape('aba')
+        assert not tm.begin()
+        assert tm.steps_taken() == 3
+        assert list(tm.tape) == ['a', 'b', 'a', '_']
+
+@pytest.mark.parametrize("engine", ["interpreted", "compiled"])
+def test_examples(engine):
+    words = ["".join(w) for k in range(4) for w in itertools.product('01#', repeat=k)]
+    tm = runtm._read_file('examples/bword.txt', engine, max_loops=2000)
+    expected = [res for res, steps in _results(tm, words)]
+    tm = runtm._read_file('examples/bword.txt', engine, max_loops=2000, doom=True)
+    assert tm.doomed.runaway
+    results = _results(tm, words)
+    assert [res for res, steps in results] == expected
+    assert sum(steps for res, steps in results) < 2000
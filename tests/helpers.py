@@ -0,0 +1,46 @@
+"""
+Helpers shared by the tests comparing engines against the interpreter
+"""
+
+import itertools
+import sys
+sys.path.append('.')
+
+from turingmachine import Direction, State
+
+def all_words(alphabet, max_length):
+    """ Every word over alphabet of up to max_length symbols """
+    for n in range(max_length + 1):
+        for word in itertools.product(alphabet, repeat=n):
+            yield "".join(word)
+
+def serial(tm, words):
+    """ The result of running each of words on tm in turn """
+    results = []
+    for word in words:
+        tm.new_tape(word)
+        results.append(tm.begin())
+    return results
+
+def random_machine(rng, n, symbols, defined=1.0, stay=0.0):
+    """
+    Returns the start, accept and reject states of a random machine with n
+    other states over symbols. Each transition is only made with probability
+    defined, so some symbols raise KeyError, and goes back to its own state
+    with probability stay, so there are plenty of sweeps
+    """
+    states = [State(name='q{}'.format(i)) for i in range(n)]
+    qa = State(name='qa')
+    qr = State(name='qr')
+    targets = states + [qa, qr]
+    for state in states:
+        for c in symbols:
+            if rng.random() >= defined:
+                continue
+            if stay and rng.random() < stay:
+                new_state = state
+            else:
+                new_state = rng.choice(targets)
+            state.create_transition(c, new_state, rng.choice(symbols),
+                rng.choice(list(Direction)))
+    return states[0], qa, qr
@@ -0,0 +1,93 @@
+import pytest
+import sys
+sys.path.append('.')
+
+import lazyload
+import runtm
+from helpers import all_words
+
+@pytest.mark.parametrize("file, alphabet, max_length", [
+    ('examples/palin.txt', 'abc', 5),
+    ('examples/bword.txt', '01#', 5),
+    ('examples/logic.txt', '01|&=$', 3),
+])
+def test_examples_match(file, alphabet, max_length):
+    eager = runtm._read_file(file, max_loops=1000)
+    lazy = runtm._read_file(file, max_loops=1000, lazy=True)
+    for word in all_words(alphabet, max_length):
+        eager.new_tape(word)
+        lazy.new_tape(word)
+        assert lazy.begin() == eager.begin()
+        assert lazy.MAX_LOOPS == eager.MAX_LOOPS
+
+@pytest.mark.parametrize("options", [{"engine": "compiled"},
+    {"engine": "runlength"}, {"engine": "macro"}, {"doom": True},
+    {"minimise": True}, {"engine": "compiled", "doom": True}])
+def test_other_engines_match(options):
+    eager = runtm._read_file('examples/palin.txt', max_loops=1000)
+    lazy = runtm._read_file('examples/palin.txt', max_loops=1000, lazy=True,
+        **options)
+    for word in all_words('abc', 5):
+        eager.new_tape(word)
+        lazy.new_tape(word)
+        assert lazy.begin() == eager.begin()
+
+def test_state_without_lines(tmpdir):
+    #q1 has no lines, so like the eager parser reading a raises KeyError
+    path = str(tmpdir.join('tm.txt'))
+    with open(path, 'w') as f:
+        f.write("states 4\nq0\nq1\nqa +\nqr -\nalphabet 1 a\nq0 a q1 a R\n")
+    tm, loader = lazyload.load(path)
+    tm.new_tape('aa')
+    with pytest.raises(KeyError):
+        tm.begin()
+
+def test_only_entered_states_are_parsed():
+    tm, loader = lazyload.load('examples/bword.txt')
+    assert loader.loaded() == 0
+    tm.new_tape('')
+    tm.begin()
+    assert 0 < loader.loaded() < len(loader.names)
+    loader.close()
+
+MACHINE = """states 4
+q0
+q1
+qa +
+qr -
+alphabet 1 a
+q0 a q1 a R
+q1 a q0 a R
+q0 _ qa _ R
+q1 _ qr _ R
+"""
+
+def test_lines_not_in_order(tmpdir):
+    path = str(tmpdir.join('tm.txt'))
+    with open(path, 'w') as f:
+        f.write(MACHINE)
+    tm, loader = lazyload.load(path)
+    assert isinstance(loader.index['q0'], list)
+    for word, res in [('', True), ('a', False), ('aa', True)]:
+        tm.new_tape(word)
+        assert tm.begin() == res
+
+def test_index_file(tmpdir, monkeypatch):
+    path = str(tmpdir.join('tm.txt'))
+    index = str(tmpdir.join('tm.index'))
+    with open(path, 'w') as f:
+        f.write(MACHINE)
+    first = lazyload.Loader(path, index).index
+    assert tmpdir.join('tm.index').exists()
+    #A saved index is used as is while the file is unchanged
+    def build_index(self):
+        raise AssertionError("Index built again")
+    monkeypatch.setattr(lazyload.Loader, '_build_index', build_index)
+    assert lazyload.Loader(path, index).index == first
+
+def test_invalid_line(tmpdir):
+    path = str(tmpdir.join('tm.txt'))
+    with open(path, 'w') as f:
+        f.write(MACHINE + "q9 a q0 a R\n")
+    with pytest.raises(runtm.InvalidInputFormat):
+        lazyload.load(path)
@@ -0,0 +1,54 @@
+import pytest
+import sys
+import random
+sys.path.append('.')
+
+from turingmachine import TuringMachine
+import runtm
+from helpers import all_words, random_machine
+
+def run(tm, word):
+    tm.new_tape(word)
+    try:
+        return tm.begin()
+    except KeyError as e:
+        return e.args
+
+@pytest.mark.parametrize("file, alphabet, max_length", [
+    ('examples/palin.txt', 'abc', 5),
+    ('examples/logic.txt', '01|&=$', 4),
+    ('examples/bword.txt', '01#', 5),
+])
+@pytest.mark.parametrize("k", [2, 5, 32])
+def test_examples_match_interpreted(file, alphabet, max_length, k):
+    interpreted = runtm._read_file(file, max_loops=1000)
+    macro = runtm._read_file(file, "macro", max_loops=1000, macro_steps=k)
+    for word in all_words(alphabet, max_length):
+        assert run(macro, word) == run(interpreted, word)
+        assert macro.tape == interpreted.tape
+        assert macro.tape_position == interpreted.tape_position
+        assert macro.MAX_LOOPS == interpreted.MAX_LOOPS
+
+@pytest.mark.parametrize("bidirectional", [False, True])
+def test_random_machines_match_interpreted(bidirectional):
+    rng = random.Random(7)
+    for i in range(300):
+        #Leave some transitions out so KeyError is raised mid macro step
+        q0, qa, qr = random_machine(rng, 4, '_ab', defined=0.95)
+        word = "".join(rng.choice('_ab') for j in range(rng.randrange(12)))
+        max_loops = rng.randrange(100)
+        interpreted = TuringMachine(word, qa, qr, q0, max_loops=max_loops,
+            bidirectional=bidirectional)
+        macro = TuringMachine(word, qa, qr, q0, max_loops=max_loops,
+            engine="macro", bidirectional=bidirectional, macro_steps=3)
+        assert run(macro, word) == run(interpreted, word)
+        assert macro.tape == interpreted.tape
+        assert macro.tape_position == interpreted.tape_position
+        assert macro.MAX_LOOPS == interpreted.MAX_LOOPS
+
+def test_macros_are_reused():
+    tm = runtm._read_file('examples/parity.txt', "macro", macro_steps=4)
+    tm.new_tape('0' * 100)
+    assert tm.begin()
+    #Every window in the middle of a run of 0s is the same
+    assert sum(len(cache) for cache in tm._compiled.macros[4]) < 10
@@ -0,0 +1,86 @@
+import pytest
+import sys
+import itertools
+sys.path.append('.')
+
+from turingmachine import Direction, State, TuringMachine
+import runtm
+
+def _results(tm, words):
+    results = []
+    for word in words:
+        tm.new_tape(word)
+        results.append(tm.begin())
+    return results
+
+def test_unreachable():
+    q0, q1, qa, qr = [State(name=n) for n in ('q0', 'q1', 'qa', 'qr')]
+    q0.create_transition('a', qa, 'a', Direction.RIGHT)
+    q0.create_transition('_', qr, '_', Direction.RIGHT)
+    q1.create_transition('a', q0, 'a', Direction.RIGHT)
+    tm = TuringMachine("", qa, qr, q0)
+    report = tm.minimise([q0, q1, qa, qr])
+    assert report.unreachable == 1
+    assert q1.transitions == {}
+    assert report.states_after == 3
+    assert tm.minimisation is report
+
+def test_merge():
+    #q1 and q2 both skip a's and accept on the blank
+    q0, q1, q2, qa, qr = [State(name=n) for n in ('q0', 'q1', 'q2', 'qa', 'qr')]
+    q0.create_transition('a', q1, 'a', Direction.RIGHT)
+    q0.create_transition('b', q2, 'b', Direction.RIGHT)
+    for q in (q1, q2):
+        q.create_transition('a', q, 'a', Direction.RIGHT)
+        q.create_transition('_', qa, '_', Direction.LEFT)
+    tm = TuringMachine("", qa, qr, q0)
+    words = ["".join(w) for k in range(5) for w in itertools.product('ab', repeat=k)]
+    expected = [True if w and w[0] in 'ab' and 'b' not in w[1:] else 'KeyError'
+        for w in words]
+    report = tm.minimise()
+    assert report.merged == 1
+    assert q0.transitions['b'].new_state == q1
+    for word, res in zip(words, expected):
+        tm.new_tape(word)
+        if res == 'KeyError':
+            with pytest.raises(KeyError):
+                tm.begin()
+        else:
+            assert tm.begin() == res
+
+def test_short_circuit():
+    q0, q1, qa, qr = [State(name=n) for n in ('q0', 'q1', 'qa', 'qr')]
+    q0.create_transition('a', q0, 'a', Direction.RIGHT)
+    q0.create_transition('_', q1, '_', Direction.LEFT)
+    for c in 'a_':
+        q1.create_transition(c, qa, c, Direction.RIGHT)
+    tm = TuringMachine("aa", qa, qr, q0)
+    tm.new_tape("aa")
+    assert tm.begin()
+    steps = tm._reset_loops - tm.MAX_LOOPS
+    report = tm.minimise()
+    assert report.short_circuited == 1
+    assert report.states_after == 2
+    tm.new_tape("aa")
+    assert tm.begin()
+    assert tm._reset_loops - tm.MAX_LOOPS == steps - 1
+
+@pytest.mark.parametrize("file,alphabet,n", [
+    ('examples/palin.txt', 'abc', 5),
+    ('examples/logic.txt', '01|&=$', 4),
+    ('examples/bword.txt', '01#', 5),
+])
+def test_examples_unchanged(file, alphabet, n):
+    words = ["".join(w) for k in range(n + 1)
+        for w in itertools.product(alphabet, repeat=k)]
+    tm = runtm._read_file(file, 'compiled', max_loops=1000)
+    minimised = runtm._read_file(file, 'compiled', minimise=True, max_loops=1000)
+    assert minimised.minimisation.states_after <= \
+        minimised.minimisation.states_before
+    assert _results(minimised, words) == _results(tm, words)
+
+def test_precompiled(tmpdir):
+    path = str(tmpdir.join('logic.tmpc'))
+    for i in range(2):
+        tm = runtm._load_machine('examples/logic.txt', path, minimise=True)
+        assert tm.minimisation.merged == 2
@@ -0,0 +1,58 @@
+import pytest
+import sys
+import io
+import itertools
+sys.path.append('.')
+
+from turingmachine import State
+from multitape import MultiTapeMachine, MultiTransition
+import multitape
+import runtm
+
+def test_palindromes_match_one_tape():
+    one = runtm._read_file('examples/palin.txt', max_loops=10000)
+    two = runtm._read_file('examples/palin2.txt')
+    assert two.k == 2
+    for n in range(6):
+        for word in itertools.product('abc', repeat=n):
+            word = "".join(word)
+            one.new_tape(word)
+            two.new_tape(word)
+            assert two.begin() == one.begin()
+
+def test_linear_steps():
+    two = runtm._read_file('examples/palin2.txt')
+    word = 'abc' * 100 + 'cba' * 100
+    two.new_tape(word)
+    assert two.begin()
+    assert two._reset_loops - two.MAX_LOOPS <= 3 * len(word) + 4
+
+def test_tapes():
+    q0, qa, qr = State(), State(), State()
+    #Copy the word onto the second tape
+    for c in 'ab':
+        q0.add_transition((c, '_'), MultiTransition(q0, (c, c), (1, 1)))
+    q0.add_transition(('_', '_'), MultiTransition(qa, ('_', '_'), (-1, 0)))
+    tm = MultiTapeMachine(2, 'abba', qa, qr, q0)
+    assert tm.begin()
+    assert tm.tapes[0] == ['a', 'b', 'b', 'a', '_', '_']
+    assert tm.tapes[1] == ['a', 'b', 'b', 'a', '_', '_']
+    assert tm.tape_positions() == [3, 4]
+    tm.new_tape('abc')
+    with pytest.raises(KeyError) as error:
+        tm.begin()
+    assert error.value.args == (('c', '_'),)
+    assert tm.MAX_LOOPS == 100000 - 3
+
+def test_stay_and_clamp():
+    q0, q1, qa, qr = State(), State(), State(), State()
+    q0.add_transition(('a', '_'), MultiTransition(q1, ('b', 'x'), (-1, 0)))
+    q1.add_transition(('b', 'x'), MultiTransition(qa, ('b', 'x'), (0, 0)))
+    tm = MultiTapeMachine(2, 'a', qa, qr, q0)
+    assert tm.begin()
+    assert tm.tape_positions() == [0, 0]
+
+def test_invalid_transition():
+    f = io.StringIO("states 2\nq0\nqa +\nalphabet 1 a\nq0 a,_ qa a R,R\n")
+    with pytest.raises(runtm.InvalidInputFormat):
+        multitape.read(f, 2)
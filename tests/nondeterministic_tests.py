@@ -0,0 +1,83 @@
+import pytest
+import sys
+import io
+import random
+sys.path.append('.')
+
+from turingmachine import Direction, State, Transition, TuringMachine
+from nondeterministic import NondeterministicMachine
+import runtm
+from helpers import all_words, random_machine
+
+def test_third_last():
+    tm = runtm._read_file('examples/third_last.txt')
+    for word in all_words('ab', 8):
+        tm.new_tape(word)
+        assert tm.begin() == (len(word) >= 3 and word[-3] == 'a')
+    #Every branch is on the same cell, so few configurations are kept
+    tm.new_tape('a' * 47 + 'bbb')
+    assert not tm.begin()
+    assert tm.configurations < 4 * 52
+
+def test_same_choices_are_merged():
+    q0, qa, qr = State(), State(), State()
+    q0.transitions['a'] = [Transition(q0, 'a', Direction.RIGHT)] * 2
+    tm = NondeterministicMachine('aaaa', qa, qr, q0)
+    assert not tm.begin()
+    assert tm.configurations == 5
+
+def test_max_configurations():
+    q0, qa, qr = State(), State(), State()
+    #Every step doubles the number of different tapes
+    q0.transitions['_'] = [Transition(q0, c, Direction.RIGHT) for c in 'xy']
+    tm = NondeterministicMachine('', qa, qr, q0, max_loops=100,
+        max_configurations=64)
+    #Giving up is not a rejection
+    assert tm.begin() is None
+    assert tm.steps == 7
+    assert runtm._format_result(tm.begin()) == "Loops"
+
+def to_nondeterministic(q0, qa, qr, **options):
+    """ The same machine with each transition as the only choice """
+    found = [q0]
+    for state in found:
+        for character, t in list(state.transitions.items()):
+            if isinstance(t, list):
+                continue
+            state.transitions[character] = [t]
+            if t.new_state not in found:
+                found.append(t.new_state)
+    return NondeterministicMachine('', qa, qr, q0, **options)
+
+@pytest.mark.parametrize("bidirectional", [False, True])
+def test_deterministic_machines_match(bidirectional):
+    rng = random.Random(3)
+    for i in range(200):
+        q0, qa, qr = random_machine(rng, 4, '_ab', defined=0.9)
+        words = list(all_words('ab', 3))
+        deterministic = TuringMachine('', qa, qr, q0, max_loops=40,
+            bidirectional=bidirectional)
+        expected = []
+        for word in words:
+            deterministic.new_tape(word)
+            try:
+                expected.append(deterministic.begin())
+            except KeyError:
+                #A branch with no transition just dies
+                expected.append(False)
+        tm = to_nondeterministic(q0, qa, qr, max_loops=40,
+            bidirectional=bidirectional)
+        for word, res in zip(words, expected):
+            tm.new_tape(word)
+            assert tm.begin() == res
+
+def test_duplicate_lines_are_choices(tmp_path):
+    path = tmp_path / "choice.txt"
+    path.write_text("nondeterministic\nstates 3\nq0\nqa +\nqr -\n"
+        "alphabet 1 a\nq0 a qr a R\nq0 a qa a R\n")
+    tm = runtm._read_file(str(path))
+    assert isinstance(tm, NondeterministicMachine)
+    tm.new_tape('a')
+    assert tm.begin()
+    tm.new_tape('')
+    assert not tm.begin()
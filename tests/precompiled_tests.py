@@ -0,0 +1,59 @@
+import pytest
+import sys
+import itertools
+sys.path.append('.')
+
+import precompiled
+import runtm
+
+def test_round_trip(tmpdir):
+    path = str(tmpdir.join('palin.tmpc'))
+    tm = runtm._read_file('examples/palin.txt')
+    precompiled.save(tm, path)
+    loaded = precompiled.load(path)
+    for n in range(5):
+        for word in itertools.product('abc', repeat=n):
+            word = "".join(word)
+            tm.new_tape(word)
+            loaded.new_tape(word)
+            assert loaded.begin() == tm.begin()
+
+def test_options_passed_on(tmpdir):
+    path = str(tmpdir.join('palin.tmpc'))
+    precompiled.save(runtm._read_file('examples/palin.txt'), path)
+    tm = precompiled.load(path, engine="compiled", max_loops=5)
+    assert tm.engine == "compiled"
+    assert tm.MAX_LOOPS == 5
+
+def test_stale_and_corrupt(tmpdir):
+    path = str(tmpdir.join('palin.tmpc'))
+    source = precompiled.digest('examples/palin.txt')
+    precompiled.save(runtm._read_file('examples/palin.txt'), path, source)
+    precompiled.load(path, source)
+    with pytest.raises(precompiled.InvalidPrecompiledFile):
+        precompiled.load(path, precompiled.digest('examples/parity.txt'))
+    with open(path, 'rb') as f:
+        data = bytearray(f.read())
+    data[-1] = data[-1] ^ 1
+    with open(path, 'wb') as f:
+        f.write(data)
+    with pytest.raises(precompiled.InvalidPrecompiledFile):
+        precompiled.load(path)
+    with open(path, 'wb') as f:
+        f.write(b'states 2\n')
+    with pytest.raises(precompiled.InvalidPrecompiledFile):
+        precompiled.load(path)
+
+def test_load_machine_refreshes(tmpdir):
+    source = tmpdir.join('machine.txt')
+    path = str(tmpdir.join('machine.tmpc'))
+    source.write(open('examples/palin.txt').read())
+    tm = runtm._load_machine(str(source), path)
+    tm.new_tape('aba')
+    assert tm.begin()
+    #Changing the source means the binary file is rebuilt
+    source.write(open('examples/parity.txt').read())
+    tm = runtm._load_machine(str(source), path)
+    tm.new_tape('11100')
+    assert not tm.begin()
+    assert precompiled.load(path, precompiled.digest(str(source)))
@@ -0,0 +1,67 @@
+import pytest
+import sys
+import json
+sys.path.append('.')
+
+from turingmachine import Direction, State, TuringMachine
+import runtm
+
+def test_counts():
+    q0 = State(name='q0')
+    qa = State(name='qa')
+    qr = State(name='qr')
+    q0.create_transition('a', q0, 'a', Direction.RIGHT)
+    q0.create_transition('_', qa, '_', Direction.LEFT)
+    tm = TuringMachine('aaa', qa, qr, q0)
+    profile = tm.enable_profiling()
+    assert tm.begin()
+    assert profile.steps == 4
+    assert profile.reversals == 1
+    assert profile.states() == [('q0', 4)]
+    assert profile.transitions() == [('q0', 'a', 'q0', 'a', 'R', 3),
+        ('q0', '_', 'qa', '_', 'L', 1)]
+    assert profile.runs == 1
+    assert profile.longest_runs[0]["extent"] == [(1, 4), (2, 4), (4, 5)]
+
+def test_results_unchanged():
+    plain = runtm._read_file('examples/bword.txt')
+    profiled = runtm._read_file('examples/bword.txt')
+    profile = profiled.enable_profiling()
+    for word in ['0#0#0', '01#1#11', '1#1#01', '1#1#1']:
+        plain.new_tape(word)
+        profiled.new_tape(word)
+        assert profiled.begin() == plain.begin()
+        assert profiled.MAX_LOOPS == plain.MAX_LOOPS
+    assert profile.steps == sum(run["steps"] for run in profile.longest_runs)
+    assert profile.runs == 4
+    assert sum(n for name, n in profile.states()) == profile.steps
+
+def test_reports():
+    tm = runtm._read_file('examples/logic.txt')
+    profile = tm.enable_profiling()
+    tm.new_tape('$1|1=1')
+    tm.begin()
+    assert profile.report().startswith("Steps: 11 over 1 runs")
+    data = json.loads(json.dumps(profile.as_dict()))
+    assert data["steps"] == 11
+    assert data["transitions"][0]["hits"] >= data["transitions"][-1]["hits"]
+
+def test_keeps_longest_runs():
+    tm = runtm._read_file('examples/parity.txt')
+    profile = tm.enable_profiling()
+    profile.keep = 3
+    for n in [5, 1, 9, 2, 7, 3]:
+        tm.new_tape('0' * n)
+        tm.begin()
+    assert profile.runs == 6
+    assert [run["steps"] for run in profile.longest_runs] == [10, 8, 6]
+    assert profile.max_length() == 11
+    assert json.loads(json.dumps(profile.as_dict()))["runs"] == 6
+
+def test_disable():
+    tm = runtm._read_file('examples/palin.txt')
+    profile = tm.enable_profiling()
+    tm.profile = None
+    tm.new_tape('aba')
+    assert tm.begin()
+    assert profile.steps == 0
@@ -0,0 +1,73 @@
+import pytest
+import sys
+import random
+sys.path.append('.')
+
+from turingmachine import Direction, State, TuringMachine
+from tape import Alphabet, RunLengthTape
+import runtm
+from helpers import all_words, random_machine
+
+def test_runs_merge():
+    tape = RunLengthTape(Alphabet('_'), 'aaabbb_')
+    assert tape.runs == [[1, 3], [2, 3], [0, 1]]
+    tape[3] = 'a'
+    assert tape.runs == [[1, 4], [2, 2], [0, 1]]
+    tape[4] = 'c'
+    assert tape == ['a', 'a', 'a', 'a', 'c', 'b', '_']
+    tape[4] = 'b'
+    assert tape.runs == [[1, 4], [2, 2], [0, 1]]
+
+def test_fill():
+    tape = RunLengthTape(Alphabet('_'), 'aaaa_')
+    assert tape.run_length(1, 'b') == 4
+    tape.fill(1, 4, 1)
+    assert tape.head == 4
+    assert tape.run_length(1, 1) is None
+    tape.fill(1, 3, 1)
+    assert tape == ['a'] * 7 + ['_']
+    tape.fill(0, 100, -1)
+    assert tape.head == 0
+    #The first step was on the last cell so the tape grew by one
+    assert tape == ['_'] * 9
+
+def test_long_sweep_is_cheap():
+    tm = runtm._read_file('examples/parity.txt', "runlength")
+    tm._update_max_loops(10 ** 12)
+    tm.new_tape('0' * 10 ** 6)
+    assert tm.begin()
+    assert tm.MAX_LOOPS == 10 ** 12 - 10 ** 6 - 1
+    assert len(tm.tape.runs) <= 2
+
+@pytest.mark.parametrize("file, alphabet, max_length", [
+    ('examples/palin.txt', 'abc', 5),
+    ('examples/parity.txt', '01', 7),
+    ('examples/bword.txt', '01#', 5),
+])
+def test_examples_match_interpreted(file, alphabet, max_length):
+    interpreted = runtm._read_file(file)
+    runlength = runtm._read_file(file, "runlength")
+    interpreted._update_max_loops(1000)
+    runlength._update_max_loops(1000)
+    for word in all_words(alphabet, max_length):
+        interpreted.new_tape(word)
+        runlength.new_tape(word)
+        assert runlength.begin() == interpreted.begin()
+        assert runlength.tape == interpreted.tape
+        assert runlength.tape_position == interpreted.tape_position
+        assert runlength.MAX_LOOPS == interpreted.MAX_LOOPS
+
+@pytest.mark.parametrize("bidirectional", [False, True])
+def test_random_machines_match_interpreted(bidirectional):
+    rng = random.Random(4)
+    for i in range(200):
+        q0, qa, qr = random_machine(rng, 3, '_ab', stay=0.5)
+        word = "".join(rng.choice('_ab') for j in range(rng.randrange(6)))
+        interpreted = TuringMachine(word, qa, qr, q0, max_loops=200,
+            bidirectional=bidirectional)
+        runlength = TuringMachine(word, qa, qr, q0, max_loops=200,
+            engine="runlength", bidirectional=bidirectional)
+        assert runlength.begin() == interpreted.begin()
+        assert runlength.tape == interpreted.tape
+        assert runlength.tape_position == interpreted.tape_position
+        assert runlength.MAX_LOOPS == interpreted.MAX_LOOPS
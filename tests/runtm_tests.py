@@ -0,0 +1,150 @@
+import pytest
+import sys
+import itertools
+import io
+import json
+import multiprocessing
+import subprocess
+import threading
+import queue
+import time
+sys.path.append('.')
+
+import runtm
+
+def words():
+    for n in range(7):
+        for word in itertools.product('01', repeat=n):
+            yield "".join(word)
+
+def test_run_words():
+    tm = runtm._read_file('examples/parity.txt')
+    results = list(runtm._run_words(tm, ['1', '11100']))
+    assert results == [('1', True), ('11100', False)]
+
+def test_parallel_matches_serial():
+    tm = runtm._read_file('examples/parity.txt')
+    serial = list(runtm._run_words(tm, words()))
+    parallel = list(runtm._run_words_parallel('examples/parity.txt', words(),
+        3, chunksize=4))
+    assert parallel == serial
+
+def test_cached_matches_serial():
+    tm = runtm._read_file('examples/parity.txt')
+    repeated = list(words()) * 3
+    serial = list(runtm._run_words(tm, repeated))
+    cache = runtm.ResultCache(tm)
+    ran = []
+    def run_words(words):
+        ran.extend(words)
+        return runtm._run_words(tm, words)
+    cached = list(runtm._run_words_cached(cache, repeated, run_words, 50))
+    assert cached == serial
+    #Every distinct word was only run once
+    assert sorted(ran) == sorted(set(repeated))
+
+def test_cached_stream_uses_one_pool(tmp_path, monkeypatch, capsys):
+    path = tmp_path / "words.txt"
+    path.write_text("".join(word + "\n" for word in words()))
+    pools = []
+    Pool = multiprocessing.Pool
+    def pool(*args):
+        pools.append(args)
+        return Pool(*args)
+    monkeypatch.setattr(runtm.multiprocessing, "Pool", pool)
+    #Blocks of one word, as a slow stream on stdin would give
+    monkeypatch.setattr(runtm._run_words_cached, "__defaults__", (1,))
+    monkeypatch.setattr(sys, "argv", ['runtm.py', '-i',
+        'examples/parity.txt', '-w', str(path), '--cache', '-j', '2'])
+    runtm.parse()
+    tm = runtm._read_file('examples/parity.txt')
+    expected = "".join("{}, {}\n".format(word, res)
+        for word, res in runtm._run_words(tm, words()))
+    assert capsys.readouterr().out == expected
+    assert len(pools) == 1
+
+def test_write_results_text():
+    out = io.StringIO()
+    runtm._write_results([('1', True), ('', None)], out, batch_size=1)
+    assert out.getvalue() == "1, True\n, Loops\n"
+
+def test_write_results_jsonl():
+    out = io.StringIO()
+    runtm._write_results([('1', True), ('11100', False), ('0', None)], out,
+        runtm.FORMATS["jsonl"])
+    lines = [json.loads(line) for line in out.getvalue().splitlines()]
+    assert lines == [{"word": "1", "result": True},
+        {"word": "11100", "result": False}, {"word": "0", "result": None}]
+
+def test_words_from_stdin():
+    res = subprocess.run([sys.executable, 'runtm.py', '-i',
+        'examples/parity.txt', '-w', '-', '-f', 'jsonl'], input="1\n11100\n",
+        stdout=subprocess.PIPE, universal_newlines=True, check=True)
+    assert res.stdout == '{"word": "1", "result": true}\n' \
+        '{"word": "11100", "result": false}\n'
+
+@pytest.mark.parametrize("options", [[], ["--cache"], ["-j", "2"],
+    ["-t", "16"], ["-b", "16"]])
+def test_answers_over_pipe(options):
+    #Each word gets its answer before the next is sent, as a producer
+    #waiting on the answers would do
+    if "-b" in options:
+        pytest.importorskip("numpy")
+    process = subprocess.Popen([sys.executable, 'runtm.py', '-i',
+        'examples/palin.txt', '-w', '-'] + options, stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE, universal_newlines=True)
+    lines = queue.Queue()
+    def read():
+        for line in process.stdout:
+            lines.put(line)
+    threading.Thread(target=read, daemon=True).start()
+    try:
+        for word, res in (('abba', True), ('abc', False), ('abba', True)):
+            process.stdin.write(word + "\n")
+            process.stdin.flush()
+            assert lines.get(timeout=30) == "{}, {}\n".format(word, res)
+    finally:
+        process.stdin.close()
+        process.wait(timeout=30)
+    assert lines.empty()
+
+def test_word_stream_blocks():
+    stream = runtm._WordStream(io.StringIO("a\nb\nc\n"))
+    #Wait until every word has been read
+    while stream._queue.qsize() < 4:
+        time.sleep(0.01)
+    assert list(runtm._blocks(stream, 2)) == [['a', 'b'], ['c']]
+
+def test_symbols_shared_with_alphabet():
+    f = io.StringIO("q0 ab q1 cd R\nq1 cd q0 ab L\n")
+    states = {'q0': runtm.State(), 'q1': runtm.State()}
+    alphabet = runtm._parse_alphabet("alphabet 2 ab cd")
+    runtm._parse_transitions(f, alphabet, states)
+    symbols = {symbol: symbol for symbol in alphabet}
+    for state in states.values():
+        for character, t in state.transitions.items():
+            assert character is symbols[character]
+            assert t.output_letter is symbols[t.output_letter]
+
+@pytest.mark.parametrize("options", [["-e", "compiled"], ["--detect-cycles"],
+    ["-m"], ["--doom"], ["--lazy"], ["--cache"], ["-p", "machine.tmpc"],
+    ["--profile", "profile.txt"], ["-b", "16"], ["-t", "16"],
+    ["--checkpoint", "run.ckpt"], ["--trace", "run.trace"]])
+@pytest.mark.parametrize("file,kind", [
+    ('examples/palin2.txt', "machines with several tapes"),
+    ('examples/third_last.txt', "nondeterministic machines")])
+def test_one_tape_options_rejected(file, kind, options):
+    res = subprocess.run([sys.executable, 'runtm.py', '-i', file, '-c', 'aba']
+        + options, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+        universal_newlines=True)
+    assert res.returncode == 2
+    assert "cannot be used with " + kind in res.stderr
+    assert "Traceback" not in res.stderr
+
+def test_profile_rejected_with_detect_cycles():
+    res = subprocess.run([sys.executable, 'runtm.py', '-i',
+        'examples/parity.txt', '-c', '1', '--detect-cycles', '--profile',
+        'profile.txt'], stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+        universal_newlines=True)
+    assert res.returncode == 2
+    assert "--profile cannot be used with --detect-cycles" in res.stderr
@@ -0,0 +1,131 @@
+import pytest
+import sys
+import asyncio
+import json
+import os
+import shutil
+sys.path.append('.')
+
+import service
+from service import Service
+import runtm
+
+async def _request(port, *requests):
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    for request in requests:
+        writer.write((json.dumps(request) + "\n").encode())
+    await writer.drain()
+    responses = []
+    done = 0
+    while done < len(requests):
+        response = json.loads(await reader.readline())
+        responses.append(response)
+        if response.get("done") or "word" not in response:
+            done = done + 1
+    writer.close()
+    return responses
+
+def _serve(test, **options):
+    """ Runs test(port) against a running service """
+    async def main():
+        service = Service(jobs=2, batch_size=3, max_pending=2, **options)
+        server = await service.start()
+        try:
+            return await test(server.sockets[0].getsockname()[1])
+        finally:
+            server.close()
+            await server.wait_closed()
+            service.close()
+    return asyncio.run(main())
+
+def test_results_match():
+    words = ['abba', 'abc', '', 'a', 'aca', 'ab', 'cc', 'abcba']
+    tm = runtm._read_file('examples/palin.txt')
+    expected = []
+    for word in words:
+        tm.new_tape(word)
+        expected.append({"id": 1, "word": word, "result": tm.begin()})
+    async def test(port):
+        return await _request(port, {"id": 1, "machine": "examples/palin.txt",
+            "words": words})
+    assert _serve(test) == expected + [{"id": 1, "done": True}]
+
+def test_several_requests_and_clients():
+    async def test(port):
+        first = _request(port,
+            {"id": "a", "machine": "examples/parity.txt", "words": ['0', '00']},
+            {"id": "b", "machine": "examples/palin.txt", "words": ['aa']})
+        second = _request(port,
+            {"id": "c", "machine": "examples/parity.txt", "words": ['000'] * 10})
+        return await asyncio.gather(first, second)
+    first, second = _serve(test, engine="compiled")
+    assert [r["id"] for r in first] == ['a', 'a', 'a', 'b', 'b']
+    assert len(second) == 11
+    assert all(r["result"] == second[0]["result"] for r in second[:-1])
+
+def test_errors():
+    async def test(port):
+        return await _request(port,
+            {"id": 1, "machine": "missing.txt", "words": ['a']},
+            {"id": 2, "machine": "examples/palin.txt", "words": ['ax', 'aa']},
+            {"id": 3})
+    missing, error, accepted, done, bad = _serve(test)
+    assert missing["id"] == 1 and "error" in missing
+    assert error == {"id": 2, "word": "ax", "error": "No transition for 'x'"}
+    assert accepted == {"id": 2, "word": "aa", "result": True}
+    assert done == {"id": 2, "done": True}
+    assert bad["id"] == 3 and "error" in bad
+
+def test_unparsable_machines(tmp_path):
+    path = str(tmp_path / "bad.txt")
+    with open(path, 'w') as f:
+        f.write("states 2\nq0\nq1 +\nstart q0\nnot an alphabet\n")
+    async def test(port):
+        return await _request(port,
+            {"id": 1, "machine": path, "words": ['a']},
+            {"id": 2, "machine": 0, "words": ['a']},
+            {"id": 3, "machine": "examples/palin.txt", "words": ['aa']})
+    bad, number, accepted, done = _serve(test)
+    assert bad["id"] == 1 and "error" in bad
+    assert number["id"] == 2 and "TypeError" in number["error"]
+    assert accepted == {"id": 3, "word": "aa", "result": True}
+    assert done == {"id": 3, "done": True}
+
+def _fail(key, words):
+    raise RuntimeError("Worker failed")
+
+def test_failed_batch(monkeypatch):
+    #The workers are forked after this, so run it instead of _run_batch
+    monkeypatch.setattr(service, "_run_batch", _fail)
+    async def test(port):
+        return await _request(port,
+            {"id": 1, "machine": "examples/palin.txt", "words": ['aa'] * 5},
+            {"id": 2, "machine": "examples/palin.txt", "words": []})
+    failed, done = _serve(test)
+    assert failed == {"id": 1, "error": "RuntimeError('Worker failed')"}
+    assert done == {"id": 2, "done": True}
+
+def test_machines_parsed_in_workers():
+    service._worker_machines.clear()
+    async def test(port):
+        return await _request(port, {"id": 1, "machine": "examples/palin.txt",
+            "words": ['aa']})
+    _serve(test)
+    #The event loop's process never parses a machine
+    assert len(service._worker_machines) == 0
+
+def test_worker_machines_bounded(tmp_path, monkeypatch):
+    monkeypatch.setattr(service, "MAX_MACHINES", 2)
+    service._worker_machines.clear()
+    path = str(tmp_path / "palin.txt")
+    shutil.copy('examples/palin.txt', path)
+    for mtime in (1, 2, 3):
+        #Each edit of the file replaces its earlier version
+        os.utime(path, ns=(mtime, mtime))
+        service._machine_key(path, ())
+    assert list(service._worker_machines) == [(path, 3, ())]
+    for file in ('examples/parity.txt', 'examples/input.txt'):
+        service._machine_key(file, ())
+    assert [key[0] for key in service._worker_machines] == \
+        ['examples/parity.txt', 'examples/input.txt']
+    service._worker_machines.clear()
@@ -53,3 +53,9 @@ def test_calc():
     q1.add_transition('b', t1)
     res = q1.calc('b')
     assert res == t1
+
+def test_no_instance_dict():
+    q0 = State(name='q0')
+    assert not hasattr(q0, '__dict__')
+    with pytest.raises(AttributeError):
+        q0.colour = 'red'
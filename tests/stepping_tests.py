@@ -0,0 +1,70 @@
+import pytest
+import sys
+sys.path.append('.')
+
+from turingmachine import Direction, State, Status, TuringMachine
+import runtm
+
+@pytest.mark.parametrize("engine", TuringMachine.ENGINES)
+def test_run_in_chunks(engine):
+    whole = runtm._read_file('examples/bword.txt')
+    whole.new_tape('01#1#11')
+    assert whole.begin()
+    tm = runtm._read_file('examples/bword.txt', engine)
+    tm.new_tape('01#1#11')
+    assert tm.run(0) == Status.RUNNING
+    assert tm.steps_taken() == 0
+    assert tm.run(5) == Status.RUNNING
+    assert tm.steps_taken() == 5
+    assert tm.run() == Status.ACCEPTED
+    assert tm.steps_taken() == whole.steps_taken()
+    assert list(tm.tape) == whole.tape
+    assert tm.MAX_LOOPS == whole.MAX_LOOPS
+
+def test_rejects():
+    tm = runtm._read_file('examples/bword.txt')
+    tm.new_tape('01#1#01')
+    assert tm.run(100) == Status.REJECTED
+    tm = runtm._read_file('examples/parity.txt', max_loops=3)
+    tm.new_tape('0' * 20)
+    assert tm.run(2) == Status.RUNNING
+    #max_loops of 3 allows 4 steps
+    assert tm.run(4) == Status.REJECTED
+    assert tm.steps_taken() == 4
+
+def test_looping():
+    q0, qa, qr = State(), State(), State()
+    q0.create_transition('_', q0, '_', Direction.LEFT)
+    tm = TuringMachine('', qa, qr, q0, detect_cycles=True)
+    assert tm.run() == Status.LOOPING
+
+def test_iterate_steps():
+    tm = runtm._read_file('examples/bword.txt')
+    tm.new_tape('01#1#11')
+    assert list(tm.iterate(10)) == [10, 20, 22]
+    assert tm.status() == Status.ACCEPTED
+
+def test_iterate_configurations():
+    q0, qa, qr = State(name='q0'), State(name='qa'), State(name='qr')
+    q0.create_transition('a', q0, 'b', Direction.RIGHT)
+    q0.create_transition('_', qa, '_', Direction.LEFT)
+    tm = TuringMachine('', qa, qr, q0)
+    tm.new_tape('aa')
+    assert list(tm.iterate(configurations=True)) == [
+        (q0, 1, ['b', 'a', '_']),
+        (q0, 2, ['b', 'b', '_']),
+        (qa, 1, ['b', 'b', '_', '_'])]
+
+def test_interleave():
+    machines = []
+    for word in ['01#1#11', '0#0#0', '01#1#01']:
+        tm = runtm._read_file('examples/bword.txt', 'compiled')
+        tm.new_tape(word)
+        machines.append(tm.iterate(3))
+    finished = []
+    while machines:
+        for it in list(machines):
+            if next(it, None) == None:
+                machines.remove(it)
+                finished.append(it)
+    assert len(finished) == 3
@@ -0,0 +1,109 @@
+import pytest
+import sys
+import random
+sys.path.append('.')
+
+from turingmachine import Direction, State, TuringMachine
+import steptrace
+import runtm
+
+WORD = '01#1#11'
+
+def configurations(tm, word):
+    """ Every configuration of a run of word, from iterate """
+    tm.new_tape(word)
+    found = [(tm.current_state, tm.tape_position, list(tm.tape))]
+    found.extend(tm.iterate(configurations=True))
+    return found
+
+@pytest.mark.parametrize("every", [1, 5, 22, 1000])
+def test_replay_matches_run(tmpdir, every):
+    path = str(tmpdir.join('run.tmtr'))
+    tm = runtm._read_file('examples/bword.txt')
+    expected = configurations(tm, WORD)
+    tm.new_tape(WORD)
+    assert tm.record_trace(path, every) == tm.accept()
+    trace = steptrace.Trace(tm, path)
+    assert len(trace) == len(expected) - 1
+    #Seeking backwards and forwards in any order
+    steps = list(range(len(trace) + 1))
+    random.Random(1).shuffle(steps)
+    for n in steps + sorted(steps):
+        assert trace.configuration(n) == expected[n]
+
+def test_transition(tmpdir):
+    path = str(tmpdir.join('run.tmtr'))
+    tm = runtm._read_file('examples/parity.txt')
+    tm.new_tape('01')
+    tm.record_trace(path, 2)
+    trace = steptrace.Trace(tm, path)
+    state, symbol, new_state, output, move = trace.transition(1)
+    assert (state.name, symbol, new_state.name, output, move) == \
+        ('q1', '1', 'q4', '1', Direction.RIGHT.value)
+    with pytest.raises(IndexError):
+        trace.transition(len(trace))
+
+def test_bidirectional(tmpdir):
+    path = str(tmpdir.join('run.tmtr'))
+    q0, q1, qa, qr = State(name='q0'), State(name='q1'), State(name='qa'), State(name='qr')
+    #Walks left writing x, then turns back on an x
+    q0.create_transition('_', q0, 'x', Direction.LEFT)
+    q0.create_transition('a', q0, 'x', Direction.LEFT)
+    q0.create_transition('x', q1, 'x', Direction.RIGHT)
+    q1.create_transition('x', qa, 'x', Direction.RIGHT)
+    tm = TuringMachine('', qa, qr, q0, max_loops=50, bidirectional=True)
+    expected = configurations(tm, 'a')
+    tm.new_tape('a')
+    tm.record_trace(path, 3)
+    trace = steptrace.Trace(tm, path)
+    for n in range(len(trace), -1, -1):
+        assert trace.configuration(n) == expected[n]
+
+def test_cut_short(tmpdir):
+    path = str(tmpdir.join('run.tmtr'))
+    tm = runtm._read_file('examples/bword.txt')
+    expected = configurations(tm, WORD)
+    tm.new_tape(WORD)
+    tm.record_trace(path, 4)
+    with open(path, 'rb') as f:
+        data = f.read()
+    #Any prefix of the file replays the steps that were whole
+    for size in range(len(data) - 40, len(data), 3):
+        with open(path, 'wb') as f:
+            f.write(data[:size])
+        trace = steptrace.Trace(tm, path)
+        assert len(trace) < len(expected)
+        for n in range(len(trace) + 1):
+            assert trace.configuration(n) == expected[n]
+
+def test_missing_transition(tmpdir):
+    path = str(tmpdir.join('run.tmtr'))
+    tm = runtm._read_file('examples/parity.txt')
+    tm.new_tape('01x')
+    with pytest.raises(KeyError):
+        tm.record_trace(path, 2)
+    trace = steptrace.Trace(tm, path)
+    assert len(trace) == 2
+    assert trace.configuration(2)[1] == 2
+
+def test_invalid(tmpdir):
+    path = str(tmpdir.join('run.tmtr'))
+    tm = runtm._read_file('examples/bword.txt')
+    tm.new_tape(WORD)
+    tm.record_trace(path)
+    with pytest.raises(steptrace.InvalidTrace):
+        steptrace.Trace(runtm._read_file('examples/palin.txt'), path)
+    with open(path, 'r+b') as f:
+        f.write(b'XXXX')
+    with pytest.raises(steptrace.InvalidTrace):
+        steptrace.Trace(tm, path)
+
+def test_runtm(tmpdir, monkeypatch, capsys):
+    path = str(tmpdir.join('run.tmtr'))
+    monkeypatch.setattr(sys, 'argv', ['runtm.py', '-i', 'examples/bword.txt',
+        '-c', WORD, '--trace', path, '--trace-every', '8'])
+    res = runtm.parse()
+    tm = runtm._read_file('examples/bword.txt')
+    assert steptrace.Trace(tm, path).configuration(0)[2] == list(WORD) + ['_']
+    tm.new_tape(WORD)
+    assert res == tm.begin()
@@ -0,0 +1,108 @@
+import pytest
+import sys
+sys.path.append('.')
+
+from turingmachine import Direction, State, TuringMachine
+from tape import Alphabet, Tape
+import runtm
+
+def test_list_like():
+    tape = Tape(Alphabet('_'), 'ab_')
+    assert tape == ['a', 'b', '_']
+    assert len(tape) == 3
+    assert tape[1] == 'b'
+    assert tape[-1] == '_'
+    tape[2] = 'c'
+    tape.append('_')
+    assert tape.tolist() == ['a', 'b', 'c', '_']
+    with pytest.raises(IndexError):
+        tape[4]
+
+def test_compact_cells():
+    tape = Tape(Alphabet('_'), 'ab' * 1000)
+    assert isinstance(tape.cells, bytearray)
+    assert len(tape.cells) == 2000
+
+def test_read_write_move():
+    tape = Tape(Alphabet('_'), 'ab_')
+    assert tape.read() == 'a'
+    tape.write('c')
+    tape.move(1)
+    assert tape.read() == 'b'
+    assert tape.position == 1
+    tape.move(-1)
+    tape.move(-1)
+    #Without bidirectional the head stays on the first cell
+    assert tape.position == 0
+    assert tape == ['c', 'b', '_']
+
+def test_grows_left():
+    tape = Tape(Alphabet('_'), 'a', bidirectional=True)
+    for i in range(100):
+        tape.move(-1)
+        assert tape.position == 0
+        tape.write('b')
+    assert len(tape) == 102
+    assert tape.tolist() == ['b'] * 100 + ['a', '_']
+    #The spare space is doubled so only a few copies were made
+    assert len(tape.cells) - len(tape) < 102
+
+def create_left_walker():
+    """ Writes a's moving left forever then accepts on the 5th blank """
+    q = [State() for i in range(5)]
+    qa = State()
+    qr = State()
+    for i in range(4):
+        q[i].create_transition('_', q[i + 1], 'a', Direction.LEFT)
+    q[4].create_transition('_', qa, 'a', Direction.LEFT)
+    return q[0], qa, qr
+
+@pytest.mark.parametrize("engine", TuringMachine.ENGINES)
+def test_bidirectional_machine(engine):
+    q0, qa, qr = create_left_walker()
+    tm = TuringMachine('', qa, qr, q0, engine=engine, bidirectional=True)
+    assert tm.begin()
+    assert tm.tape == ['_', 'a', 'a', 'a', 'a', 'a', '_']
+    assert tm.tape_position == 0
+
+@pytest.mark.parametrize("engine", TuringMachine.ENGINES)
+def test_clamped_machine(engine):
+    q0, qa, qr = create_left_walker()
+    tm = TuringMachine('', qa, qr, q0, engine=engine)
+    #The head stays on the a it has just written
+    with pytest.raises(KeyError):
+        tm.begin()
+    assert tm.tape == ['a', '_']
+    assert tm.tape_position == 0
+
+def test_unknown_symbols_not_added():
+    alphabet = Alphabet('_')
+    alphabet.encode('ab')
+    tape = Tape(alphabet, 'axbyx')
+    assert len(alphabet) == 3
+    assert tape.unknown == ['x', 'y']
+    assert tape == ['a', 'x', 'b', 'y', 'x']
+    assert tape[3] == 'y'
+    tape[0] = 'y'
+    assert tape.tolist() == ['y', 'x', 'b', 'y', 'x']
+    assert len(alphabet) == 3
+
+@pytest.mark.parametrize("engine", ["compiled", "runlength", "macro"])
+def test_many_unknown_symbols(engine):
+    #Each word reads a new symbol, which raises KeyError without growing the
+    #machine's alphabet or its cells
+    tm = runtm._read_file('examples/palin.txt', engine)
+    alphabet = tm.compile().alphabet
+    size = len(alphabet)
+    for i in range(300):
+        word = 'a' + chr(0x4e00 + i)
+        tm.new_tape(word)
+        with pytest.raises(KeyError) as error:
+            tm.begin()
+        assert error.value.args == (word[1],)
+    assert tm._compiled.alphabet is alphabet
+    assert len(alphabet) == size
+    tm.new_tape('abba')
+    assert tm.begin()
+    if engine != "runlength":
+        assert isinstance(tm.tape.cells, bytearray)
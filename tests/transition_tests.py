@@ -18,3 +18,7 @@ def test_malformed_creation():
         t2 = Transition(state, None, Direction.RIGHT)
     with pytest.raises(ValueError):
         t3 = Transition(state, 'a', 'c')
+
+def test_no_instance_dict():
+    t = Transition(state, 'a', Direction.RIGHT)
+    assert not hasattr(t, '__dict__')
@@ -0,0 +1,82 @@
+import pytest
+import sys
+import random
+sys.path.append('.')
+
+from turingmachine import Direction, State, TuringMachine
+from wordtrie import TrieMachine
+import runtm
+from helpers import all_words, random_machine, serial
+
+def _steps(tm, words):
+    steps = 0
+    for word in words:
+        tm.new_tape(word)
+        tm.begin()
+        steps = steps + tm.steps_taken()
+    return steps
+
+@pytest.mark.parametrize("file,alphabet,n", [
+    ('examples/palin.txt', 'abc', 5),
+    ('examples/parity.txt', '01', 8),
+    ('examples/bword.txt', '01#', 5),
+])
+def test_examples(file, alphabet, n):
+    tm = runtm._read_file(file, max_loops=1000)
+    words = list(all_words(alphabet, n))
+    #Shuffled and repeated words are put back in order
+    random.Random(2).shuffle(words)
+    words = words + words[:10]
+    assert TrieMachine(tm.compile()).run(words, 1000) == serial(tm, words)
+
+def test_shared_steps():
+    tm = runtm._read_file('examples/parity.txt')
+    words = ['01' * 100 + w for w in all_words('01', 4)]
+    trie = TrieMachine(tm.compile())
+    assert trie.run(words) == serial(tm, words)
+    #The scan of the common prefix is only run once
+    assert trie.steps < 250 + 2 * len(words) * 5
+    assert _steps(tm, words) > 200 * len(words)
+
+@pytest.mark.parametrize("bidirectional", [False, True])
+def test_random_machines(bidirectional):
+    rng = random.Random(1)
+    words = list(all_words('ab', 4))
+    for i in range(100):
+        q0, qa, qr = random_machine(rng, 4, 'ab_', defined=0.9)
+        tm = TuringMachine("", qa, qr, q0, max_loops=50,
+            bidirectional=bidirectional)
+        try:
+            expected = serial(tm, words)
+        except KeyError as e:
+            with pytest.raises(KeyError) as error:
+                TrieMachine(tm.compile()).run(words, 50, bidirectional)
+            assert error.value.args == e.args
+            continue
+        assert TrieMachine(tm.compile()).run(words, 50, bidirectional) == expected
+
+def test_max_loops():
+    q0, qa, qr = State(name='q0'), State(name='qa'), State(name='qr')
+    q0.create_transition('a', q0, 'a', Direction.RIGHT)
+    q0.create_transition('_', qa, '_', Direction.LEFT)
+    trie = TrieMachine(TuringMachine("", qa, qr, q0).compile())
+    #'aaa' takes 4 steps, which needs max_loops of 3
+    assert trie.run(['aaa', 'aa'], 3) == [True, True]
+    assert trie.run(['aaa', 'aa'], 2) == [False, True]
+
+def test_unknown_symbol():
+    tm = runtm._read_file('examples/parity.txt')
+    with pytest.raises(KeyError) as error:
+        TrieMachine(tm.compile()).run(['01', '0x1', 'y'])
+    assert error.value.args == ('x',)
+
+def test_empty():
+    tm = runtm._read_file('examples/parity.txt')
+    assert TrieMachine(tm.compile()).run([]) == []
+    assert TrieMachine(tm.compile()).run(['']) == serial(tm, [''])
+
+def test_run_words_trie():
+    tm = runtm._read_file('examples/palin.txt')
+    words = list(all_words('abc', 3))
+    assert list(runtm._run_words_trie(tm, words, 7)) == \
+        list(zip(words, serial(tm, words)))
@@ -5,6 +5,11 @@ This file manages the Turing Machine, its states and its transitions
 """
 
 from enum import Enum, unique
+from compiled import CompiledMachine
+from profiler import Profile
+from minimise import minimise
+from doom import doom
+import steptrace
 
 @unique
 class Direction(Enum):
@@ -19,20 +24,37 @@ class Direction(Enum):
             return Direction.LEFT
         return None
 
+@unique
+class Status(Enum):
+    """ Where a computation has got to, see TuringMachine.run """
+    RUNNING = 0
+    ACCEPTED = 1
+    REJECTED = 2
+    #Found to loop forever when detect_cycles is set
+    LOOPING = 3
+
 class State():
     """
     Manages each individual state, for example q0, q1, qr and qa are all states
     given in the practical specification
     """
-    #This is a dictionary containing the transition class and indexed
-    #by the character which causes that transition
-    transitions = None
+    #transitions is a dictionary containing the transition class and indexed
+    #by the character which causes that transition.
+    #name is the name given in the input file, eg q0. Only used for reporting.
+    #Slots rather than a __dict__ per instance keep large machines small
+    __slots__ = ("transitions", "name")
 
-    def __init__(self, transitions=None):
+    def __init__(self, transitions=None, name=None):
         if transitions == None:
             self.transitions = {}
         else:
             self.transitions = transitions
+        self.name = name
+
+    def __repr__(self):
+        if self.name == None:
+            return object.__repr__(self)
+        return "State({})".format(self.name)
 
     def create_transition(self, character, new_state, output, direction):
         """ Creates a new transition to this State """
@@ -63,9 +85,7 @@ class Transition():
     Here we only need to store the new state, the output character and the
     movement direction
     """
-    new_state = None
-    output_letter = None
-    movement_direction = None
+    __slots__ = ("new_state", "output_letter", "movement_direction")
 
     def __init__(self, new_state, output_letter, movement_direction):
         """
@@ -73,7 +93,7 @@ class Transition():
         eg q0 a R is potentially valid, but
         None, None, Q is not valid
         """
-        if new_state == None or type(new_state) is not State:
+        if new_state == None or not isinstance(new_state, State):
             raise ValueError("New state must be a State!")
         self.new_state = new_state
 
@@ -105,9 +125,29 @@ class TuringMachine():
     current_state = None
     EMPTY_SYMBOL = None
     MAX_LOOPS = None
+    #If True moving left off the first cell adds a new blank cell instead
+    #of leaving the head where it is
+    bidirectional = False
+    #If True begin() returns None as soon as the machine repeats a whole
+    #configuration, as it must then loop forever
+    detect_cycles = False
+    #A Profile collecting statistics about every run, see enable_profiling
+    profile = None
+    #The Minimisation returned by the last call to minimise
+    minimisation = None
+    #The Doom found by the last call to doom, runs it dooms are rejected
+    doomed = None
+    #Either "interpreted" (walks the State objects), "compiled" (runs
+    #integer tables built by compile()) or "runlength" (runs the same tables
+    #on a run-length encoded tape, crossing runs of a symbol in one step)
+    #or "macro" (runs the same tables up to macro_steps steps per lookup)
+    engine = "interpreted"
+    ENGINES = ("interpreted", "compiled", "runlength", "macro")
+    macro_steps = 32
     #The following should only be used internally
     _start_state = None
     _reset_loops = None
+    _compiled = None
 
     def new_tape(self, tape):
         """ Updates the tape to allow experimentation with the TM """
@@ -138,7 +178,7 @@ class TuringMachine():
 
     def _test_state(state):
         """ Internal method for testing potential States """
-        if type(state) is not State:
+        if not isinstance(state, State):
             raise ValueError("States should be a state!")
 
     def _update_current_state(self, current_state):
@@ -176,7 +216,8 @@ class TuringMachine():
         self._start_state = start_state
 
     def __init__(self, tape, accept, reject, current_state, empty_symbol="_",
-                max_loops=100000):
+                max_loops=100000, engine="interpreted", bidirectional=False,
+                detect_cycles=False, macro_steps=32):
         """
         Creates us a Turing machine with a specific tape, accept state,
         reject state and current_state in this instance acts as the inital
@@ -189,6 +230,61 @@ class TuringMachine():
         self._update_current_state(current_state)
         self._update_start_state(current_state)
         self._update_max_loops(max_loops)
+        self._update_engine(engine)
+        self.bidirectional = bidirectional
+        self.detect_cycles = detect_cycles
+        assert macro_steps >= 1
+        self.macro_steps = macro_steps
+
+    def _update_engine(self, engine):
+        """ Internal method for selecting how begin() runs the machine """
+        if engine not in TuringMachine.ENGINES:
+            raise ValueError("Engine must be one of {}".format(TuringMachine.ENGINES))
+        self.engine = engine
+
+    def compile(self):
+        """
+        Builds the integer tables used by the compiled engine.
+        This is done automatically on the first compiled begin() but must be
+        called again if states or transitions are changed after that.
+        """
+        self._compiled = CompiledMachine(self._start_state, self.accept_state,
+            self.reject_state, self.EMPTY_SYMBOL)
+        return self._compiled
+
+    def enable_profiling(self):
+        """
+        Starts counting the steps of every run into a new Profile, which is
+        returned. Profiling runs on the compiled tables whatever the engine
+        and, if set, instead of detecting cycles. Set profile to None to stop.
+        """
+        self.profile = Profile(self.compile())
+        return self.profile
+
+    def minimise(self, states=()):
+        """
+        Shrinks the State graph in place, see minimise.minimise. states are
+        all the states the machine was built from, so unreachable ones can be
+        counted and dropped. Returns the Minimisation
+        """
+        self.minimisation = minimise(self, states)
+        return self.minimisation
+
+    def record_trace(self, path, every=65536):
+        """
+        Runs the machine like begin() while recording every step to a trace
+        file at path, with a keyframe of the tape every every steps. Open it
+        with steptrace.Trace to replay any step
+        """
+        return steptrace.record(self, path, every)
+
+    def doom(self):
+        """
+        Finds where the machine can no longer accept, see doom.doom, so runs
+        are rejected as soon as they get there. Returns the Doom
+        """
+        self.doomed = doom(self)
+        return self.doomed
 
     def _update_max_loops(self, n):
         assert n >= 0
@@ -210,6 +306,9 @@ class TuringMachine():
         else:
             if self.tape_position > 0:
                 self.tape_position = self.tape_position - 1
+            elif self.bidirectional:
+                #Grow the tape, the head is then on the new first cell
+                self.tape.insert(0, self.EMPTY_SYMBOL)
 
     def _read(self, symbol):
         """ Compute the result after the next symbol """
@@ -228,11 +327,87 @@ class TuringMachine():
         return self.accept_state == self.current_state
 
     def reject(self):
-        """ Returns if the TM is in the reject state """
-        return self.reject_state == self.current_state or self.MAX_LOOPS < 0
+        """
+        Returns if the TM is in the reject state, out of loops or, after
+        doom(), somewhere it can no longer accept
+        """
+        return self.reject_state == self.current_state or self.MAX_LOOPS < 0 \
+            or (self.doomed != None and self.doomed.dooms(self))
 
     def begin(self):
-        """ Begins computation """
+        """
+        Begins computation. Returns if the TM accepts or, when detect_cycles
+        is set, None if it was found to loop forever
+        """
+        if self.engine != "interpreted" or self.detect_cycles \
+                or self.profile != None:
+            if self._compiled == None:
+                self.compile()
+            if self.doomed != None and self.doomed.dooms(self):
+                return False
+            if self.profile != None:
+                return self._compiled.run_profiled(self, self.profile)
+            if self.detect_cycles:
+                return self._compiled.run_cycles(self)
+            if self.engine == "runlength":
+                return self._compiled.run_runs(self)
+            if self.engine == "macro":
+                return self._compiled.run_macro(self, self.macro_steps)
+            return self._compiled.run(self)
         while not self.accept() and not self.reject():
             self._read(self.tape[self.tape_position])
         return self.accept()
+
+    def steps_taken(self):
+        """ The number of steps taken since the tape was last set """
+        return self._reset_loops - self.MAX_LOOPS
+
+    def status(self):
+        """ Returns the Status of the computation """
+        if self.accept():
+            return Status.ACCEPTED
+        if self.reject():
+            return Status.REJECTED
+        return Status.RUNNING
+
+    def run(self, max_steps=None):
+        """
+        Continues the computation for at most max_steps steps (until it
+        halts if None) with the selected engine and returns its Status.
+        Unlike begin() it can be called again to carry on from where it
+        stopped. With detect_cycles set, cycles are only looked for within
+        one call.
+        """
+        loops = self.MAX_LOOPS
+        if max_steps == None:
+            budget = loops
+        elif max_steps <= 0:
+            return self.status()
+        else:
+            budget = min(max_steps - 1, loops)
+        self.MAX_LOOPS = budget
+        try:
+            res = self.begin()
+        finally:
+            #Put back the loops that were held back from begin()
+            self.MAX_LOOPS = loops - (budget - self.MAX_LOOPS)
+        if res == None:
+            return Status.LOOPING
+        return self.status()
+
+    def iterate(self, chunk=1, configurations=False):
+        """
+        Runs the computation chunk steps at a time, yielding after every
+        chunk the number of steps taken so far or, if configurations is set,
+        the (state, tape position, list of tape symbols) reached. Stops once
+        the computation is no longer RUNNING, so callers can interleave many
+        machines or stop early by not asking for more.
+        """
+        while True:
+            status = self.run(chunk)
+            if configurations:
+                yield self.current_state, self.tape_position, list(self.tape)
+            else:
+                yield self.steps_taken()
+            if status != Status.RUNNING:
+                return
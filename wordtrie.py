@@ -0,0 +1,181 @@
+"""
+===============================================================================
+This file runs many words on one Turing Machine by sharing the steps taken
+on their common prefixes, organising the words into a trie
+===============================================================================
+"""
+
+class _Node():
+    """
+    A node of the trie, standing for the words that start with the labels
+    on the path down to it. Nodes with one child are merged into it, so a
+    label can be several symbols long
+    """
+    __slots__ = ("label", "children", "ends")
+
+    def __init__(self, label):
+        self.label = label
+        #Child nodes keyed by the first symbol of their label
+        self.children = {}
+        #Indices of the words that end here
+        self.ends = []
+
+    def indices(self):
+        """ The indices of every word in this subtree """
+        found = []
+        nodes = [self]
+        while nodes:
+            node = nodes.pop()
+            found.extend(node.ends)
+            nodes.extend(node.children.values())
+        return found
+
+def _common_prefix(a, b):
+    """
+    The length of the longest common prefix of strings a and b, found by a
+    binary search so long prefixes are compared a few times in C
+    """
+    low, high = 0, min(len(a), len(b))
+    while low < high:
+        middle = (low + high + 1) // 2
+        if b.startswith(a[:middle]):
+            low = middle
+        else:
+            high = middle - 1
+    return low
+
+def _indices(node):
+    """ The indices of the words a node (or list of indices) stands for """
+    if isinstance(node, list):
+        return node
+    return node.indices()
+
+class TrieMachine():
+    """
+    Runs the tables of a CompiledMachine on a trie of words.
+    Until the head first reads the cell after a prefix, the computation is
+    the same for every word with that prefix, so it is done once. Only when
+    the head reaches that cell is the configuration copied, once for every
+    way the words go on from the prefix and once for the words that end
+    there (whose tape is blank from then on). Words are strings of one
+    character symbols. A word list with long shared
+    prefixes then costs steps for each node of the trie rather than for
+    each word, eg for the left to right scans of examples/palin.txt.
+    """
+    compiled = None
+    #The number of steps taken by the last run, counting shared steps once
+    steps = 0
+
+    def __init__(self, compiled):
+        self.compiled = compiled
+
+    def _trie(self, words):
+        """
+        Internal method for building the trie of the words. The words are
+        added in sorted order, so each one only shares its longest common
+        prefix with the word before it and the nodes for that prefix are
+        the path kept in a stack
+        """
+        root = _Node("")
+        #The path to the last word added as (node, length of the prefix
+        #ending with the node's label)
+        path = [(root, 0)]
+        previous = ""
+        for i in sorted(range(len(words)), key=words.__getitem__):
+            word = words[i]
+            common = _common_prefix(previous, word)
+            below = None
+            while path[-1][1] > common:
+                below = path.pop()
+            node, depth = path[-1]
+            if depth < common:
+                #The prefix ends inside the label of below, so split it
+                child = below[0]
+                parent = _Node(child.label[:common - depth])
+                child.label = child.label[common - depth:]
+                parent.children[child.label[0]] = child
+                node.children[parent.label[0]] = parent
+                node = parent
+                path.append((parent, common))
+            if len(word) > common:
+                child = node.children[word[common]] = _Node(word[common:])
+                node = child
+                path.append((child, len(word)))
+            node.ends.append(i)
+            previous = word
+        return root
+
+    def run(self, words, max_loops=100000, bidirectional=False):
+        """
+        Returns the result of each word in words, the same as running them one
+        after another with new_tape() and begin() on a TM with these options.
+        Raises KeyError, like begin(), if a word reads a symbol its state has
+        no transition for (reporting the first such word).
+        """
+        compiled = self.compiled
+        table = compiled.table
+        accept = compiled.accept
+        reject = compiled.reject
+        blank = compiled.blank
+        #Symbols of the words missing from the alphabet, see encode_word
+        unknown = []
+        encode = lambda label: compiled.alphabet.encode_word(label, unknown)
+        results = [False] * len(words)
+        errors = []
+        steps = 0
+        #Configurations waiting to run: (node, state, cells, head, loops).
+        #cells holds the tape up to the end of the label of node, and node is
+        #a list of word indices once the rest of the tape is known to be blank
+        pending = [(self._trie(words), compiled.start, [], 0, max_loops)]
+        while pending:
+            node, s, cells, head, loops = pending.pop()
+            taken = loops
+            while s != accept and s != reject and loops >= 0:
+                i = 0
+                try:
+                    #The same tight loop as CompiledMachine.run, leaving it by
+                    #IndexError at the end of the known cells, TypeError on
+                    #halting, or either for a missing transition
+                    for i in range(loops + 1):
+                        s, cells[head], move = table[s][cells[head]]
+                        head = head + move
+                        if head < 0:
+                            head = 0
+                            if bidirectional:
+                                cells.insert(0, blank)
+                    i = loops + 1
+                except (IndexError, TypeError):
+                    pass
+                loops = loops - i
+                if s == accept or s == reject or loops < 0:
+                    break
+                if head < len(cells):
+                    #No transition for this symbol, every word here raises
+                    loops = loops - 1
+                    symbol = compiled.alphabet.symbol(cells[head], unknown)
+                    for i in _indices(node):
+                        errors.append((i, symbol))
+                    node = None
+                    break
+                if isinstance(node, list):
+                    cells.append(blank)
+                    continue
+                #The words part ways here, the last one carries on with
+                #cells and the others get a copy
+                forks = [(child, encode(child.label)) for child in node.children.values()]
+                if node.ends:
+                    forks.append((node.ends, [blank]))
+                for j, (child, ids) in enumerate(forks):
+                    tape = cells if j == len(forks) - 1 else cells[:]
+                    tape.extend(ids)
+                    pending.append((child, s, tape, head, loops))
+                node = None
+                break
+            if s == accept and node != None:
+                for i in _indices(node):
+                    results[i] = True
+            steps = steps + taken - loops
+        self.steps = steps
+        if errors:
+            raise KeyError(min(errors)[1])
+        return results